@@ -0,0 +1,290 @@
+from typing import Callable, List, Dict, Any, Optional
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import sys
+import timeit
+
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator
+from featurehub_sdk.client_context import ClientEvalFeatureContext, RolloutStrategy
+from featurehub_sdk.featurehub_config import FeatureHubConfig
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.local_edge import LocalEdgeServer
+from featurehub_sdk.strategy_matchers import ApplyFeature
+from featurehub_sdk.version import sdk_version
+
+from benchmarks.synthetic import generate_features, generate_context_attributes, fill_context, generate_updates
+
+# reproducible micro benchmarks for the hot paths of the SDK. run from the root of the repository:
+#
+#   python -m benchmarks.run --output results.json
+#   python -m benchmarks.run --compare results.json --threshold 0.2
+#
+# each benchmark reports the time per operation (best, median and mean of the repeats) in nanoseconds, and with
+# --compare the run fails if any benchmark's best time is more than threshold slower than the baseline
+
+
+class Benchmark:
+    name: str
+    params: Dict[str, Any]
+    ops: int
+    _setup: Callable[[], Callable[[], Any]]
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], Any]], ops: int = 1, **params):
+        self.name = name
+        self.params = params
+        self.ops = ops
+        self._setup = setup
+
+    @property
+    def full_name(self) -> str:
+        return self.name + ''.join(f"[{k}={v}]" for k, v in self.params.items())
+
+    def setup(self) -> Callable[[], Any]:
+        return self._setup()
+
+
+# anything a benchmark's setup started (e.g. a local edge server) that needs stopping once we are done
+_cleanups: List[Callable[[], Any]] = []
+
+
+def _repository(features: List[dict]) -> FeatureHubRepository:
+    repo = FeatureHubRepository()
+    repo.notify('features', features)
+    return repo
+
+
+def _contexts(repo: FeatureHubRepository, count: int = 1000) -> List[ClientEvalFeatureContext]:
+    return [fill_context(ClientEvalFeatureContext(repo, None), attrs) for attrs in generate_context_attributes(count)]
+
+
+def _next_context(contexts: List[ClientEvalFeatureContext], cold: bool) -> Callable[[], ClientEvalFeatureContext]:
+    # the contexts are used over and over, and a context remembers its condition results, percentage keys and parsed
+    # attributes, so a warm one mostly times those lookups. a cold one has forgotten them, as a new request's would,
+    # so the matchers themselves are timed
+    found = itertools.cycle(contexts)
+    if not cold:
+        return found.__next__
+
+    def next_cold():
+        ctx = next(found)
+        ctx._attributes_changed()
+        return ctx
+
+    return next_cold
+
+
+def _name(name: str, cold: bool) -> str:
+    return name + '.cold' if cold else name
+
+
+def bench_apply(complexity: str, cold: bool = False) -> Benchmark:
+    def setup():
+        feature = generate_features(1, complexity)[0]
+        strategies = [RolloutStrategy(s) for s in feature['strategies']]
+        apply = ApplyFeature()
+        next_context = _next_context(_contexts(FeatureHubRepository()), cold)
+        return lambda: apply.apply(strategies, feature['key'], feature['id'], next_context())
+
+    return Benchmark(_name('apply', cold), setup, complexity=complexity)
+
+
+def bench_plain_flag(size: int) -> Benchmark:
+    def setup():
+        features = generate_features(size, 'none')
+        repo = _repository(features)
+        key = next(f['key'] for f in features if f['type'] == 'BOOLEAN')
+        return lambda: repo.feature(key).get_flag
+
+    return Benchmark('get_flag.repository', setup, features=size)
+
+
+def bench_context_value(complexity: str, cold: bool = False) -> Benchmark:
+    def setup():
+        features = generate_features(50, complexity)
+        repo = _repository(features)
+        keys = itertools.cycle([f['key'] for f in features])
+        next_context = _next_context(_contexts(repo), cold)
+        return lambda: next_context().feature(next(keys)).get_value
+
+    return Benchmark(_name('get_value.context', cold), setup, complexity=complexity)
+
+
+def bench_evaluate_all(size: int, complexity: str, cold: bool = False) -> Benchmark:
+    # one user, every feature, as you'd do rendering a page
+    def setup():
+        features = generate_features(size, complexity)
+        repo = _repository(features)
+        keys = [f['key'] for f in features]
+        next_context = _next_context(_contexts(repo, 100), cold)
+
+        def evaluate():
+            ctx = next_context()
+            for key in keys:
+                ctx.feature(key).get_value
+
+        return evaluate
+
+    return Benchmark(_name('evaluate_all.context', cold), setup, ops=size, features=size, complexity=complexity)
+
+
+def bench_batch(rows: int, complexity: str) -> Benchmark:
+    # one feature for a whole table of users, as an offline job would
+    def setup():
+        features = generate_features(50, complexity)
+        evaluator = BatchFeatureEvaluator(_repository(features))
+        attributes = generate_context_attributes(rows)
+        columns = {name: [a[name] for a in attributes] for name in attributes[0].keys()}
+        keys = itertools.cycle([f['key'] for f in features])
+        return lambda: evaluator.evaluate(next(keys), columns)
+
+    return Benchmark('batch.evaluate', setup, ops=rows, rows=rows, complexity=complexity)
+
+
+def bench_notify_features(size: int, complexity: str) -> Benchmark:
+    def setup():
+        features = generate_features(size, complexity)
+        return lambda: FeatureHubRepository().notify('features', features)
+
+    return Benchmark('notify.features', setup, ops=size, features=size, complexity=complexity)
+
+
+def bench_notify_feature(size: int) -> Benchmark:
+    def setup():
+        features = generate_features(size, 'simple')
+        repo = _repository(features)
+        updates = itertools.cycle(generate_updates(features, 1000))
+        versions = itertools.count(2)
+        return lambda: repo.notify('feature', dict(next(updates), version=next(versions)))
+
+    return Benchmark('notify.feature', setup, features=size)
+
+
+def bench_config_init(size: int) -> Benchmark:
+    def setup():
+        server = LocalEdgeServer({'environments': {'bench*key': {'features': generate_features(size, 'simple')}}})
+        server.start()
+        _cleanups.append(server.stop)
+
+        def init():
+            config = FeatureHubConfig(server.url, ['bench*key'])
+            config.use_polling_edge_service(0)
+            asyncio.run(config.init())
+            config.close()
+
+        return init
+
+    return Benchmark('config.init.polling', setup, features=size)
+
+
+def benchmarks(sizes: List[int]) -> List[Benchmark]:
+    found = []
+    for complexity in ('simple', 'complex'):
+        for cold in (False, True):
+            found.append(bench_apply(complexity, cold))
+            found.append(bench_context_value(complexity, cold))
+        found.append(bench_batch(10000, complexity))
+    for size in sizes:
+        found.append(bench_plain_flag(size))
+        found.append(bench_notify_feature(size))
+        found.append(bench_config_init(size))
+        for complexity in ('none', 'complex'):
+            found.append(bench_evaluate_all(size, complexity))
+            found.append(bench_notify_features(size, complexity))
+        found.append(bench_evaluate_all(size, 'complex', True))
+
+    return found
+
+
+def run(benchmark: Benchmark, repeat: int, min_time: float) -> Dict[str, Any]:
+    timer = timeit.Timer(benchmark.setup())
+
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+
+    per_op = [t / number / benchmark.ops * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        'name': benchmark.full_name,
+        'benchmark': benchmark.name,
+        'params': benchmark.params,
+        'loops': number,
+        'ops': benchmark.ops,
+        'best_ns': min(per_op),
+        'median_ns': statistics.median(per_op),
+        'mean_ns': statistics.mean(per_op),
+        'stdev_ns': statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+        'ops_per_sec': 1e9 / min(per_op),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {b['name']: b for b in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+
+        change = result['best_ns'] / before['best_ns'] - 1
+        result['change'] = change
+        if change > threshold:
+            regressions.append(f"{result['name']}: {before['best_ns']:.0f}ns -> {result['best_ns']:.0f}ns "
+                               f"({change:+.0%})")
+
+    return regressions
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='FeatureHub SDK benchmarks')
+    parser.add_argument('--sizes', default='10,200,2000', help='comma separated feature set sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per repeat')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--output', help='write machine readable results to this json file')
+    parser.add_argument('--compare', help='baseline json file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown before failing, 0.2 = 20%%')
+    options = parser.parse_args(args)
+
+    results = []
+    try:
+        for benchmark in benchmarks([int(s) for s in options.sizes.split(',')]):
+            if options.filter not in benchmark.full_name:
+                continue
+
+            result = run(benchmark, options.repeat, options.min_time)
+            results.append(result)
+            print(f"{result['name']:<70} {result['best_ns']:>14,.0f} ns/op {result['ops_per_sec']:>14,.0f} op/s",
+                  flush=True)
+    finally:
+        for cleanup in _cleanups:
+            cleanup()
+
+    regressions = compare(results, options.compare, options.threshold) if options.compare else []
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'sdk_version': sdk_version,
+                'python': sys.version,
+                'implementation': platform.python_implementation(),
+                'machine': platform.machine(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+from typing import List, Dict, Any
+
+import random
+
+from featurehub_sdk.client_context import ClientContext
+from featurehub_sdk.strategy_attribute_country_name import StrategyAttributeCountryName
+from featurehub_sdk.strategy_attribute_device_name import StrategyAttributeDeviceName
+from featurehub_sdk.strategy_attribute_platform_name import StrategyAttributePlatformName
+
+# synthetic, but realistic, feature sets and contexts for the benchmarks. everything is driven from a seeded
+# random so two runs on the same version of python produce exactly the same data
+
+_COUNTRIES = [c.value for c in StrategyAttributeCountryName]
+_DEVICES = [d.value for d in StrategyAttributeDeviceName]
+_PLATFORMS = [p.value for p in StrategyAttributePlatformName]
+_VERSIONS = ['1.0.0', '1.2.3', '2.0.0', '2.1.0-RC1', '3.4.5']
+_WAREHOUSES = ['ponsonby', 'newmarket', 'karori', 'petone', 'riccarton', 'frankton']
+
+# complexity is the number of strategies each feature gets, and how many attributes each of those has
+COMPLEXITY = {
+    'none': (0, 0),
+    'simple': (2, 1),
+    'complex': (6, 3),
+}
+
+
+def _attribute(rnd: random.Random) -> dict:
+    kind = rnd.randrange(6)
+    if kind == 0:
+        return {'fieldName': 'country', 'conditional': 'EQUALS', 'type': 'STRING',
+                'values': rnd.sample(_COUNTRIES, 3)}
+    if kind == 1:
+        return {'fieldName': 'device', 'conditional': 'EQUALS', 'type': 'STRING', 'values': [rnd.choice(_DEVICES)]}
+    if kind == 2:
+        return {'fieldName': 'platform', 'conditional': 'NOT_EQUALS', 'type': 'STRING',
+                'values': [rnd.choice(_PLATFORMS)]}
+    if kind == 3:
+        return {'fieldName': 'version', 'conditional': 'GREATER_EQUALS', 'type': 'SEMANTIC_VERSION',
+                'values': [rnd.choice(_VERSIONS)]}
+    if kind == 4:
+        return {'fieldName': 'age', 'conditional': 'GREATER', 'type': 'NUMBER', 'values': [rnd.randrange(18, 65)]}
+
+    return {'fieldName': 'warehouseId', 'conditional': 'INCLUDES', 'type': 'STRING',
+            'values': rnd.sample(_WAREHOUSES, 2)}
+
+
+def _strategy(rnd: random.Random, index: int, attributes: int, feature_type: str) -> dict:
+    strategy: Dict[str, Any] = {'id': f"strategy-{index}", 'value': _value(rnd, feature_type)}
+
+    if index % 2 == 0:
+        strategy['percentage'] = rnd.randrange(1, 200000)
+    if attributes:
+        strategy['attributes'] = [_attribute(rnd) for _ in range(attributes)]
+
+    return strategy
+
+
+def _value(rnd: random.Random, feature_type: str):
+    if feature_type == 'BOOLEAN':
+        return rnd.random() > 0.5
+    if feature_type == 'NUMBER':
+        return rnd.randrange(1000) / 10
+
+    return f"value-{rnd.randrange(1000)}"
+
+
+def generate_features(count: int, complexity: str = 'simple', seed: int = 1) -> List[dict]:
+    rnd = random.Random(seed)
+    strategies, attributes = COMPLEXITY[complexity]
+    features = []
+
+    for i in range(count):
+        feature_type = rnd.choice(['BOOLEAN', 'BOOLEAN', 'BOOLEAN', 'STRING', 'NUMBER'])
+        features.append({
+            'id': f"feature-id-{i}",
+            'key': f"FEATURE_{i}",
+            'l': False,
+            'version': 1,
+            'type': feature_type,
+            'value': _value(rnd, feature_type),
+            'strategies': [_strategy(rnd, s, attributes, feature_type) for s in range(strategies)],
+        })
+
+    return features
+
+
+def generate_context_attributes(count: int, seed: int = 2) -> List[Dict[str, str]]:
+    rnd = random.Random(seed)
+    return [{
+        'userkey': f"user-{rnd.getrandbits(64):016x}@example.com",
+        'country': rnd.choice(_COUNTRIES),
+        'device': rnd.choice(_DEVICES),
+        'platform': rnd.choice(_PLATFORMS),
+        'version': rnd.choice(_VERSIONS),
+        'age': str(rnd.randrange(12, 90)),
+        'warehouseId': rnd.choice(_WAREHOUSES),
+    } for _ in range(count)]
+
+
+def fill_context(ctx: ClientContext, attributes: Dict[str, str]) -> ClientContext:
+    for key, value in attributes.items():
+        ctx.attribute_values(key, [value])
+    return ctx
+
+
+def generate_updates(features: List[dict], count: int, seed: int = 3) -> List[dict]:
+    # a stream of single feature updates, each a new version of a random feature
+    rnd = random.Random(seed)
+    versions = {f['key']: f['version'] for f in features}
+    updates = []
+
+    for _ in range(count):
+        feature = rnd.choice(features)
+        versions[feature['key']] += 1
+        updates.append(dict(feature, version=versions[feature['key']], value=_value(rnd, feature['type'])))
+
+    return updates
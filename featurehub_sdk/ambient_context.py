@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Optional, Any, Dict, Tuple, Callable, Iterator, Iterable
+import json
+
+from featurehub_sdk.client_context import ClientContext, FeatureState
+
+# lets a web framework's middleware build the context for a request once, and any code handling that request read
+# features from it without the context being passed down through every call. the context is held in a contextvar,
+# so each thread, and each asyncio task (which gets a copy of the contextvars of whatever created it), sees the
+# context of the request it is working on:
+#
+#   from featurehub_sdk import ambient_context
+#   from featurehub_sdk.ambient_context import use_context
+#
+#   with use_context(config.new_context().user_key(user_id)):
+#       ...
+#       if ambient_context.get_flag('NEW_CHECKOUT'):
+#
+# values read through the ambient context are remembered for the rest of the request (until the feature's version
+# or one of the context's attributes changes), so a feature read in many places is only evaluated once, and is
+# only counted once by analytics. they aren't while the repository has interceptors, whose values can change at
+# any time.
+
+
+class RequestScope:
+    _context: ClientContext
+    _values: Dict[Tuple[str, str], Tuple[int, Any]]
+    _changes: int
+
+    def __init__(self, context: ClientContext):
+        self._context = context
+        self._values = {}
+        self._changes = context._changes
+
+    @property
+    def context(self) -> ClientContext:
+        return self._context
+
+    def feature(self, key: str) -> FeatureState:
+        return self._context.feature(key)
+
+    def _value(self, key: str, kind: str) -> Any:
+        if self._context._repository.has_interceptors():
+            return getattr(self._context.feature(key), kind)
+
+        if self._context._changes != self._changes:
+            self._values.clear()
+            self._changes = self._context._changes
+
+        feature = self._context.feature(key)
+        version = feature.get_version
+        found = self._values.get((key, kind))
+
+        if found is not None and found[0] == version:
+            return found[1]
+
+        value = getattr(feature, kind)
+        self._values[(key, kind)] = (version, value)
+        return value
+
+    def get_flag(self, key: str) -> Optional[bool]:
+        return self._value(key, 'get_boolean')
+
+    def get_boolean(self, key: str) -> Optional[bool]:
+        return self._value(key, 'get_boolean')
+
+    def is_enabled(self, key: str) -> bool:
+        return self._value(key, 'get_boolean') is True
+
+    def get_string(self, key: str) -> Optional[str]:
+        return self._value(key, 'get_string')
+
+    def get_number(self, key: str) -> Optional[Decimal]:
+        return self._value(key, 'get_number')
+
+    def get_raw_json(self, key: str) -> Optional[str]:
+        return self._value(key, 'get_raw_json')
+
+    def get_json(self, key: str) -> Optional[Any]:
+        # parsed every time, so callers can't change each other's copy
+        val = self._value(key, 'get_raw_json')
+        return json.loads(val) if val else None
+
+    def is_set(self, key: str) -> bool:
+        return self._value(key, 'get_value') is not None
+
+
+_current_scope: ContextVar[Optional[RequestScope]] = ContextVar('featurehub_request_scope', default=None)
+
+
+# make this the ambient context until the end of the with block
+@contextmanager
+def use_context(context: ClientContext) -> Iterator[RequestScope]:
+    scope = RequestScope(context)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def current_scope() -> RequestScope:
+    scope = _current_scope.get()
+    if scope is None:
+        raise LookupError('there is no featurehub context for this request, set one with use_context() '
+                          'or one of the middlewares')
+    return scope
+
+
+def current_context() -> Optional[ClientContext]:
+    scope = _current_scope.get()
+    return scope.context if scope is not None else None
+
+
+def feature(key: str) -> FeatureState:
+    return current_scope().feature(key)
+
+
+def get_flag(key: str) -> Optional[bool]:
+    return current_scope().get_flag(key)
+
+
+def get_boolean(key: str) -> Optional[bool]:
+    return current_scope().get_boolean(key)
+
+
+def is_enabled(key: str) -> bool:
+    return current_scope().is_enabled(key)
+
+
+def get_string(key: str) -> Optional[str]:
+    return current_scope().get_string(key)
+
+
+def get_number(key: str) -> Optional[Decimal]:
+    return current_scope().get_number(key)
+
+
+def get_raw_json(key: str) -> Optional[str]:
+    return current_scope().get_raw_json(key)
+
+
+def get_json(key: str) -> Optional[Any]:
+    return current_scope().get_json(key)
+
+
+def is_set(key: str) -> bool:
+    return current_scope().is_set(key)
+
+
+# context_builder is given the WSGI environ (or the ASGI scope) and a cleared context from the config's pool to fill
+# in, e.g. lambda environ, ctx: ctx.user_key(environ.get('HTTP_X_USER_ID')). the context goes back to the pool at the
+# end of the request, so don't hold on to it (or start work that outlives the request and reads from it).
+ContextBuilder = Callable[[dict, ClientContext], None]
+
+
+class FeatureHubWSGIMiddleware:
+    # the context is only there while the application is called, not while the server iterates over the response,
+    # so a streamed response body can't read features from it
+    def __init__(self, app: Callable, config: "FeatureHubConfig", context_builder: ContextBuilder):
+        self._app = app
+        self._config = config
+        self._context_builder = context_builder
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        with self._config.pooled_context() as ctx:
+            self._context_builder(environ, ctx)
+            ctx.build_sync()
+
+            with use_context(ctx):
+                return self._app(environ, start_response)
+
+
+class FeatureHubASGIMiddleware:
+    def __init__(self, app: Callable, config: "FeatureHubConfig", context_builder: ContextBuilder):
+        self._app = app
+        self._config = config
+        self._context_builder = context_builder
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable):
+        # lifespan events have no user
+        if scope.get('type') not in ('http', 'websocket'):
+            await self._app(scope, receive, send)
+            return
+
+        with self._config.pooled_context() as ctx:
+            self._context_builder(scope, ctx)
+            # as with WSGI, only the edge needs to hear about a server evaluated context. building a client evaluated
+            # one would poll the edge (and start another polling timer) for every request
+            if not ctx.client_evaluated():
+                await ctx.build()
+
+            with use_context(ctx):
+                await self._app(scope, receive, send)
@@ -0,0 +1,226 @@
+from typing import Optional, List, Dict, Tuple, Any
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+import urllib3
+
+from featurehub_sdk.version import sdk_version
+
+log = logging.getLogger('featurehub_sdk')
+
+# counts of which features were evaluated to which value (and by which strategy). register a collector on the
+# repository (register_analytics) and every value read is counted. nothing is exported per read, each thread bumps a
+# counter in its own dictionary and a background thread periodically works out what changed and hands a batch to
+# the exporter, so the cost on the read path is a dictionary update.
+
+# (feature key, value, strategy id)
+CountKey = Tuple[str, Any, Optional[str]]
+
+
+class AnalyticsExporter:
+    # a batch is {'sdk': ..., 'start': epoch seconds, 'end': epoch seconds,
+    #             'counts': [{'feature': key, 'value': value, 'strategyId': id or None, 'count': n}, ...]}
+    def export(self, batch: dict):
+        pass
+
+    def close(self):
+        pass
+
+
+def _json_default(value):
+    # number features come back as Decimal
+    return str(value)
+
+
+class FileAnalyticsExporter(AnalyticsExporter):
+    # appends each batch as a line of json, for something like a log shipper to pick up
+    _path: str
+    _lock: threading.Lock
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, batch: dict):
+        line = json.dumps(batch, default=_json_default)
+        with self._lock:
+            with open(self._path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class HttpAnalyticsExporter(AnalyticsExporter):
+    # posts each batch as json, typically to a collector running alongside the application
+    _url: str
+    _headers: Dict[str, str]
+    _timeout: float
+    _http: urllib3.PoolManager
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        self._url = url
+        self._headers = {'Content-Type': 'application/json', 'X-SDK': 'Python', 'X-SDK-Version': sdk_version}
+        if headers:
+            self._headers.update(headers)
+        self._timeout = timeout
+        self._http = urllib3.PoolManager()
+
+    def export(self, batch: dict):
+        resp = self._http.request(method='POST', url=self._url, headers=self._headers, timeout=self._timeout,
+                                  body=json.dumps(batch, default=_json_default).encode('utf-8'))
+        if resp.status >= 300:
+            log.warning(f"analytics collector at {self._url} responded with {resp.status}, batch dropped")
+
+    def close(self):
+        self._http.clear()
+
+
+class AnalyticsCollector:
+    _exporter: AnalyticsExporter
+    _flush_interval: float
+    _local: threading.local
+    _buffers: List[Tuple[threading.Thread, Dict[CountKey, int]]]  # every thread's counts, only that thread writes
+    _exported: Dict[int, Dict[CountKey, int]]  # what we have already exported from each buffer, by id()
+    _buffers_lock: threading.Lock
+    _flush_lock: threading.Lock
+    _period_start: float
+    _stop: threading.Event
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, exporter: AnalyticsExporter, flush_interval: float = 10.0, start: bool = True):
+        self._exporter = exporter
+        self._flush_interval = flush_interval
+        self._local = threading.local()
+        self._buffers = []
+        self._exported = {}
+        self._buffers_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._period_start = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if start:
+            self.start()
+
+    # only the thread that forked comes with us, so the child starts again with its own buffers, locks (which a thread
+    # of the parent may have held) and flush thread. what was counted before the fork is the parent's to export
+    def _after_fork_in_child(self):
+        running = self._thread is not None and not self._stop.is_set()
+        self._local = threading.local()
+        self._buffers = []
+        self._exported = {}
+        self._buffers_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._period_start = time.time()
+        self._thread = None
+
+        if running:
+            self.start()
+
+    def start(self):
+        with _collectors_lock:
+            _collectors.add(self)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='featurehub-analytics', daemon=True)
+            self._thread.start()
+
+    def record(self, key: str, value: Any, strategy_id: Optional[str]):
+        try:
+            counts = self._local.counts
+        except AttributeError:
+            counts = self._new_buffer()
+
+        count_key = (key, value, strategy_id)
+        counts[count_key] = counts.get(count_key, 0) + 1
+
+    def _new_buffer(self) -> Dict[CountKey, int]:
+        counts = {}
+        self._local.counts = counts
+        with self._buffers_lock:
+            self._buffers.append((threading.current_thread(), counts))
+        return counts
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    def _collect(self) -> Dict[CountKey, int]:
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+
+        totals: Dict[CountKey, int] = {}
+        for thread, counts in buffers:
+            # checked before we copy, so anything a thread counted before it finished is in the copy
+            alive = thread.is_alive()
+
+            # copying a dict is a single operation under the GIL, so we see a consistent view of the counts even
+            # though the owning thread carries on writing to it. counts only go up, so the difference between this
+            # copy and the last one is what happened in between
+            current = counts.copy()
+            exported = self._exported.get(id(counts), {})
+            for count_key, count in current.items():
+                delta = count - exported.get(count_key, 0)
+                if delta:
+                    totals[count_key] = totals.get(count_key, 0) + delta
+
+            if alive:
+                self._exported[id(counts)] = current
+            else:
+                # the thread is gone, so nothing more will be counted in this buffer
+                self._exported.pop(id(counts), None)
+                with self._buffers_lock:
+                    self._buffers.remove((thread, counts))
+
+        return totals
+
+    def flush(self) -> Optional[dict]:
+        with self._flush_lock:
+            totals = self._collect()
+            end = time.time()
+            start = self._period_start
+            self._period_start = end
+
+            if not totals:
+                return None
+
+            batch = {
+                'sdk': f"python/{sdk_version}",
+                'start': start,
+                'end': end,
+                'counts': [{'feature': key, 'value': value, 'strategyId': strategy_id, 'count': count}
+                           for (key, value, strategy_id), count in totals.items()],
+            }
+
+            try:
+                self._exporter.export(batch)
+            except Exception as e:
+                log.warning(f"failed to export feature analytics, batch dropped: {e}")
+
+            return batch
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+        self._exporter.close()
+
+
+# collectors with a flush thread to restart in a forked child, held weakly so they can still be garbage collected
+_collectors: "weakref.WeakSet[AnalyticsCollector]" = weakref.WeakSet()
+_collectors_lock = threading.Lock()
+
+
+def _after_fork_in_child():
+    global _collectors_lock
+    _collectors_lock = threading.Lock()
+    for collector in list(_collectors):
+        collector._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,316 @@
+from typing import Optional, List, Dict, Any, Mapping, Tuple, Callable, Iterable
+import datetime
+
+from featurehub_sdk.client_context import ClientContext, RolloutStrategy, RolloutStrategyAttribute, \
+    RolloutStrategyAttributeConditional, RolloutStrategyFieldType, AttributeValue
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.interceptors import InterceptorValue
+from featurehub_sdk.strategy_matchers import ApplyFeature
+
+# evaluates one feature for a whole table of contexts at a time, for offline jobs that need to know a feature's
+# value for a lot of users. the contexts are given as columns (attribute name -> one value per row, None if that row
+# doesn't have the attribute), which can be lists, tuples or anything with a tolist() such as a numpy array or a
+# pandas series.
+#
+# instead of evaluating ApplyFeature row by row, the work that depends on a single attribute is done once per column:
+# percentage keys are hashed in bulk (once per distinct key) and each strategy attribute is matched once per distinct
+# value in its column. only the (cheap) combination of those results follows ApplyFeature row by row, so the
+# results are exactly those you get from a ClientEvalFeatureContext per row.
+
+
+def _column(values: Any) -> List[Any]:
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+
+    values = list(values)
+    # allow the same shape as ClientContext.attribute_values, where the first value is the one that counts
+    if any(isinstance(v, (list, tuple)) for v in values):
+        values = [(v[0] if len(v) else None) if isinstance(v, (list, tuple)) else v for v in values]
+
+    return values
+
+
+def _map_distinct(fn: Callable[[Any], Any], column: Iterable[Any]) -> List[Any]:
+    # call fn once per distinct value in the column. if it raises we keep the exception and only raise it if a row
+    # actually needs that result, as ApplyFeature would have
+    memo = {}
+    results = []
+
+    for value in column:
+        key = (value.__class__, value)  # so True, 1 and 1.0 are not the same value
+        try:
+            result = memo[key]
+        except KeyError:
+            result = memo[key] = _call(fn, value)
+        except TypeError:  # unhashable
+            result = _call(fn, value)
+
+        results.append(result)
+
+    return results
+
+
+def _call(fn: Callable[[Any], Any], value: Any) -> Any:
+    try:
+        return fn(value)
+    except Exception as e:
+        return e
+
+
+def _matched(result) -> bool:
+    if isinstance(result, Exception):
+        raise result
+
+    return result
+
+
+class ContextColumns:
+    # a table of contexts, column by column. anything derived from the columns that doesn't depend on a feature
+    # (e.g. the default percentage key of each row) is worked out once and shared by every feature evaluated
+    _columns: Dict[str, List[Any]]
+    _rows: int
+    _default_percentage_keys: Optional[List[Optional[str]]]
+    _percentage_keys: Dict[Tuple[str, ...], List[str]]
+
+    def __init__(self, columns: Mapping[str, Any]):
+        self._columns = {name: _column(values) for name, values in columns.items()}
+        lengths = {len(values) for values in self._columns.values()}
+
+        if len(lengths) > 1:
+            raise ValueError(f"all context columns must be the same length, got lengths {sorted(lengths)}")
+
+        self._rows = lengths.pop() if lengths else 0
+        self._default_percentage_keys = None
+        self._percentage_keys = {}
+
+    @classmethod
+    def of(cls, columns) -> "ContextColumns":
+        return columns if isinstance(columns, ContextColumns) else ContextColumns(columns)
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    def __len__(self):
+        return self._rows
+
+    def column(self, name: str) -> List[Any]:
+        found = self._columns.get(name)
+        return found if found is not None else [None] * self._rows
+
+    def slice(self, start: int, end: int) -> "ContextColumns":
+        return ContextColumns({name: values[start:end] for name, values in self._columns.items()})
+
+    @property
+    def default_percentage_keys(self) -> List[Optional[str]]:
+        # ClientContext.default_percentage_key: the session if there is one, otherwise the user key
+        if self._default_percentage_keys is None:
+            self._default_percentage_keys = [
+                (str(session) if session else (str(user) if user is not None else None))
+                for session, user in zip(self.column(ClientContext.SESSION), self.column(ClientContext.USER_KEY))
+            ]
+
+        return self._default_percentage_keys
+
+    def percentage_keys(self, attributes: List[str]) -> List[str]:
+        # ApplyFeature.determine_percentage_key for strategies with percentage attributes
+        name = tuple(attributes)
+        found = self._percentage_keys.get(name)
+
+        if found is None:
+            columns = [self.column(a) for a in attributes]
+            found = self._percentage_keys[name] = [
+                '$'.join(['<none>' if v is None else str(v) for v in row]) for row in zip(*columns)
+            ] if columns else [''] * self._rows
+
+        return found
+
+
+class BatchResult:
+    _values: List[Any]
+    _strategy_indexes: List[Optional[int]]
+    _strategies: List[RolloutStrategy]
+
+    def __init__(self, values: List[Any], strategy_indexes: List[Optional[int]],
+                 strategies: List[RolloutStrategy]):
+        self._values = values
+        self._strategy_indexes = strategy_indexes
+        self._strategies = strategies
+
+    # the value of the feature for each row
+    @property
+    def values(self) -> List[Any]:
+        return self._values
+
+    # for each row, the index in strategies of the strategy that supplied the value, None if it is the default value
+    @property
+    def strategy_indexes(self) -> List[Optional[int]]:
+        return self._strategy_indexes
+
+    @property
+    def strategies(self) -> List[RolloutStrategy]:
+        return self._strategies
+
+    @property
+    def strategy_ids(self) -> List[Optional[str]]:
+        ids = [s.id for s in self._strategies]
+        return [None if i is None else ids[i] for i in self._strategy_indexes]
+
+    def value_counts(self) -> Dict[Any, int]:
+        counts = {}
+        for value in self._values:
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def __len__(self):
+        return len(self._values)
+
+
+class BatchFeatureEvaluator:
+    _repository: FeatureHubRepository
+    _apply: ApplyFeature
+
+    def __init__(self, repository: FeatureHubRepository, apply_feature: Optional[ApplyFeature] = None):
+        self._repository = repository
+        self._apply = apply_feature if apply_feature is not None else repository.strategy_matcher
+
+    def evaluate(self, key: str, columns) -> BatchResult:
+        contexts = ContextColumns.of(columns)
+        holder = self._repository.feature(key)
+
+        if not holder.exists:
+            return BatchResult([None] * contexts.rows, [None] * contexts.rows, [])
+
+        feature_type = holder.feature_type
+        strategies = list(holder.strategies)
+        no_strategy = [None] * contexts.rows
+
+        if not holder.locked:
+            intercept = self._repository.find_interceptor(key)
+            if intercept:
+                return BatchResult([intercept.cast(feature_type if feature_type else 'STRING')] * contexts.rows,
+                                   no_strategy, strategies)
+
+        indexes = self.match_strategies(strategies, holder.id, contexts) if strategies else no_strategy
+        # only the strategies some row matched, like a context, a value that can't be cast only fails if it is chosen
+        strategy_values = {i: InterceptorValue(strategies[i].value).cast(feature_type)
+                           for i in set(indexes) if i is not None}
+        default_value = holder.internal_feature_state.get('value')
+
+        return BatchResult([default_value if i is None else strategy_values[i] for i in indexes], indexes, strategies)
+
+    def evaluate_all(self, keys: List[str], columns) -> Dict[str, BatchResult]:
+        contexts = ContextColumns.of(columns)
+        return {key: self.evaluate(key, contexts) for key in keys}
+
+    def match_strategies(self, strategies: List[RolloutStrategy], feature_id: str,
+                         columns) -> List[Optional[int]]:
+        # for each row, the index of the strategy ApplyFeature.apply would match, None if none would
+        contexts = ContextColumns.of(columns)
+        default_keys = contexts.default_percentage_keys
+        percentages_by_keys: Dict[int, List[Optional[float]]] = {}
+        now = self._apply.clock()
+        plans = []
+
+        for rsi in strategies:
+            keys = percentages = None
+
+            if rsi.percentage != 0:
+                keys = contexts.percentage_keys(rsi.percentage_attributes) if rsi.has_percentage_attributes \
+                    else default_keys
+                percentages = percentages_by_keys.get(id(keys))
+                if percentages is None:
+                    percentages = percentages_by_keys[id(keys)] = self._percentages(keys, feature_id)
+
+            matches = self._strategy_matches(rsi, contexts, now) if rsi.has_attributes else None
+
+            plans.append((rsi.percentage, rsi.has_attributes, rsi.has_percentage_attributes, keys, percentages,
+                          matches))
+
+        found = []
+
+        # the same walk as ApplyFeature.apply, including how it accumulates the base percentage
+        for row in range(contexts.rows):
+            has_default_key = default_keys[row] is not None
+            percentage = None
+            percentage_key = None
+            base_percentage = {}
+            matched = None
+
+            for index, (strategy_percentage, has_attributes, has_percentage_attributes, keys, percentages,
+                        matches) in enumerate(plans):
+                if strategy_percentage != 0 and (has_default_key or has_percentage_attributes):
+                    new_percentage_key = keys[row]
+
+                    if new_percentage_key not in base_percentage:
+                        base_percentage[new_percentage_key] = 0
+
+                    base_percentage_val = base_percentage[new_percentage_key]
+
+                    if percentage is None or new_percentage_key != percentage_key:
+                        percentage_key = new_percentage_key
+                        percentage = percentages[row]
+
+                        use_base_percentage = 0 if has_attributes else base_percentage_val
+
+                        if percentage <= (use_base_percentage + strategy_percentage):
+                            if (not has_attributes) or _matched(matches[row]):
+                                matched = index
+                                break
+
+                        if not has_attributes:
+                            base_percentage[percentage_key] = base_percentage[percentage_key] + strategy_percentage
+
+                if strategy_percentage == 0 and has_attributes and _matched(matches[row]):
+                    matched = index
+                    break
+
+            found.append(matched)
+
+        return found
+
+    def _percentages(self, keys: List[Optional[str]], feature_id: str) -> List[Optional[float]]:
+        distinct = list(dict.fromkeys(k for k in keys if k is not None))
+        by_key = dict(zip(distinct, self._apply.percentage_calculator.determine_client_percentages(distinct,
+                                                                                                   feature_id)))
+        return [None if k is None else by_key[k] for k in keys]
+
+    def _strategy_matches(self, rsi: RolloutStrategy, contexts: ContextColumns,
+                          now: datetime.datetime) -> List[Any]:
+        # ApplyFeature.match_attribute, one attribute column at a time. a row's result is True, False or the
+        # exception a matcher raised on the first attribute that didn't pass
+        combined = None
+
+        for attr in rsi.attributes:
+            results = _map_distinct(self._attribute_matcher(attr, now), contexts.column(attr.field_name))
+
+            if combined is None:
+                combined = results
+            else:
+                combined = [r if c is True else c for c, r in zip(combined, results)]
+
+        return combined
+
+    def _attribute_matcher(self, attr: RolloutStrategyAttribute, now: datetime.datetime) -> Callable[[Any], bool]:
+        matcher = self._apply.matcher_repository.find_matcher(attr)
+        now_value = None
+
+        if attr.field_name.lower() == 'now':
+            if attr.field_type == RolloutStrategyFieldType.Date:
+                now_value = AttributeValue(now.isoformat()[0:10])
+            elif attr.field_type == RolloutStrategyFieldType.Datetime:
+                now_value = AttributeValue(now.isoformat())
+
+        def match(supplied_value) -> bool:
+            # compared in the same form a context's attribute would be
+            supplied_value = AttributeValue.of(supplied_value) if supplied_value is not None else now_value
+
+            if attr.values is None and supplied_value is None:
+                return attr.conditional == RolloutStrategyAttributeConditional.Equals
+
+            if attr.values is None or supplied_value is None:
+                return False
+
+            return bool(matcher.match(supplied_value, attr))
+
+        return match
@@ -0,0 +1,142 @@
+from typing import Optional, List, Dict, Any, Iterator, Iterable, TextIO, Deque
+from collections import deque
+import argparse
+import itertools
+import json
+import sys
+
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.parallel_evaluation import ParallelBatchEvaluator, rows_to_columns
+
+# featurehub-eval: evaluates features for contexts read as newline delimited json, e.g.
+#
+#   featurehub-eval --snapshot features.json --feature NEW_CHECKOUT --passthrough userkey < users.ndjson
+#
+# the snapshot is what FeatureHubRepository.extract_feature_state() gives you (or the response of a poll of the
+# edge), each line of input is an object of attribute name to value (or list of values) and each line of output is
+# an object of feature key to value, in the same order as the input. input is read and evaluated a chunk at a time,
+# so memory use doesn't grow with the size of the input.
+
+
+class CliError(Exception):
+    pass
+
+
+def load_snapshot(path: str) -> List[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if not isinstance(data, list):
+        raise CliError(f"{path} should hold a list of feature states")
+
+    # the response of the edge is a list of environments, each with its features
+    if data and all(isinstance(d, dict) and 'key' not in d for d in data):
+        return [feature for environment in data for feature in (environment.get('features') or [])]
+
+    return data
+
+
+def read_contexts(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            context = json.loads(line)
+        except ValueError as e:
+            raise CliError(f"line {number} is not valid json: {e}")
+
+        if not isinstance(context, dict):
+            raise CliError(f"line {number} is not a json object")
+
+        yield context
+
+
+def evaluate_contexts(features: List[dict], keys: List[str], contexts: Iterable[Dict[str, Any]],
+                      passthrough: List[str], chunk_size: int = 10000,
+                      processes: int = 1) -> Iterator[Dict[str, Any]]:
+    # the passthrough fields of every row that has been sent for evaluation but not yet written out
+    waiting: Deque[List[Any]] = deque()
+
+    def remember(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            waiting.append([row.get(field) for field in passthrough])
+            yield row
+
+    def output(chunk: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+        for values in zip(*[chunk[key] for key in keys]):
+            row = dict(zip(passthrough, waiting.popleft()))
+            row.update(zip(keys, values))
+            yield row
+
+    contexts = remember(contexts)
+
+    if processes > 1:
+        with ParallelBatchEvaluator(features, processes=processes, chunk_size=chunk_size) as evaluator:
+            for chunk in evaluator.evaluate_chunks(keys, contexts):
+                yield from output(chunk)
+    else:
+        repository = FeatureHubRepository()
+        repository.notify('features', features)
+        evaluator = BatchFeatureEvaluator(repository)
+
+        while True:
+            rows = list(itertools.islice(contexts, chunk_size))
+            if not rows:
+                break
+
+            results = evaluator.evaluate_all(keys, rows_to_columns(rows))
+            yield from output({key: result.values for key, result in results.items()})
+
+
+def _open(path: str, mode: str, default: TextIO) -> TextIO:
+    return default if path == '-' else open(path, mode, encoding='utf-8')
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='featurehub-eval',
+                                     description='Evaluate FeatureHub features for contexts read as newline '
+                                                 'delimited json')
+    parser.add_argument('--snapshot', required=True, help='json file of feature states (extract_feature_state)')
+    parser.add_argument('--feature', action='append', dest='features',
+                        help='feature key to evaluate, may be repeated (default every feature in the snapshot)')
+    parser.add_argument('--input', default='-', help='newline delimited json contexts (default stdin)')
+    parser.add_argument('--output', default='-', help='where to write the results (default stdout)')
+    parser.add_argument('--passthrough', action='append', default=[],
+                        help='context field copied to each output line, e.g. userkey, may be repeated')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='contexts evaluated at a time')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes to evaluate with')
+    options = parser.parse_args(args)
+
+    try:
+        features = load_snapshot(options.snapshot)
+        keys = options.features if options.features else [f['key'] for f in features if f.get('key')]
+
+        source = _open(options.input, 'r', sys.stdin)
+        destination = _open(options.output, 'w', sys.stdout)
+        try:
+            for row in evaluate_contexts(features, keys, read_contexts(source), options.passthrough,
+                                         options.chunk_size, options.processes):
+                destination.write(json.dumps(row, default=str))
+                destination.write('\n')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if destination is not sys.stdout:
+                destination.close()
+            else:
+                destination.flush()
+    except BrokenPipeError:
+        # e.g. piped into head
+        return 0
+    except (CliError, OSError, ValueError) as e:
+        print(f"featurehub-eval: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
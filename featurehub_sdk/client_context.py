@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+from bisect import bisect_right
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Tuple, Union, Callable
+import asyncio
+import datetime
 import json
+import os
 import urllib.parse
-import asyncio
+import threading
+import weakref
+from hashlib import sha256
+from ipaddress import ip_address, IPv4Address, IPv6Address
 
+from semver import make_semver, SemVer
+
+from featurehub_sdk.analytics import AnalyticsCollector
 from featurehub_sdk.edge_service import EdgeService
+from featurehub_sdk.instrumentation import InstrumentationSink
 from featurehub_sdk.interceptors import InterceptorValue
 from featurehub_sdk.strategy_attribute_country_name import StrategyAttributeCountryName
 from featurehub_sdk.strategy_attribute_device_name import StrategyAttributeDeviceName
@@ -73,6 +84,11 @@ class FeatureState:
     def key(self) -> str:
         return ""
 
+    # could the context change the value of this feature? if not, there is no need to bind it to one
+    @property
+    def needs_context(self) -> bool:
+        return True
+
     def with_context(self, ctx: ClientContext) -> "FeatureState":
         pass
 
@@ -103,11 +119,31 @@ class RolloutStrategyFieldType(Enum):
     IpAddress = 'IP_ADDRESS'
 
 
+_NO_ID = object()
+
+
+# comparisons of the time against these flip exactly when the time passes one of the values
+_ORDERED_CONDITIONALS = {RolloutStrategyAttributeConditional.Equals, RolloutStrategyAttributeConditional.NotEquals,
+                         RolloutStrategyAttributeConditional.Greater,
+                         RolloutStrategyAttributeConditional.GreaterEquals,
+                         RolloutStrategyAttributeConditional.Less, RolloutStrategyAttributeConditional.LessEquals}
+_SECOND = datetime.timedelta(seconds=1)
+_DAY = datetime.timedelta(days=1)
+
+
 class RolloutStrategyAttribute:
     _attr: dict
+    _time_based: bool
+    # for a condition on the time: the instants its result could change at, and the windows (start, end) inside
+    # which it could change at any moment. worked out the first time they are needed
+    _boundaries: Optional[List[datetime.datetime]]
+    _windows: List[Tuple[datetime.datetime, datetime.datetime]]
+    _daily: bool
 
     def __init__(self, attr: dict):
         self._attr = attr
+        self._time_based = str(attr.get('fieldName')).lower() == 'now'
+        self._boundaries = None
 
     @property
     def id(self) -> Optional[str]:
@@ -137,19 +173,199 @@ class RolloutStrategyAttribute:
     def field_type(self) -> RolloutStrategyFieldType:
         return RolloutStrategyFieldType(self._attr.get('type'))
 
+    # compared against the time when the context doesn't say, so its result can't be remembered
+    @property
+    def time_based(self) -> bool:
+        return self._time_based
+
+    def to_dict(self) -> dict:
+        return dict(self._attr)
+
+    # the first instant after now (utc, as ApplyFeature's clock gives it) at which comparing the time against this
+    # condition could give a different answer: now itself if it could be any moment, None if never
+    def next_time_boundary(self, now: datetime.datetime) -> Optional[datetime.datetime]:
+        if self._boundaries is None:
+            self._compile_time_boundaries()
+
+        for start, end in self._windows:
+            if start <= now < end:
+                return now
+
+        i = bisect_right(self._boundaries, now)
+        if i < len(self._boundaries):
+            return self._boundaries[i]
+
+        # the date only changes at midnight
+        if self._daily:
+            return datetime.datetime.combine(now.date() + _DAY, datetime.time())
+
+        return None
+
+    def _compile_time_boundaries(self):
+        # the time is compared as a string, its iso format ('2026-10-19' for a DATE, '2026-10-19T17:21:15.123456'
+        # for a DATETIME), so these are the points at which that string passes the values as strings
+        boundaries: List[datetime.datetime] = []
+        windows = []
+        daily = False
+        field_type = self._attr.get('type')
+        values = self.values or []
+
+        try:
+            ordered = self.conditional in _ORDERED_CONDITIONALS
+        except ValueError:
+            ordered = False
+
+        if not self._time_based:
+            pass
+        elif field_type == RolloutStrategyFieldType.Date.value:
+            try:
+                if not ordered:
+                    raise ValueError()
+                for v in values:
+                    day = datetime.date.fromisoformat(str(v))
+                    # other forms python can read (e.g. 2026-W43-1) don't sort as strings in the same order
+                    if day.isoformat() != str(v):
+                        raise ValueError()
+                    midnight = datetime.datetime.combine(day, datetime.time())
+                    boundaries += [midnight, midnight + _DAY]
+            except ValueError:
+                boundaries, daily = [], True
+        elif field_type == RolloutStrategyFieldType.Datetime.value:
+            try:
+                if not ordered:
+                    raise ValueError()
+                for v in values:
+                    # as it is written, whatever the time zone, as that is how it is compared. a value could be
+                    # passed by any part of the second it names
+                    instant = datetime.datetime.fromisoformat(str(v)).replace(tzinfo=None, microsecond=0)
+                    if not instant.isoformat().startswith(str(v)[0:19]):
+                        raise ValueError()
+                    boundaries += [instant, instant + _SECOND]
+                    windows.append((instant, instant + _SECOND))
+            except ValueError:
+                boundaries, windows = [], [(datetime.datetime.min, datetime.datetime.max)]
+
+        self._windows = windows
+        self._daily = daily
+        self._boundaries = sorted(set(boundaries))
+
+
+class ConditionTable:
+    # features frequently carry the same strategies (shared strategies, or the same feature in several environments)
+    # and target the same countries, platforms, versions and so on. the table hands out one RolloutStrategy for every
+    # identical strategy, and one RolloutStrategyAttribute for every condition on the same field with the same
+    # conditional, type and values (whatever its id), so each is only held once and a context evaluating many
+    # features only has to check each distinct condition once (see ClientContext.condition_results). repositories
+    # share one table for the whole process unless they are given their own. everything is held weakly, so it goes
+    # when the last feature using it does.
+    _strategies: "weakref.WeakValueDictionary[str, RolloutStrategy]"
+    _conditions: "weakref.WeakValueDictionary[tuple, RolloutStrategyAttribute]"
+    _lock: threading.Lock
+
+    def __init__(self):
+        self._strategies = weakref.WeakValueDictionary()
+        self._conditions = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    # the table used by repositories that aren't given one
+    @staticmethod
+    def shared() -> ConditionTable:
+        return _shared_conditions
+
+    # repr tells 1, 1.0 and True apart, which are equal (and hash the same) but don't match the same things. the
+    # order of the keys matters, which is fine as the edge always sends them in the same order
+    _key = staticmethod(repr)
+
+    def intern(self, attr: dict) -> RolloutStrategyAttribute:
+        key = (attr.get('fieldName'), attr.get('conditional'), attr.get('type'), repr(attr.get('values')))
+
+        with self._lock:
+            condition = self._conditions.get(key)
+            if condition is None:
+                condition = self._conditions[key] = RolloutStrategyAttribute(attr)
+            return condition
+
+    def strategy(self, strategy: dict) -> RolloutStrategy:
+        key = self._key(strategy)
+
+        with self._lock:
+            found = self._strategies.get(key)
+
+        if found is None:
+            # interns the conditions, which takes the lock
+            found = RolloutStrategy(strategy, self)
+            with self._lock:
+                found = self._strategies.setdefault(key, found)
+
+        return found
+
+    # a thread that held the lock when the process forked doesn't come with it, so the child would wait forever
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._conditions)
+
+    @property
+    def strategy_count(self) -> int:
+        return len(self._strategies)
+
+
+_shared_conditions = ConditionTable()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_shared_conditions._after_fork)
+
 
 class RolloutStrategy:
     _attr: dict
     _attributes: List[RolloutStrategyAttribute]
+    _attribute_ids: tuple
     _has_attributes: bool
+    _percentage: int
+    _percentage_attributes: List[str]
+    _time_attributes: List[RolloutStrategyAttribute]
+
+    # with a condition table, conditions identical to those of other strategies are shared with them
+    def __init__(self, attr: dict, conditions: Optional[ConditionTable] = None):
+        rsa = attr.get('attributes')
+        if not rsa:
+            self._attr = attr
+            self._attributes = []
+            self._attribute_ids = ()
+        else:
+            # the attributes are only kept as RolloutStrategyAttributes, to_dict puts them back
+            self._attr = {k: v for k, v in attr.items() if k != 'attributes'}
+            if conditions is not None:
+                self._attributes = [conditions.intern(x) for x in rsa]
+            else:
+                self._attributes = list(map(lambda x: RolloutStrategyAttribute(x), list(rsa)))
+            # a shared condition has the id of whichever came first, these are ours
+            self._attribute_ids = tuple(x.get('id', _NO_ID) for x in rsa)
+
+        # these are calculated a lot, so cache them
+        self._has_attributes = len(self._attributes) > 0
+        self._time_attributes = [a for a in self._attributes if a.time_based]
+        p = self._attr.get('percentage')
+        self._percentage = int(p) if p is not None else 0
+        pa = self._attr.get('percentageAttributes')
+        self._percentage_attributes = list(pa) if pa is not None else []
 
-    def __init__(self, attr: dict):
-        self._attr = attr
+    # the strategy as it came from the edge
+    def to_dict(self) -> dict:
+        if not self._attribute_ids:
+            return dict(self._attr)
 
-        rsa = self._attr.get('attributes')
-        self._attributes = list(map(lambda x: RolloutStrategyAttribute(x), list(rsa))) if rsa else []
-        # this is calculated a lot, so cache it
-        self._has_attributes = len(self._attributes) > 0
+        attributes = []
+        for condition, attr_id in zip(self._attributes, self._attribute_ids):
+            attr = condition.to_dict()
+            if attr_id is _NO_ID:
+                attr.pop('id', None)
+            else:
+                attr['id'] = attr_id
+            attributes.append(attr)
+
+        return dict(self._attr, attributes=attributes)
 
     @property
     def id(self) -> Optional[str]:
@@ -161,19 +377,15 @@ class RolloutStrategy:
 
     @property
     def percentage(self) -> int:
-        p = self._attr.get('percentage')
-        return int(p) if p is not None else 0
+        return self._percentage
 
     @property
     def percentage_attributes(self) -> List[str]:
-        pa = self._attr.get('percentageAttributes')
-
-        return list(pa) if pa is not None else []
+        return list(self._percentage_attributes)
 
     @property
     def has_percentage_attributes(self) -> bool:
-        pa = self._attr.get('percentageAttributes')
-        return len(pa) > 0 if pa is not None else False
+        return len(self._percentage_attributes) > 0
 
     @property
     def value(self) -> Optional[Any]:
@@ -187,13 +399,28 @@ class RolloutStrategy:
     def has_attributes(self) -> bool:
         return self._has_attributes
 
+    # the conditions on the current time
+    @property
+    def time_attributes(self) -> List[RolloutStrategyAttribute]:
+        return self._time_attributes
+
 class Applied:
     _matched: bool
     _value: Any
+    _strategy: Optional[RolloutStrategy]
+    _valid_for: Optional[float]
 
-    def __init__(self, matched: bool, value: Any):
+    def __init__(self, matched: bool, value: Any, strategy: Optional[RolloutStrategy] = None,
+                 valid_for: Optional[float] = None):
         self._matched = matched
         self._value = value
+        self._strategy = strategy
+        self._valid_for = valid_for
+
+    # how many seconds the result holds for, if the strategies compare against the time (None is for ever)
+    @property
+    def valid_for(self) -> Optional[float]:
+        return self._valid_for
 
     @property
     def value(self):
@@ -203,6 +430,15 @@ class Applied:
     def matched(self):
         return self._matched
 
+    # the strategy that matched (if any)
+    @property
+    def strategy(self) -> Optional[RolloutStrategy]:
+        return self._strategy
+
+    @property
+    def strategy_id(self) -> Optional[str]:
+        return self._strategy.id if self._strategy is not None else None
+
 
 class InternalFeatureRepository:
     # give me the raw feature from the repository level (top level features, no contexts)
@@ -221,16 +457,119 @@ class InternalFeatureRepository:
     def not_ready(self) -> bool:
         pass
 
+    # block until the repo is ready (or the edge has told us it never will be), or for at most timeout seconds.
+    # returns whether it is ready
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self.is_ready()
+
+    # the same, for asyncio code
+    async def ready(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, self.wait_until_ready, timeout)
+
+    # call back once, when the repo is next ready (straight away if it already is)
+    def when_ready(self, callback: Callable[[], None]):
+        if self.is_ready():
+            callback()
+
     def apply(self, strategies: List[RolloutStrategy], key: str, feature_id: str, context: "ClientContext") -> Applied:
         pass
 
     def notify(self, cmd: str, data):
         pass
 
+    # where timings and counts are reported, None (the default) means nothing is measured at all
+    @property
+    def instrumentation(self) -> Optional[InstrumentationSink]:
+        return None
+
+    @property
+    def analytics(self) -> Optional[AnalyticsCollector]:
+        return None
+
+    # is anything (interceptors, instrumentation, analytics) involved in reading a value, other than the feature?
+    def has_read_hooks(self) -> bool:
+        return True
+
+    # could an interceptor be supplying values? they can change at any time, so values can't be remembered
+    def has_interceptors(self) -> bool:
+        return True
+
+_UNPARSED = object()
+
+
+class AttributeValue(str):
+    # a context attribute as the matchers compare it: its string form (the value of an enum like a country, so
+    # 'new_zealand' rather than the enum member), plus its lowercase, numeric, ip address and semantic version forms.
+    # each form is worked out the first time a matcher needs it and then kept, and the context keeps the record
+    # until the attribute changes, so a context evaluated against many features parses each attribute once
+    _raw: object
+    _lowercase: Optional[str]
+    _number: Any
+    _ip: Optional[Union[IPv4Address, IPv6Address]]
+    _version: Optional[SemVer]
+
+    def __new__(cls, value: object):
+        self = super().__new__(cls, value.value if isinstance(value, Enum) else value)
+        self._raw = value
+        self._lowercase = None
+        self._number = _UNPARSED
+        self._ip = None
+        self._version = None
+        return self
+
+    @staticmethod
+    def of(value: object) -> AttributeValue:
+        return value if isinstance(value, AttributeValue) else AttributeValue(value)
+
+    # what the attribute was set to
+    @property
+    def raw(self) -> object:
+        return self._raw
+
+    @property
+    def lowercase(self) -> str:
+        if self._lowercase is None:
+            self._lowercase = self.lower()
+        return self._lowercase
+
+    # None if it isn't a number
+    @property
+    def number(self) -> Optional[float]:
+        if self._number is _UNPARSED:
+            try:
+                self._number = float(self)
+            except ValueError:
+                self._number = None
+        return self._number
+
+    # these raise ValueError if it isn't one
+    @property
+    def ip(self) -> Union[IPv4Address, IPv6Address]:
+        if self._ip is None:
+            self._ip = ip_address(str(self))
+        return self._ip
+
+    @property
+    def version(self) -> SemVer:
+        if self._version is None:
+            self._version = make_semver(str(self), True)
+        return self._version
+
+
 class ClientContext:
     """holds client context"""
     _attributes: Dict[str, object]
     _repo: InternalFeatureRepository
+    # the percentage keys worked out so far, by the percentage attributes they are made from (None for the default
+    # key). every feature evaluated for this context needs the same keys, so they are only built once, and are
+    # forgotten whenever an attribute changes
+    _percentage_keys: Dict[Optional[Tuple[str, ...]], Optional[str]]
+    # likewise, whether the attribute conditions checked so far matched
+    _condition_results: Dict[RolloutStrategyAttribute, bool]
+    # and the attributes as the matchers compare them (see AttributeValue)
+    _attribute_values: Dict[str, Optional[AttributeValue]]
+    # goes up every time an attribute changes, so anything remembering results for this context knows to forget them
+    _changes: int
     USER_KEY = 'userkey'
     SESSION = 'session'
     COUNTRY = 'country'
@@ -241,37 +580,62 @@ class ClientContext:
     def __init__(self, repo: InternalFeatureRepository):
         self._repository = repo
         self._attributes = {}
+        self._percentage_keys = {}
+        self._condition_results = {}
+        self._attribute_values = {}
+        self._changes = 0
+
+    def _attributes_changed(self):
+        self._changes += 1
+        if self._percentage_keys:
+            self._percentage_keys = {}
+        if self._condition_results:
+            self._condition_results = {}
+        if self._attribute_values:
+            self._attribute_values = {}
+
+    # forget everything about the user this context was for, so it can be reused (see context_pool)
+    def reset(self):
+        self.clear()
 
     def user_key(self, value: str) -> ClientContext:
         self._attributes[ClientContext.USER_KEY] = [value]
+        self._attributes_changed()
         return self
 
     def session_key(self, value: str) -> ClientContext:
         self._attributes[ClientContext.SESSION] = [value]
+        self._attributes_changed()
         return self
 
     def country(self, value: StrategyAttributeCountryName) -> ClientContext:
         self._attributes[ClientContext.COUNTRY] = [value]
+        self._attributes_changed()
         return self
 
     def device(self, value: StrategyAttributeDeviceName) -> ClientContext:
         self._attributes[ClientContext.DEVICE] = [value]
+        self._attributes_changed()
         return self
 
     def platform(self, value: StrategyAttributePlatformName) -> ClientContext:
         self._attributes[ClientContext.PLATFORM] = [value]
+        self._attributes_changed()
         return self
 
     def version(self, version: str) -> ClientContext:
         self._attributes[ClientContext.VERSION] = [version]
+        self._attributes_changed()
         return self
 
     def attribute_values(self, key: str, values: List[str]) -> ClientContext:
         self._attributes[key] = values
+        self._attributes_changed()
         return self
 
     def clear(self) -> ClientContext:
         self._attributes.clear()
+        self._attributes_changed()
         return self
 
     def get_attr(self, key: str, default_value: Optional[str] = None) -> Optional[object]:
@@ -280,12 +644,42 @@ class ClientContext:
 
         return default_value
 
+    # the (first) value of the attribute, ready for the matchers to compare
+    def get_attr_value(self, key: str) -> Optional[AttributeValue]:
+        try:
+            return self._attribute_values[key]
+        except KeyError:
+            val = self.get_attr(key)
+            found = self._attribute_values[key] = AttributeValue(val) if val is not None else None
+            return found
+
     @property
     def default_percentage_key(self) -> str:
-        val = self.get_attr(ClientContext.SESSION) if self.get_attr(ClientContext.SESSION) \
-            else self.get_attr(ClientContext.USER_KEY)
+        try:
+            return self._percentage_keys[None]
+        except KeyError:
+            val = self.get_attr(ClientContext.SESSION)
+            if not val:
+                val = self.get_attr(ClientContext.USER_KEY)
+
+            key = self._percentage_keys[None] = str(val) if val is not None else None
+            return key
+
+    # the key a strategy with these percentage attributes buckets this context by
+    def percentage_key(self, percentage_attributes: List[str]) -> str:
+        name = tuple(percentage_attributes)
 
-        return str(val) if val is not None else None
+        try:
+            return self._percentage_keys[name]
+        except KeyError:
+            key = self._percentage_keys[name] = "$".join(list(map(lambda x: str(self.get_attr(x, '<none>')),
+                                                                  percentage_attributes)))
+            return key
+
+    # whether conditions (by the condition, see ConditionTable) matched this context, filled in by ApplyFeature
+    @property
+    def condition_results(self) -> Dict[RolloutStrategyAttribute, bool]:
+        return self._condition_results
 
     def is_enabled(self, name: str) -> bool:
         return self.feature(name).is_enabled
@@ -294,6 +688,10 @@ class ClientContext:
         # context never matters as the repository always reflects the correctly evaluated state
         return self._repository.feature(name)
 
+    # the feature as this context sees it, given the repository's holder for it (see FeatureHandle)
+    def feature_of(self, holder: FeatureState) -> FeatureState:
+        return holder
+
     def is_set(self, name: str) -> bool:
         return self.feature(name).is_set
 
@@ -325,6 +723,14 @@ class ClientContext:
     def build_sync(self) -> ClientContext:
         pass
 
+    # are features evaluated in this process (True) or by the edge (False)?
+    def client_evaluated(self) -> bool:
+        return False
+
+    # an immutable copy of this context, which can be shared between threads and used as a cache key
+    def freeze(self) -> FrozenClientContext:
+        return FrozenClientContext(self._repository, None, self._attributes, self.client_evaluated())
+
 
 class ClientEvalFeatureContext(ClientContext):
     _edge: EdgeService
@@ -343,7 +749,19 @@ class ClientEvalFeatureContext(ClientContext):
         return self
 
     def feature(self, name: str) -> FeatureState:
-        return self._repository.feature(name).with_context(self)
+        holder = self._repository.feature(name)
+        # features without strategies are the same for everyone, so skip making one just for us. that means
+        # holding on to a feature rather than the context won't notice strategies added to it later
+        return holder.with_context(self) if holder.needs_context else holder
+
+    def feature_of(self, holder: FeatureState) -> FeatureState:
+        return holder.with_context(self) if holder.needs_context else holder
+
+    def client_evaluated(self) -> bool:
+        return True
+
+    def freeze(self) -> FrozenClientContext:
+        return FrozenClientContext(self._repository, self._edge, self._attributes, True)
 
 
 class ServerEvalFeatureContext(ClientContext):
@@ -360,21 +778,146 @@ class ServerEvalFeatureContext(ClientContext):
     def _pick_first(self, v: object):
         return v[0] if isinstance(v, list) else v
 
-    async def build(self) -> ClientContext:
+    # the header to send the edge, if it has changed since the last build
+    def _header_change(self) -> Optional[str]:
         new_header = "&".join("=".join((k, urllib.parse.quote(str(self._pick_first(v))))) for k,v in self._attributes.items())
 
-        if self._old_header is None and len(new_header) == 0:
-            await self._current_edge.poll()  # just make sure we have started
-        elif new_header != self._old_header: # make sure it changed
+        if new_header != self._old_header: # make sure it changed
             self._old_header = new_header
-
             self._repository.not_ready()
+            return new_header
+
+        return None
 
-            await self._current_edge.context_change(new_header)
+    async def build(self) -> ClientContext:
+        if self._old_header is None and not self._attributes:
+            await self._current_edge.poll()  # just make sure we have started
+        else:
+            header = self._header_change()
+            if header is not None:
+                await self._current_edge.context_change(header)
 
         return self
 
+    # the same as build, without an event loop
     def build_sync(self) -> ClientContext:
-        asyncio.run(self.build())
+        if self._old_header is None and not self._attributes:
+            self._current_edge.poll_sync()
+        else:
+            header = self._header_change()
+            if header is not None:
+                self._current_edge.context_change_sync(header)
+
         return self
 
+    def reset(self):
+        super().reset()
+        self._old_header = None
+
+    def freeze(self) -> FrozenClientContext:
+        return FrozenClientContext(self._repository, self._current_edge, self._attributes, False)
+
+
+class FrozenClientContext(ClientContext):
+    # a context whose attributes can't change. that makes it safe to share between threads, and it is hashable (two
+    # frozen contexts with the same attributes are equal) so it can be used as the key of a cache. its fingerprint
+    # is the sha256 of its attributes in a canonical order, and is the context sha the edge sees for a server
+    # evaluated one (which always sends its attributes in that order).
+    _edge: Optional[EdgeService]
+    _client_eval: bool
+    _items: tuple
+    _header: str
+    _fingerprint: Optional[str]
+    _hash: Optional[int]
+
+    def __init__(self, repo: InternalFeatureRepository, edge: Optional[EdgeService], attributes: Dict[str, object],
+                 client_eval: bool):
+        super().__init__(repo)
+        self._edge = edge
+        self._client_eval = client_eval
+        self._attributes = {k: tuple(v) if isinstance(v, list) else v for k, v in attributes.items()}
+        self._items = tuple(sorted(self._attributes.items()))
+        self._header = "&".join("=".join((k, urllib.parse.quote(str(self._pick_first(v))))) for k, v in self._items)
+        self._fingerprint = None
+        self._hash = None
+
+    @staticmethod
+    def _pick_first(v: object):
+        if isinstance(v, tuple):
+            return v[0] if v else ''
+        return v
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('a frozen context cannot be changed, use thaw() to get a copy you can change')
+
+    user_key = session_key = country = device = platform = version = attribute_values = clear = reset = _immutable
+
+    @property
+    def header(self) -> str:
+        return self._header
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = sha256(self._header.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    def client_evaluated(self) -> bool:
+        return self._client_eval
+
+    def freeze(self) -> FrozenClientContext:
+        return self
+
+    # a mutable copy of this context
+    def thaw(self) -> ClientContext:
+        ctx = ClientEvalFeatureContext(self._repository, self._edge) if self._client_eval \
+            else ServerEvalFeatureContext(self._repository, self._edge)
+
+        for k, v in self._attributes.items():
+            ctx.attribute_values(k, list(v) if isinstance(v, tuple) else v)
+
+        return ctx
+
+    def feature(self, name: str) -> FeatureState:
+        holder = self._repository.feature(name)
+
+        if self._client_eval and holder.needs_context:
+            return holder.with_context(self)
+
+        return holder
+
+    def feature_of(self, holder: FeatureState) -> FeatureState:
+        return holder.with_context(self) if self._client_eval and holder.needs_context else holder
+
+    async def build(self) -> ClientContext:
+        if self._client_eval or len(self._header) == 0:
+            await self._edge.poll()
+        else:
+            self._repository.not_ready()
+            await self._edge.context_change(self._header)
+
+        return self
+
+    def build_sync(self) -> ClientContext:
+        if self._client_eval:
+            return self
+
+        if len(self._header) == 0:
+            self._edge.poll_sync()
+        else:
+            self._repository.not_ready()
+            self._edge.context_change_sync(self._header)
+
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenClientContext) and self._client_eval == other._client_eval and \
+            self._items == other._items
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self._client_eval, self._items))
+        return self._hash
+
+    def __repr__(self):
+        return f"FrozenClientContext({self._header})"
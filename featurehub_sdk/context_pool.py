@@ -0,0 +1,67 @@
+from typing import Optional, List, Iterator
+from contextlib import contextmanager
+import threading
+
+from featurehub_sdk.client_context import ClientContext, ClientEvalFeatureContext, ServerEvalFeatureContext, \
+    InternalFeatureRepository
+from featurehub_sdk.edge_service import EdgeService
+
+# reuses contexts rather than allocating a new one (and its dictionaries) for every request. each thread has its
+# own pool, so checking a context out or back in never takes a lock, and asyncio tasks on the same thread simply
+# get different contexts out of the same pool. a context is cleared (attributes, remembered percentage keys, the
+# last server evaluated header) when it comes back, and must not be used after that.
+
+
+class _ThreadPool(threading.local):
+    def __init__(self):
+        self.edge: Optional[EdgeService] = None
+        self.contexts: List[ClientContext] = []
+
+
+class ContextPool:
+    _config: "FeatureHubConfig"
+    _max_size: int
+    _local: _ThreadPool
+
+    # max_size is the number of idle contexts kept per thread
+    def __init__(self, config: "FeatureHubConfig", max_size: int = 16):
+        self._config = config
+        self._max_size = max_size
+        self._local = _ThreadPool()
+
+    def checkout(self) -> ClientContext:
+        local = self._local
+        edge = self._config.get_or_create_edge_service()
+
+        if local.edge is not edge:
+            # the edge service has been replaced (closed, or restarted after a fork), the pooled contexts point at
+            # the old one
+            local.edge = edge
+            local.contexts = []
+
+        if local.contexts:
+            return local.contexts.pop()
+
+        repository: InternalFeatureRepository = self._config.repository()
+        return ClientEvalFeatureContext(repository, edge) if self._config.client_evaluated() \
+            else ServerEvalFeatureContext(repository, edge)
+
+    def release(self, ctx: ClientContext):
+        ctx.reset()
+
+        local = self._local
+        if len(local.contexts) < self._max_size and local.edge is self._config.get_or_create_edge_service():
+            local.contexts.append(ctx)
+
+    @contextmanager
+    def context(self) -> Iterator[ClientContext]:
+        ctx = self.checkout()
+        try:
+            yield ctx
+        finally:
+            self.release(ctx)
+
+    @property
+    def idle(self) -> int:
+        # idle contexts in this thread's pool
+        return len(self._local.contexts)
@@ -1,3 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
 class EdgeService:
     async def poll(self):
         pass
@@ -10,3 +14,22 @@ class EdgeService:
 
     async def context_change(self, header: str):
         pass
+
+    # the same without an event loop, for servers that don't have one (e.g. WSGI). edge services that can do them
+    # synchronously should, this runs the async one on a loop of its own
+    def poll_sync(self):
+        _run_sync(self.poll)
+
+    def context_change_sync(self, header: str):
+        _run_sync(self.context_change, header)
+
+
+def _run_sync(coroutine_function, *args):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine_function(*args))
+
+    # asyncio.run can't be used from inside a running loop, so wait for it on another thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(lambda: asyncio.run(coroutine_function(*args))).result()
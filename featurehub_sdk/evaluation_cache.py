@@ -0,0 +1,124 @@
+from typing import Optional, Dict, Set, Tuple, Callable, Any, Hashable
+from collections import OrderedDict
+import threading
+import time
+
+# remembers the result of evaluating a feature's strategies for a frozen context (see ClientContext.freeze), so
+# when the same user comes back the strategies aren't evaluated again. entries are keyed by the fingerprint of the
+# context, the feature key and the feature version, and the scope they were evaluated in (each repository has its own,
+# so repositories for different environments can share a cache without seeing each other's results), the cache is
+# bounded (least recently used entries are dropped
+# first) and entries can expire. the repository drops the entries of a feature whenever the feature changes.
+#
+# contexts are matched by fingerprint, which is made from the string form of their attributes, so attributes should
+# be set as strings (as the builder methods do) - 1 and '1' have the same fingerprint.
+
+CacheKey = Tuple[Hashable, str, str, int]
+
+
+class EvaluationCache:
+    _max_size: int
+    _ttl: Optional[float]
+    _clock: Callable[[], float]
+    _entries: "OrderedDict[CacheKey, Tuple[Any, float]]"
+    _by_feature: Dict[Tuple[Hashable, str], Set[CacheKey]]
+    _lock: threading.Lock
+    _hits: int
+    _misses: int
+    _evictions: int
+    _expirations: int
+    _invalidations: int
+
+    # ttl in seconds, None for entries that only go when they are evicted or their feature changes
+    def __init__(self, max_size: int = 100000, ttl: Optional[float] = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._by_feature = {}
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
+
+    def get(self, fingerprint: str, key: str, version: int, scope: Hashable = None) -> Optional[Any]:
+        cache_key = (scope, fingerprint, key, version)
+
+        with self._lock:
+            found = self._entries.get(cache_key)
+
+            if found is not None:
+                value, expires = found
+                if expires > self._clock():
+                    self._entries.move_to_end(cache_key)
+                    self._hits += 1
+                    return value
+
+                self._remove(cache_key)
+                self._expirations += 1
+
+            self._misses += 1
+            return None
+
+    # ttl is how long this entry holds for (e.g. the result of strategies on the time), if it is less than the
+    # cache's own
+    def put(self, fingerprint: str, key: str, version: int, value: Any, ttl: Optional[float] = None,
+            scope: Hashable = None):
+        cache_key = (scope, fingerprint, key, version)
+        if ttl is None or (self._ttl is not None and self._ttl < ttl):
+            ttl = self._ttl
+        if ttl is not None and ttl <= 0:
+            return
+        expires = self._clock() + ttl if ttl is not None else float('inf')
+
+        with self._lock:
+            if cache_key not in self._entries:
+                self._by_feature.setdefault((scope, key), set()).add(cache_key)
+            self._entries[cache_key] = (value, expires)
+            self._entries.move_to_end(cache_key)
+
+            while len(self._entries) > self._max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, cache_key: CacheKey):
+        del self._entries[cache_key]
+        feature = (cache_key[0], cache_key[2])
+        keys = self._by_feature.get(feature)
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del self._by_feature[feature]
+
+    # drop everything cached for this feature in this scope, the repository calls this when the feature changes
+    def invalidate(self, key: str, scope: Hashable = None):
+        with self._lock:
+            for cache_key in self._by_feature.pop((scope, key), ()):
+                del self._entries[cache_key]
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_feature.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self._max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self.hit_rate,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+            }
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Optional, Any, Tuple
+import json
+
+from featurehub_sdk.client_context import ClientContext, FeatureState, InternalFeatureRepository
+
+# a feature looked up once, e.g. when a module is imported, rather than by its key on every read:
+#
+#   NEW_CHECKOUT = config.handle('NEW_CHECKOUT')
+#   ...
+#   if NEW_CHECKOUT.get_flag(ctx):
+#
+# the repository keeps one holder per key for as long as it lives (a feature that is updated or deleted, or that
+# doesn't exist yet, keeps the same holder), so a handle holds on to that holder and only looks the key up again
+# if it is read through a context of a different repository. the config remembers its handles, so once the
+# features have arrived it can tell you which of the keys you have handles for don't exist (see missing_handles).
+
+
+class FeatureHandle:
+    _key: str
+    _config: "FeatureHubConfig"
+    # the repository we found our holder in, and the holder, set together so threads never see one without the other
+    _slot: Tuple[Optional[InternalFeatureRepository], Optional[FeatureState]]
+
+    def __init__(self, config: "FeatureHubConfig", key: str):
+        if not key:
+            raise TypeError('a feature handle needs a key')
+
+        self._key = key
+        self._config = config
+        self._slot = (None, None)
+        self._holder(None)
+
+    def _holder(self, ctx: Optional[ClientContext]) -> FeatureState:
+        repository = ctx._repository if ctx is not None else self._config.repository()
+        found, holder = self._slot
+
+        if found is not repository:
+            holder = repository.feature(self._key)
+            self._slot = (repository, holder)
+
+        return holder
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    # the feature as the context sees it, or as the repository holds it without one
+    def feature(self, ctx: Optional[ClientContext] = None) -> FeatureState:
+        holder = self._holder(ctx)
+        return ctx.feature_of(holder) if ctx is not None else holder
+
+    def exists(self, ctx: Optional[ClientContext] = None) -> bool:
+        return self._holder(ctx).exists
+
+    def get_flag(self, ctx: Optional[ClientContext] = None) -> Optional[bool]:
+        return self.feature(ctx).get_flag
+
+    def get_boolean(self, ctx: Optional[ClientContext] = None) -> Optional[bool]:
+        return self.feature(ctx).get_boolean
+
+    def is_enabled(self, ctx: Optional[ClientContext] = None) -> bool:
+        return self.feature(ctx).is_enabled
+
+    def get_string(self, ctx: Optional[ClientContext] = None) -> Optional[str]:
+        return self.feature(ctx).get_string
+
+    def get_number(self, ctx: Optional[ClientContext] = None) -> Optional[Decimal]:
+        return self.feature(ctx).get_number
+
+    def get_raw_json(self, ctx: Optional[ClientContext] = None) -> Optional[str]:
+        return self.feature(ctx).get_raw_json
+
+    def get_json(self, ctx: Optional[ClientContext] = None) -> Optional[Any]:
+        val = self.feature(ctx).get_raw_json
+        return json.loads(val) if val else None
+
+    def get_value(self, ctx: Optional[ClientContext] = None) -> Any:
+        return self.feature(ctx).get_value
+
+    def is_set(self, ctx: Optional[ClientContext] = None) -> bool:
+        return self.feature(ctx).is_set
+
+    def __repr__(self):
+        return f"FeatureHandle({self._key})"
@@ -3,14 +3,20 @@ from __future__ import annotations  # so we can reference ourselves
 import typing
 import os
 import logging
+import threading
+import weakref
 
 from featurehub_sdk.client_context import ClientContext, ClientEvalFeatureContext, ServerEvalFeatureContext, \
-    InternalFeatureRepository
+    InternalFeatureRepository, ConditionTable
+from featurehub_sdk.context_pool import ContextPool
 from featurehub_sdk.edge_service import EdgeService
+from featurehub_sdk.feature_handle import FeatureHandle
 from featurehub_sdk.featurehub_repository import FeatureHubRepository
 from typing import List, Callable
 from featurehub_sdk.polling_edge_service import PollingEdgeService
+from featurehub_sdk.shared_memory import SharedMemoryEdgeService, SharedMemoryPublishingRepository
 from featurehub_sdk.streaming_edge_service import StreamingEdgeClient
+from featurehub_sdk.streaming_multiplexer import MultiplexedStreamingEdgeClient, StreamingMultiplexer
 
 log = logging.getLogger('featurehub_sdk')
 
@@ -21,10 +27,17 @@ class FeatureHubConfig:
     _repository: InternalFeatureRepository
     _edge_service: typing.Optional[EdgeService]
     _edge_service_provider: Callable[[InternalFeatureRepository, List[str], str], EdgeService]
+    _initialised: bool
+    _context_pool: typing.Optional[ContextPool]
+    _handles: typing.Dict[str, FeatureHandle]
+    _restart_on_fork: bool
+    # waiting for the repository to be ready to check the handles have features
+    _checking_handles: bool
 
     def __init__(self, edge_url, api_keys: List[str],
                  repository: typing.Optional[InternalFeatureRepository] = None,
-                 edge_provider: typing.Optional[Callable[[InternalFeatureRepository, List[str], str], EdgeService]] = None):
+                 edge_provider: typing.Optional[Callable[[InternalFeatureRepository, List[str], str], EdgeService]] = None,
+                 restart_on_fork: bool = True):
         self._edge_service = None
         self._repository = repository if repository is not None else FeatureHubRepository()
         self._edge_url = edge_url
@@ -45,6 +58,13 @@ class FeatureHubConfig:
         # this is the function we use to create our edge service if no other is specified
         self._edge_service_provider = edge_provider if edge_provider else self._create_default_provider
         self._edge_service = None
+        self._initialised = False
+        self._context_pool = None
+        self._handles = {}
+        self._restart_on_fork = restart_on_fork
+        self._checking_handles = False
+
+        _configs.add(self)
 
     def client_evaluated(self) -> bool:
         return self._client_eval  # is this correct?
@@ -61,16 +81,75 @@ class FeatureHubConfig:
 
         return self._repository
 
-    async def init(self) -> FeatureHubConfig:
+    # wait_ready is how many seconds to wait for the features to arrive (the streaming edge service returns as soon
+    # as it has connected), None not to wait for them
+    async def init(self, wait_ready: typing.Optional[float] = None) -> FeatureHubConfig:
         log.info("Init request made")
         # ensure the repository exists
         self.repository()
 
         # ensure the edge service provider exists
         await self.get_or_create_edge_service().poll()
+        if wait_ready is not None:
+            self._check_ready(await self._repository.ready(wait_ready), wait_ready)
+        self._init_done()
+
+        return self
+
+    # the same as init, for code without an event loop (e.g. a WSGI server)
+    def init_sync(self, wait_ready: typing.Optional[float] = None) -> FeatureHubConfig:
+        log.info("Init request made")
+        self.repository()
+        self.get_or_create_edge_service().poll_sync()
+        if wait_ready is not None:
+            self._check_ready(self._repository.wait_until_ready(wait_ready), wait_ready)
+        self._init_done()
 
         return self
 
+    @staticmethod
+    def _check_ready(ready: bool, wait_ready: float):
+        if not ready:
+            log.warning("featurehub features were not ready after waiting %s seconds", wait_ready)
+
+    def _init_done(self):
+        self._initialised = True
+
+        # the streaming edge service returns before the features arrive, so we check the handles once they do
+        if not self._checking_handles:
+            self._checking_handles = True
+            self._repository.when_ready(self._check_handles)
+
+    def _check_handles(self):
+        self._checking_handles = False
+        missing = self.missing_handles()
+        if missing:
+            log.warning("featurehub has no features for handles %s", ", ".join(missing))
+
+    def _after_fork_in_child(self) -> typing.Optional[threading.Thread]:
+        if self._edge_service is None:
+            return None
+
+        # the parent's edge thread didn't come with us, closing our copy only closes this process's handle on the
+        # connection, the parent carries on using it. the repository is kept, so we start warm
+        self._edge_service.close()
+        self._edge_service = None
+
+        conditions = getattr(self._repository, 'condition_table', None)
+        if isinstance(conditions, ConditionTable):
+            conditions._after_fork()
+
+        # a publishing repository's workers read what the parent publishes, they mustn't connect and publish too
+        if not self._initialised or not self._restart_on_fork or \
+                isinstance(self._repository, SharedMemoryPublishingRepository):
+            return None
+
+        log.debug("featurehub restarting edge service after fork in process %s", os.getpid())
+        restart = threading.Thread(target=lambda: self.get_or_create_edge_service().poll_sync(),
+                                   daemon=True, name="featurehub-fork-restart")
+        restart.start()
+        return restart
+
     # uses the defined provider to make us an edge instance
     def _create_edge_service(self) -> EdgeService:
         # call to get the edge service method and then call that method with the parameters
@@ -115,6 +194,19 @@ class FeatureHubConfig:
         self.edge_service_provider(lambda repository, api_keys,
                                           edge_url: PollingEdgeService(edge_url, api_keys, repository, interval))
 
+    # streams every api key of this config on one shared thread rather than a thread each, see streaming_multiplexer
+    def use_multiplexed_streaming_edge_service(self, multiplexer: typing.Optional[StreamingMultiplexer] = None):
+        self.edge_service_provider(lambda repository, api_keys,
+                                          edge_url: MultiplexedStreamingEdgeClient(edge_url, api_keys, repository,
+                                                                                   multiplexer))
+
+    # for the workers of a pre-forking server, pick up features published by a SharedMemoryPublishingRepository
+    # in another process rather than each worker connecting to FeatureHub itself
+    def use_shared_memory_edge_service(self, path: str,
+                                       interval: float = float(os.environ.get("FEATUREHUB_SHARED_POLL_INTERVAL", "1"))):
+        self.edge_service_provider(lambda repository, api_keys,
+                                          edge_url: SharedMemoryEdgeService(path, api_keys, repository, interval))
+
     def new_context(self) -> ClientContext:
         repository = self.repository()
         edge_service = self.get_or_create_edge_service()
@@ -123,7 +215,44 @@ class FeatureHubConfig:
             if self._client_eval else \
             ServerEvalFeatureContext(repository, edge_service)
 
+    # a context from a pool kept per thread, which goes back to the pool (cleared) at the end of the with block:
+    #   with config.pooled_context() as ctx:
+    #       ctx.user_key(user_id).get_flag('FEATURE')
+    def pooled_context(self) -> typing.ContextManager[ClientContext]:
+        if self._context_pool is None:
+            self._context_pool = ContextPool(self)
+
+        return self._context_pool.context()
+
+    # a handle on the feature, which finds it once rather than on every read, e.g. at import time:
+    #   NEW_CHECKOUT = config.handle('NEW_CHECKOUT')
+    #   NEW_CHECKOUT.get_flag(ctx)
+    def handle(self, key: str) -> FeatureHandle:
+        found = self._handles.get(key)
+        if found is None:
+            found = self._handles.setdefault(key, FeatureHandle(self, key))
+        return found
+
+    # the keys we have handles for that the repository has no feature for
+    def missing_handles(self) -> List[str]:
+        return [key for key, handle in list(self._handles.items()) if not handle.exists()]
+
     def close(self):
         if self._edge_service is not None:
             self._edge_service.close()
             self._edge_service = None
+
+
+# threads do not survive a fork, so if a config was initialised in a parent process (e.g. a gunicorn master) each child
+# needs a new edge service (unless restart_on_fork is False, e.g. the children pick the features up some other way).
+# the configs are held weakly so they can still be garbage collected, and there is one handler for all of them
+_configs: "weakref.WeakSet[FeatureHubConfig]" = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for config in list(_configs):
+        config._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -1,28 +1,107 @@
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable
+import itertools
+import logging
+import threading
+import time
 
-from featurehub_sdk.client_context import InternalFeatureRepository, ClientContext, Applied, RolloutStrategy
+from featurehub_sdk.analytics import AnalyticsCollector
+from featurehub_sdk.client_context import InternalFeatureRepository, ClientContext, Applied, RolloutStrategy, \
+    FrozenClientContext, ConditionTable
+from featurehub_sdk.evaluation_cache import EvaluationCache
 from featurehub_sdk.fh_state_base_holder import FeatureStateHolder
+from featurehub_sdk.instrumentation import InstrumentationSink
 from featurehub_sdk.interceptors import ValueInterceptor, InterceptorValue
 from featurehub_sdk.strategy_matchers import ApplyFeature
 
+log = logging.getLogger('featurehub_sdk')
+
+_cache_scopes = itertools.count(1)
+
 
 class FeatureHubRepository(InternalFeatureRepository):
     features: Dict[str, FeatureStateHolder] # do we need this to be private and expose it as a getter method?
     _ready: bool = False
     _interceptors: List[ValueInterceptor]
     _strategy_matcher: ApplyFeature
+    _instrumentation: Optional[InstrumentationSink]
+    _analytics: Optional[AnalyticsCollector]
+    _evaluation_cache: Optional[EvaluationCache]
+    # what sets our entries in a shared evaluation cache apart from other repositories'
+    _cache_scope: int
+    _conditions: ConditionTable
+    # set once features arrive (or the edge fails us), cleared again by not_ready
+    _ready_event: threading.Event
+    # when we started waiting for features (made, or last told we aren't ready), None while we have them
+    _not_ready_since: Optional[float]
+    _time_to_ready: Optional[float]
+    # called once when we are next ready, guarded by _ready_lock
+    _ready_listeners: List[Callable[[], None]]
+    _ready_lock: threading.Lock
 
-    def __init__(self, apply_features: Optional[ApplyFeature] = None):
+    # strategies and conditions are shared with every other repository in the process, unless conditions is given
+    def __init__(self, apply_features: Optional[ApplyFeature] = None, conditions: Optional[ConditionTable] = None):
         self._strategy_matcher = apply_features if apply_features is not None else ApplyFeature()
         self._interceptors = []
+        self._instrumentation = None
+        self._analytics = None
+        self._evaluation_cache = None
+        self._cache_scope = next(_cache_scopes)
+        self._conditions = conditions if conditions is not None else ConditionTable.shared()
         self.features = {}
+        self._ready_event = threading.Event()
+        self._not_ready_since = time.perf_counter()
+        self._time_to_ready = None
+        self._ready_listeners = []
+        self._ready_lock = threading.Lock()
 
     def apply(self, strategies: List[RolloutStrategy], key: str, feature_id: str, context: ClientContext) -> Applied:
-        return self._strategy_matcher.apply(strategies, key, feature_id, context)
+        # only frozen contexts can be cached, anything else could change under us
+        if self._evaluation_cache is not None and isinstance(context, FrozenClientContext):
+            return self._cached_apply(strategies, key, feature_id, context)
+
+        return self._apply(strategies, key, feature_id, context)
+
+    def _cached_apply(self, strategies: List[RolloutStrategy], key: str, feature_id: str,
+                      context: FrozenClientContext) -> Applied:
+        cache = self._evaluation_cache
+        holder = self.features.get(key)
+        version = holder.get_version if holder is not None else -1
+
+        applied = cache.get(context.fingerprint, key, version, self._cache_scope)
+        if self._instrumentation is not None:
+            self._instrumentation.cache_lookup('evaluation', applied is not None)
+
+        if applied is None:
+            applied = self._apply(strategies, key, feature_id, context)
+            cache.put(context.fingerprint, key, version, applied, applied.valid_for, self._cache_scope)
+
+        return applied
+
+    def _apply(self, strategies: List[RolloutStrategy], key: str, feature_id: str, context: ClientContext) -> Applied:
+        if self._instrumentation is None:
+            return self._strategy_matcher.apply(strategies, key, feature_id, context)
+
+        start = time.perf_counter()
+        applied = self._strategy_matcher.apply(strategies, key, feature_id, context)
+        self._instrumentation.strategies_applied(key, len(strategies) if strategies else 0, applied.strategy_id,
+                                                 time.perf_counter() - start)
+        return applied
 
     def notify(self, status: str, data: Optional):
+        if self._instrumentation is None:
+            self._notify(status, data)
+            return
+
+        start = time.perf_counter()
+        self._notify(status, data)
+        count = len(data) if status == 'features' and data else (1 if data else 0)
+        self._instrumentation.update_applied(status, count, time.perf_counter() - start)
+
+    def _notify(self, status: str, data: Optional):
         if status == 'failed':
             self._ready = False
+            # nothing is coming, don't leave anyone waiting for it
+            self._ready_event.set()
             return
 
         if data is None:
@@ -30,10 +109,10 @@ class FeatureHubRepository(InternalFeatureRepository):
 
         if status == 'features':
             self.__update_features(data)
-            self._ready = True
+            self._set_ready()
         elif status == 'feature':
             self.__update_feature_state(data)
-            self._ready = True
+            self._set_ready()
         elif status == 'delete_feature':
             self._delete_feature(data)
 
@@ -41,6 +120,11 @@ class FeatureHubRepository(InternalFeatureRepository):
         feat = self.features.get(data['key'])
         if feat:
             feat.set_feature_state(None)
+            self._feature_changed(data['key'])
+
+    def _feature_changed(self, key: str):
+        if self._evaluation_cache is not None:
+            self._evaluation_cache.invalidate(key, self._cache_scope)
 
     def __update_features(self, data: List[dict]):
         if data:
@@ -54,17 +138,30 @@ class FeatureHubRepository(InternalFeatureRepository):
         # check if feature already in the dictionary, if not add to the dictionary
         holder = self.features.get(feature_state['key'])
         if not holder:
-            new_feature = FeatureStateHolder(feature_state['key'], self, feature_state, None, None)
+            new_feature = FeatureStateHolder(feature_state['key'], self, feature_state, None, None,
+                                             conditions=self._conditions)
             self.features[feature_state['key']] = new_feature
             return
 
         # if feature is in the dictionary, check if version has changed
         elif feature_state.get('version') < holder.get_version:
             return
-        elif feature_state.get('version') == holder.get_version and feature_state.get('value') == holder.get_value:
+        # the stored value, not get_value, which would count as a read for analytics and instrumentation
+        elif feature_state.get('version') == holder.get_version and feature_state.get('value') == holder._value:
             return
 
         holder.set_feature_state(feature_state)
+        self._feature_changed(feature_state['key'])
+
+    # what evaluates rollout strategies against a context
+    @property
+    def strategy_matcher(self) -> ApplyFeature:
+        return self._strategy_matcher
+
+    # the strategies and attribute conditions shared by all our features
+    @property
+    def condition_table(self) -> ConditionTable:
+        return self._conditions
 
     def is_ready(self):
         return self._ready
@@ -76,16 +173,96 @@ class FeatureHubRepository(InternalFeatureRepository):
         fs = self.features.get(key)
 
         if fs is None:
-            fs = FeatureStateHolder(key, self, None, None, None)
+            fs = FeatureStateHolder(key, self, None, None, None, conditions=self._conditions)
             self.features[key] = fs
 
         return fs
 
+    def _set_ready(self):
+        self._ready = True
+
+        since = self._not_ready_since
+        if since is not None:
+            self._not_ready_since = None
+            self._time_to_ready = time.perf_counter() - since
+            if self._instrumentation is not None:
+                self._instrumentation.repository_ready(self._time_to_ready)
+
+        self._ready_event.set()
+
+        # always under the lock, so a listener added while we were becoming ready isn't missed
+        with self._ready_lock:
+            listeners, self._ready_listeners = self._ready_listeners, []
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as err:
+                log.error("featurehub ready listener failed: %s", err)
+
+    def when_ready(self, callback: Callable[[], None]):
+        with self._ready_lock:
+            if not self._ready:
+                self._ready_listeners.append(callback)
+                return
+
+        callback()
+
     def not_ready(self):
+        if self._not_ready_since is None:
+            self._not_ready_since = time.perf_counter()
         self._ready = False
+        self._ready_event.clear()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        self._ready_event.wait(timeout)
+        return self._ready
+
+    # how long the features took to arrive the last time we were waiting for them, None if they haven't yet
+    @property
+    def time_to_ready(self) -> Optional[float]:
+        return self._time_to_ready
 
     def register_interceptor(self, interceptor: ValueInterceptor):
         self._interceptors.append(interceptor)
+        self._read_hooks_changed()
+
+    def has_read_hooks(self) -> bool:
+        return len(self._interceptors) > 0 or self._instrumentation is not None or self._analytics is not None
+
+    def has_interceptors(self) -> bool:
+        return len(self._interceptors) > 0
+
+    def _read_hooks_changed(self):
+        # features without strategies skip straight to their value when there is nothing else to do. a copy, as the
+        # edge's thread (or a request's, asking for a feature we don't have) can add to the features while we go
+        for holder in list(self.features.values()):
+            holder._update_fast_path()
+
+    # report timings and counts of evaluations, updates and edge traffic to this sink, None turns it off again
+    def register_instrumentation(self, sink: Optional[InstrumentationSink]):
+        self._instrumentation = sink
+        self._read_hooks_changed()
+
+    @property
+    def instrumentation(self) -> Optional[InstrumentationSink]:
+        return self._instrumentation
+
+    # count every value read by feature, value and matching strategy, None turns it off again
+    def register_analytics(self, collector: Optional[AnalyticsCollector]):
+        self._analytics = collector
+        self._read_hooks_changed()
+
+    @property
+    def analytics(self) -> Optional[AnalyticsCollector]:
+        return self._analytics
+
+    # cache the evaluation of strategies for frozen contexts, None turns it off again
+    def register_evaluation_cache(self, cache: Optional[EvaluationCache]):
+        self._evaluation_cache = cache
+
+    @property
+    def evaluation_cache(self) -> Optional[EvaluationCache]:
+        return self._evaluation_cache
 
     def find_interceptor(self, feature_value: str) -> Optional[InterceptorValue]:
         for interceptor in self._interceptors:
@@ -98,7 +275,7 @@ class FeatureHubRepository(InternalFeatureRepository):
         # if you wish
         feats = []
 
-        for k, v in self.features.items():
+        for v in list(self.features.values()):
             data = v.internal_feature_state
             if data:
                 feats.append(data)
@@ -1,7 +1,9 @@
 from decimal import Decimal
-from typing import Optional, Union
+from typing import Optional, Union, Tuple, Dict, Any
+import time
 
-from featurehub_sdk.client_context import ClientContext, FeatureState, InternalFeatureRepository, RolloutStrategy
+from featurehub_sdk.client_context import ClientContext, FeatureState, InternalFeatureRepository, RolloutStrategy, \
+    ConditionTable
 
 
 # this represents one of 3 things:
@@ -17,6 +19,9 @@ from featurehub_sdk.interceptors import InterceptorValue
 from typing import List
 
 
+_NOT_CAST = object()
+
+
 class FeatureStateHolder(FeatureState):
     """Holder for features. Wraps raw response with features dictionary"""
 
@@ -26,6 +31,15 @@ class FeatureStateHolder(FeatureState):
     _ctx: ClientContext
     _repo: InternalFeatureRepository
     _encoded_strategies: List[RolloutStrategy]
+    _conditions: Optional[ConditionTable]
+    # worked out when the state arrives, rather than on every read: the type of the feature (None if it doesn't
+    # exist), its value and the value of each of its strategies already cast to that type
+    _type: Optional[str]
+    _value: Any
+    _strategy_values: Dict[RolloutStrategy, Any]
+    # nothing can change our value (we have no strategies and the repository has no interceptors, instrumentation
+    # or analytics), so a read is just our value
+    _fast: bool
 
     # we can be initialised with no state when someone request a key that does not exist
     # the parent exists so we can keep track of the original feature when we use contexts
@@ -34,6 +48,7 @@ class FeatureStateHolder(FeatureState):
                  feature_state: Optional = None,
                  parent_state: Optional["FeatureStateHolder"] = None,
                  ctx: Optional[ClientContext] = None,
+                 conditions: Optional[ConditionTable] = None,
                  ):
         super().__init__()
 
@@ -43,22 +58,79 @@ class FeatureStateHolder(FeatureState):
         self._repo = repo
         self._encoded_strategies = []
         self._internal_feature_state = None
+        self._type = None
+        self._value = None
+        self._strategy_values = {}
+        self._fast = False
+        # shares the conditions of our strategies with other features, see ConditionTable
+        self._conditions = conditions
 
         if feature_state:
             self.__set_feature_state(feature_state)
+        elif parent_state is None:
+            self._update_fast_path()
 
     def __set_feature_state(self, feature_state):
-        self._internal_feature_state = feature_state if feature_state is not None else {}
         found_strategies = feature_state.get('strategies') if feature_state and feature_state.get('strategies') else []
 
-        self._encoded_strategies = list(map(lambda rs: RolloutStrategy(rs), found_strategies))
+        if found_strategies:
+            # we only keep the strategies once they are compiled (see internal_feature_state)
+            feature_state = {k: v for k, v in feature_state.items() if k != 'strategies'}
+
+        self._internal_feature_state = feature_state if feature_state is not None else {}
+
+        if self._conditions is not None:
+            self._encoded_strategies = [self._conditions.strategy(rs) for rs in found_strategies]
+        else:
+            self._encoded_strategies = list(map(lambda rs: RolloutStrategy(rs), found_strategies))
+
+        state = self._internal_feature_state
+        self._type = state.get('type') if state.get('l') is not None else None
+        self._value = state.get('value')
+
+        strategy_values = {}
+        for rs in self._encoded_strategies:
+            try:
+                strategy_values[rs] = InterceptorValue(rs.value).cast(self._type)
+            except ValueError:
+                pass  # left to fail when it is read, as it always has
+        self._strategy_values = strategy_values
+
+        self._update_fast_path()
+
+    # the repository calls this when interceptors, instrumentation or analytics come or go
+    def _update_fast_path(self):
+        self._fast = self._parent_state is None and not self._encoded_strategies and not self._repo.has_read_hooks()
 
     def __get_value(self, feature_type: Optional[str]) -> Union[None, bool, str, float]:
+        if self._fast:
+            return self._value if feature_type is None or feature_type == self._type else None
+
+        sink = self._repo.instrumentation
+        analytics = self._repo.analytics
+
+        if sink is None:
+            if analytics is None:
+                return self._evaluate(feature_type)[0]
+
+            value, strategy_id, _ = self._evaluate(feature_type)
+        else:
+            start = time.perf_counter()
+            value, strategy_id, intercepted = self._evaluate(feature_type)
+            sink.feature_evaluated(self._key, strategy_id, intercepted, time.perf_counter() - start)
+
+        if analytics is not None:
+            analytics.record(self._key, value, strategy_id)
+
+        return value
+
+    # returns the value, the id of the strategy that supplied it (if any) and whether an interceptor supplied it
+    def _evaluate(self, feature_type: Optional[str]) -> Tuple[Union[None, bool, str, float], Optional[str], bool]:
         if not self.locked:
             intercept = self._repo.find_interceptor(self._key)
 
             if intercept:
-                return intercept.cast(feature_type if feature_type else 'STRING')
+                return intercept.cast(feature_type if feature_type else 'STRING'), None, True
 
         # walk up the chain to find the original feature state (if any)
         fs = self._top_feature_state_holder()
@@ -66,20 +138,29 @@ class FeatureStateHolder(FeatureState):
         state = fs._feature_state()
 
         if state is None:
-            return None
+            return None, None, False
 
         # if the feature isn't a feature (they have asked for a feature that doesn't exist
         # or the type is wrong, return None
-        if fs is None or (feature_type is not None and fs.feature_type != feature_type):
-            return None
+        if fs is None or (feature_type is not None and fs._type != feature_type):
+            return None, None, False
 
         if self._ctx is not None:
             matched = self._repo.apply(fs._encoded_strategies, self._key, fs.id, self._ctx)
 
             if matched.matched:
-                return InterceptorValue(matched.value).cast(feature_type)
+                value = fs._strategy_values.get(matched.strategy, _NOT_CAST) if feature_type is not None \
+                    else _NOT_CAST
+                if value is _NOT_CAST:
+                    value = InterceptorValue(matched.value).cast(feature_type)
+                return value, matched.strategy_id, False
+
+        return fs._value, None, False
 
-        return state.get('value')
+    # a context can only change our value through strategies
+    @property
+    def needs_context(self) -> bool:
+        return len(self._top_feature_state_holder()._encoded_strategies) > 0
 
     def with_context(self, ctx: ClientContext) -> FeatureState:
         return FeatureStateHolder(self._key, self._repo, None, self, ctx)
@@ -101,6 +182,11 @@ class FeatureStateHolder(FeatureState):
     def feature_type(self) -> Optional[str]:
         return self._feature_state().get('type') if self.exists else None
 
+    # the rollout strategies of the original feature state
+    @property
+    def strategies(self) -> List[RolloutStrategy]:
+        return self._top_feature_state_holder()._encoded_strategies
+
     @property
     def locked(self):
         fs = self._feature_state()
@@ -111,7 +197,7 @@ class FeatureStateHolder(FeatureState):
 
     @property
     def get_value(self):
-        return self.__get_value(self.feature_type if self.exists else None)
+        return self.__get_value(self._top_feature_state_holder()._type)
 
     @property
     def get_version(self) -> int:
@@ -145,17 +231,24 @@ class FeatureStateHolder(FeatureState):
 
     @property
     def get_flag(self) -> Optional[bool]:
-        return self.get_boolean
+        return self.__get_value('BOOLEAN')
 
     @property
     def is_enabled(self) -> bool:
-        return self.get_boolean is True
+        return self.__get_value('BOOLEAN') is True
 
     @property
     def is_set(self) -> bool:
         return self.__get_value(self.feature_type) is not None
 
     def _get_internal_feature_state(self):
-        return self._internal_feature_state if self.exists else None
+        if not self.exists:
+            return None
+
+        # the feature state as it came, with its strategies put back
+        if self._encoded_strategies:
+            return dict(self._internal_feature_state, strategies=[rs.to_dict() for rs in self._encoded_strategies])
+
+        return self._internal_feature_state
 
     internal_feature_state = property(_get_internal_feature_state, __set_feature_state)
\ No newline at end of file
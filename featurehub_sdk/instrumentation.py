@@ -0,0 +1,238 @@
+from typing import Optional, List, Dict, Tuple
+import bisect
+import threading
+
+# instrumentation is opt in: until a sink is registered on the repository (register_instrumentation) nothing is
+# timed or counted, the hot paths only check whether there is a sink. all durations are in seconds.
+
+
+class InstrumentationSink:
+    # every method is a no-op, override the ones you are interested in
+
+    # a feature value was read (get_flag, get_string, etc), strategy_id is the strategy that supplied the value
+    # and intercepted is true if an interceptor supplied it
+    def feature_evaluated(self, key: str, strategy_id: Optional[str], intercepted: bool, duration: float):
+        pass
+
+    # the rollout strategies of a feature were evaluated against a context
+    def strategies_applied(self, key: str, strategy_count: int, matched_strategy_id: Optional[str],
+                           duration: float):
+        pass
+
+    # one of the SDK's caches was consulted
+    def cache_lookup(self, cache: str, hit: bool):
+        pass
+
+    # the repository applied an update from an edge service ('features', 'feature', 'delete_feature', 'failed')
+    def update_applied(self, status: str, feature_count: int, duration: float):
+        pass
+
+    # an edge service made a request (a poll, or the connection of a stream), size is the bytes received
+    def edge_request(self, edge: str, status: int, duration: float, size: int):
+        pass
+
+    # a streaming edge service received an event, size is the bytes of data
+    def edge_event(self, edge: str, event: str, size: int):
+        pass
+
+    # the repository got its features, duration is how long it waited for them (since it was made, or since it was
+    # last told it wasn't ready, e.g. a server evaluated context changed)
+    def repository_ready(self, duration: float):
+        pass
+
+
+# bucket upper bounds in seconds, from a microsecond up to 10 seconds
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2,
+                   5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    _buckets: Tuple[float, ...]
+    _counts: List[int]
+    _count: int
+    _sum: float
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # the last one is everything above the largest bucket
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, value: float):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._count += 1
+        self._sum += value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        # the upper bound of the bucket the quantile falls in, which is as accurate as a histogram can be
+        if self._count == 0:
+            return None
+
+        target = q * self._count
+        running = 0
+        for index, count in enumerate(self._counts):
+            running += count
+            if running >= target:
+                return self._buckets[index] if index < len(self._buckets) else float('inf')
+
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self._count,
+            'sum': self._sum,
+            'buckets': dict(zip([str(b) for b in self._buckets] + ['+Inf'], self._counts)),
+        }
+
+
+class MetricsInstrumentationSink(InstrumentationSink):
+    # keeps latency histograms and counts in memory, call snapshot() to see them (e.g. from a debug endpoint)
+    _lock: threading.Lock
+    _buckets: Tuple[float, ...]
+    _evaluations: Dict[str, Histogram]
+    _strategy_evaluations: Dict[str, Histogram]
+    _strategy_matches: Dict[Tuple[str, Optional[str]], int]
+    _intercepted: Dict[str, int]
+    _cache: Dict[Tuple[str, bool], int]
+    _updates: Dict[str, Histogram]
+    _update_sizes: Dict[str, int]
+    _edge_requests: Dict[str, Histogram]
+    _edge_statuses: Dict[Tuple[str, int], int]
+    _edge_events: Dict[Tuple[str, str], int]
+    _edge_bytes: Dict[str, int]
+    _ready: Histogram
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self.reset()
+
+    def reset(self):
+        self._evaluations = {}
+        self._strategy_evaluations = {}
+        self._strategy_matches = {}
+        self._intercepted = {}
+        self._cache = {}
+        self._updates = {}
+        self._update_sizes = {}
+        self._edge_requests = {}
+        self._edge_statuses = {}
+        self._edge_events = {}
+        self._edge_bytes = {}
+        self._ready = Histogram(self._buckets)
+
+    def _observe(self, histograms: Dict[str, Histogram], name: str, value: float):
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(self._buckets)
+        histogram.observe(value)
+
+    @staticmethod
+    def _count(counts: dict, name, amount: int = 1):
+        counts[name] = counts.get(name, 0) + amount
+
+    def feature_evaluated(self, key: str, strategy_id: Optional[str], intercepted: bool, duration: float):
+        with self._lock:
+            self._observe(self._evaluations, key, duration)
+            if intercepted:
+                self._count(self._intercepted, key)
+
+    def strategies_applied(self, key: str, strategy_count: int, matched_strategy_id: Optional[str],
+                           duration: float):
+        with self._lock:
+            self._observe(self._strategy_evaluations, key, duration)
+            self._count(self._strategy_matches, (key, matched_strategy_id))
+
+    def cache_lookup(self, cache: str, hit: bool):
+        with self._lock:
+            self._count(self._cache, (cache, hit))
+
+    def update_applied(self, status: str, feature_count: int, duration: float):
+        with self._lock:
+            self._observe(self._updates, status, duration)
+            self._count(self._update_sizes, status, feature_count)
+
+    def edge_request(self, edge: str, status: int, duration: float, size: int):
+        with self._lock:
+            self._observe(self._edge_requests, edge, duration)
+            self._count(self._edge_statuses, (edge, status))
+            self._count(self._edge_bytes, edge, size)
+
+    def edge_event(self, edge: str, event: str, size: int):
+        with self._lock:
+            self._count(self._edge_events, (edge, event))
+            self._count(self._edge_bytes, edge, size)
+
+    def repository_ready(self, duration: float):
+        with self._lock:
+            self._ready.observe(duration)
+
+    def evaluation_histogram(self, key: str) -> Optional[Histogram]:
+        return self._evaluations.get(key)
+
+    def slowest_features(self, count: int = 10, quantile: float = 0.99) -> List[Tuple[str, float]]:
+        with self._lock:
+            found = [(key, h.quantile(quantile)) for key, h in self._evaluations.items()]
+        return sorted(found, key=lambda x: x[1], reverse=True)[0:count]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'evaluations': {k: h.to_dict() for k, h in self._evaluations.items()},
+                'intercepted': dict(self._intercepted),
+                'strategy_evaluations': {k: h.to_dict() for k, h in self._strategy_evaluations.items()},
+                'strategy_matches': {f"{k}/{s}": c for (k, s), c in self._strategy_matches.items()},
+                'cache': {f"{c}/{'hit' if hit else 'miss'}": n for (c, hit), n in self._cache.items()},
+                'updates': {k: h.to_dict() for k, h in self._updates.items()},
+                'update_sizes': dict(self._update_sizes),
+                'edge_requests': {k: h.to_dict() for k, h in self._edge_requests.items()},
+                'edge_statuses': {f"{e}/{s}": c for (e, s), c in self._edge_statuses.items()},
+                'edge_events': {f"{e}/{ev}": c for (e, ev), c in self._edge_events.items()},
+                'edge_bytes': dict(self._edge_bytes),
+                'ready': self._ready.to_dict(),
+            }
+
+
+class CompositeInstrumentationSink(InstrumentationSink):
+    # lets you report to more than one sink, e.g. prometheus and the in memory metrics
+    _sinks: List[InstrumentationSink]
+
+    def __init__(self, sinks: List[InstrumentationSink]):
+        self._sinks = list(sinks)
+
+    def feature_evaluated(self, key: str, strategy_id: Optional[str], intercepted: bool, duration: float):
+        for sink in self._sinks:
+            sink.feature_evaluated(key, strategy_id, intercepted, duration)
+
+    def strategies_applied(self, key: str, strategy_count: int, matched_strategy_id: Optional[str],
+                           duration: float):
+        for sink in self._sinks:
+            sink.strategies_applied(key, strategy_count, matched_strategy_id, duration)
+
+    def cache_lookup(self, cache: str, hit: bool):
+        for sink in self._sinks:
+            sink.cache_lookup(cache, hit)
+
+    def update_applied(self, status: str, feature_count: int, duration: float):
+        for sink in self._sinks:
+            sink.update_applied(status, feature_count, duration)
+
+    def edge_request(self, edge: str, status: int, duration: float, size: int):
+        for sink in self._sinks:
+            sink.edge_request(edge, status, duration, size)
+
+    def edge_event(self, edge: str, event: str, size: int):
+        for sink in self._sinks:
+            sink.edge_event(edge, event, size)
+
+    def repository_ready(self, duration: float):
+        for sink in self._sinks:
+            sink.repository_ready(duration)
@@ -0,0 +1,62 @@
+from typing import Optional
+
+from opentelemetry import metrics
+
+from featurehub_sdk.instrumentation import InstrumentationSink
+from featurehub_sdk.version import sdk_version
+
+# needs the opentelemetry api, which you can install with: pip install featurehub-sdk[opentelemetry]
+# and whatever opentelemetry sdk/exporter your application already uses
+
+
+class OpenTelemetryInstrumentationSink(InstrumentationSink):
+    def __init__(self, meter: Optional[metrics.Meter] = None):
+        meter = meter if meter is not None else metrics.get_meter('featurehub_sdk', sdk_version)
+
+        self._evaluations = meter.create_histogram('featurehub.feature.evaluation.duration', unit='s',
+                                                   description='Time taken to read the value of a feature')
+        self._strategies = meter.create_histogram('featurehub.strategy.evaluation.duration', unit='s',
+                                                  description='Time taken to evaluate the rollout strategies of a '
+                                                              'feature against a context')
+        self._strategy_matches = meter.create_counter('featurehub.strategy.matches',
+                                                      description='Rollout strategy evaluations by the strategy '
+                                                                  'that matched')
+        self._cache = meter.create_counter('featurehub.cache.lookups', description='Lookups of the SDK caches')
+        self._updates = meter.create_histogram('featurehub.update.duration', unit='s',
+                                               description='Time taken to apply an update to the repository')
+        self._update_features = meter.create_counter('featurehub.update.features',
+                                                     description='Features received in updates')
+        self._edge_requests = meter.create_histogram('featurehub.edge.request.duration', unit='s',
+                                                     description='Time taken by requests to the edge')
+        self._edge_events = meter.create_counter('featurehub.edge.events',
+                                                 description='Events received from a streaming edge')
+        self._edge_bytes = meter.create_counter('featurehub.edge.received', unit='By',
+                                                description='Bytes received from the edge')
+        self._ready = meter.create_histogram('featurehub.ready.duration', unit='s',
+                                             description='Time the repository waited for its features')
+
+    def feature_evaluated(self, key: str, strategy_id: Optional[str], intercepted: bool, duration: float):
+        self._evaluations.record(duration, {'feature': key, 'intercepted': intercepted})
+
+    def strategies_applied(self, key: str, strategy_count: int, matched_strategy_id: Optional[str],
+                           duration: float):
+        self._strategies.record(duration, {'feature': key})
+        self._strategy_matches.add(1, {'feature': key, 'strategy': matched_strategy_id or 'none'})
+
+    def cache_lookup(self, cache: str, hit: bool):
+        self._cache.add(1, {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+    def update_applied(self, status: str, feature_count: int, duration: float):
+        self._updates.record(duration, {'status': status})
+        self._update_features.add(feature_count, {'status': status})
+
+    def edge_request(self, edge: str, status: int, duration: float, size: int):
+        self._edge_requests.record(duration, {'edge': edge, 'status': status})
+        self._edge_bytes.add(size, {'edge': edge})
+
+    def edge_event(self, edge: str, event: str, size: int):
+        self._edge_events.add(1, {'edge': edge, 'event': event})
+        self._edge_bytes.add(size, {'edge': edge})
+
+    def repository_ready(self, duration: float):
+        self._ready.record(duration)
@@ -0,0 +1,63 @@
+from typing import Optional, Tuple
+
+from prometheus_client import Counter, Histogram, CollectorRegistry, REGISTRY
+
+from featurehub_sdk.instrumentation import InstrumentationSink, DEFAULT_BUCKETS
+
+# needs prometheus_client, which you can install with: pip install featurehub-sdk[prometheus]
+
+
+class PrometheusInstrumentationSink(InstrumentationSink):
+    def __init__(self, registry: Optional[CollectorRegistry] = None, prefix: str = 'featurehub',
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        registry = registry if registry is not None else REGISTRY
+
+        self._evaluations = Histogram(f"{prefix}_feature_evaluation_seconds",
+                                      'Time taken to read the value of a feature',
+                                      ['feature', 'intercepted'], registry=registry, buckets=buckets)
+        self._strategies = Histogram(f"{prefix}_strategy_evaluation_seconds",
+                                     'Time taken to evaluate the rollout strategies of a feature against a context',
+                                     ['feature'], registry=registry, buckets=buckets)
+        self._strategy_matches = Counter(f"{prefix}_strategy_matches",
+                                         'Rollout strategy evaluations by the strategy that matched',
+                                         ['feature', 'strategy'], registry=registry)
+        self._cache = Counter(f"{prefix}_cache_lookups", 'Lookups of the SDK caches',
+                              ['cache', 'result'], registry=registry)
+        self._updates = Histogram(f"{prefix}_update_seconds", 'Time taken to apply an update to the repository',
+                                  ['status'], registry=registry, buckets=buckets)
+        self._update_features = Counter(f"{prefix}_updated_features", 'Features received in updates',
+                                        ['status'], registry=registry)
+        self._edge_requests = Histogram(f"{prefix}_edge_request_seconds", 'Time taken by requests to the edge',
+                                        ['edge', 'status'], registry=registry, buckets=buckets)
+        self._edge_events = Counter(f"{prefix}_edge_events", 'Events received from a streaming edge',
+                                    ['edge', 'event'], registry=registry)
+        self._edge_bytes = Counter(f"{prefix}_edge_received_bytes", 'Bytes received from the edge',
+                                   ['edge'], registry=registry)
+        self._ready = Histogram(f"{prefix}_ready_seconds", 'Time the repository waited for its features',
+                                registry=registry, buckets=buckets)
+
+    def feature_evaluated(self, key: str, strategy_id: Optional[str], intercepted: bool, duration: float):
+        self._evaluations.labels(key, 'true' if intercepted else 'false').observe(duration)
+
+    def strategies_applied(self, key: str, strategy_count: int, matched_strategy_id: Optional[str],
+                           duration: float):
+        self._strategies.labels(key).observe(duration)
+        self._strategy_matches.labels(key, matched_strategy_id or 'none').inc()
+
+    def cache_lookup(self, cache: str, hit: bool):
+        self._cache.labels(cache, 'hit' if hit else 'miss').inc()
+
+    def update_applied(self, status: str, feature_count: int, duration: float):
+        self._updates.labels(status).observe(duration)
+        self._update_features.labels(status).inc(feature_count)
+
+    def edge_request(self, edge: str, status: int, duration: float, size: int):
+        self._edge_requests.labels(edge, str(status)).observe(duration)
+        self._edge_bytes.labels(edge).inc(size)
+
+    def edge_event(self, edge: str, event: str, size: int):
+        self._edge_events.labels(edge, event).inc()
+        self._edge_bytes.labels(edge).inc(size)
+
+    def repository_ready(self, duration: float):
+        self._ready.observe(duration)
@@ -0,0 +1,290 @@
+from typing import Optional, List, Dict, Any
+
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+log = logging.getLogger('featurehub_sdk')
+
+# a small stand-in for a FeatureHub Edge server so the polling and streaming edge services can be exercised (load
+# tested, benchmarked, used in CI) without a network. It is driven by a fixture, either a dict or a json file:
+#
+# {
+#   "pollInterval": 30,                 # optional, sent back as cache-control: max-age=30 to polling clients
+#   "environments": {
+#     "<api key>": {"id": "<environment id>", "stale": false, "features": [ ...feature states... ]}
+#   },
+#   "eventRate": 10,                    # optional, events per second that "events" are replayed at
+#   "events": [                         # optional, played to streaming clients once start() is called
+#     {"apiKey": "<api key>", "event": "feature", "data": { ...feature state... }}
+#   ]
+# }
+#
+# polling:   GET /features?apiKey=x&apiKey=y&contextSha=z  (honours if-none-match, 404 for unknown keys, 236 if stale)
+# streaming: GET /features/<api key>  (sends "features" on connect, then every pushed event as it happens)
+
+
+class _Environment:
+    id: str
+    stale: bool
+    features: Dict[str, dict]
+    revision: int
+    event_id: int
+    subscribers: List[queue.Queue]
+
+    def __init__(self, env_id: str, features: List[dict], stale: bool):
+        self.id = env_id
+        self.stale = stale
+        self.features = {f['key']: f for f in features}
+        self.revision = 1
+        self.event_id = 0
+        self.subscribers = []
+
+    def feature_list(self) -> List[dict]:
+        return list(self.features.values())
+
+    def apply(self, event: str, data: Any):
+        if event == 'features':
+            self.features = {f['key']: f for f in data}
+        elif event == 'feature':
+            self.features[data['key']] = data
+        elif event == 'delete_feature':
+            self.features.pop(data['key'], None)
+        elif event == 'config' and data and data.get('edge.stale'):
+            self.stale = True
+
+        self.revision += 1
+
+
+class LocalEdgeServer:
+    _environments: Dict[str, _Environment]
+    _poll_interval: Optional[int]
+    _events: List[dict]
+    _event_rate: float
+    _lock: threading.Lock
+    _server: ThreadingHTTPServer
+    _thread: Optional[threading.Thread]
+    _player: Optional[threading.Thread]
+    _stopped: threading.Event
+
+    def __init__(self, fixture: dict, host: str = '127.0.0.1', port: int = 0):
+        self._lock = threading.Lock()
+        self._poll_interval = fixture.get('pollInterval')
+        self._events = list(fixture.get('events') or [])
+        self._event_rate = float(fixture.get('eventRate') or 10)
+        self._environments = {}
+        for api_key, env in (fixture.get('environments') or {}).items():
+            self._environments[api_key] = _Environment(env.get('id', api_key), list(env.get('features') or []),
+                                                       bool(env.get('stale')))
+
+        self._thread = None
+        self._player = None
+        self._stopped = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @staticmethod
+    def from_file(path: str, host: str = '127.0.0.1', port: int = 0) -> "LocalEdgeServer":
+        with open(path, 'r', encoding='utf-8') as f:
+            return LocalEdgeServer(json.load(f), host, port)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[0:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "LocalEdgeServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="featurehub-local-edge")
+        self._thread.start()
+
+        if self._events:
+            self._player = threading.Thread(target=self.play, args=(self._events, self._event_rate), daemon=True,
+                                            name="featurehub-local-edge-events")
+            self._player.start()
+
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            for env in self._environments.values():
+                for subscriber in env.subscribers:
+                    subscriber.put(None)
+                env.subscribers.clear()
+
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def set_features(self, api_key: str, features: List[dict]):
+        self.push(api_key, 'features', features)
+
+    def push(self, api_key: str, event: str, data: Any):
+        # updates what polling clients will see and sends the event to every connected streaming client
+        with self._lock:
+            env = self._environments[api_key]
+            env.apply(event, data)
+            env.event_id += 1
+            message = self._sse_message(event, data, env.event_id)
+            for subscriber in env.subscribers:
+                subscriber.put(message)
+
+    def play(self, events: List[dict], rate: float, repeat: int = 1):
+        # replays events at a steady rate, a replayed "feature" event always gets the next version so SDKs see it
+        # as a change rather than ignoring it
+        delay = 1.0 / rate if rate > 0 else 0
+        for _ in range(repeat):
+            for event in events:
+                if self._stopped.is_set():
+                    return
+
+                api_key = event.get('apiKey') or next(iter(self._environments))
+                data = event.get('data')
+                if event.get('event') == 'feature' and data:
+                    with self._lock:
+                        current = self._environments[api_key].features.get(data['key'])
+                    data = dict(data, version=(current.get('version', 0) + 1) if current else data.get('version', 1))
+
+                self.push(api_key, event.get('event'), data)
+
+                if delay:
+                    self._stopped.wait(delay)
+
+    @staticmethod
+    def _sse_message(event: str, data: Any, event_id: int) -> bytes:
+        return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+
+    def _poll(self, api_keys: List[str], etag: Optional[str]):
+        with self._lock:
+            envs = [self._environments.get(key) for key in api_keys]
+            if not api_keys or any(env is None for env in envs):
+                return 404, {}, None
+
+            tag = '"' + '-'.join(f"{env.id}:{env.revision}" for env in envs) + '"'
+            headers = {'etag': tag}
+            if self._poll_interval is not None:
+                headers['cache-control'] = f"max-age={self._poll_interval}"
+
+            if etag == tag:
+                return 304, headers, None
+
+            body = [{'id': env.id, 'features': env.feature_list()} for env in envs]
+            return 236 if any(env.stale for env in envs) else 200, headers, body
+
+    def _subscribe(self, api_key: str) -> Optional[queue.Queue]:
+        with self._lock:
+            env = self._environments.get(api_key)
+            if env is None:
+                return None
+
+            subscriber = queue.Queue()
+            subscriber.put(self._sse_message('features', env.feature_list(), env.event_id))
+            if env.stale:
+                subscriber.put(self._sse_message('config', {'edge.stale': True}, env.event_id))
+                subscriber.put(None)
+            env.subscribers.append(subscriber)
+            return subscriber
+
+    def _unsubscribe(self, api_key: str, subscriber: queue.Queue):
+        with self._lock:
+            env = self._environments.get(api_key)
+            if env is not None and subscriber in env.subscribers:
+                env.subscribers.remove(subscriber)
+
+    def _handler_class(self):
+        edge = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            # streams are sent chunked, as the real edge does, so clients see each event as soon as it is written
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                log.debug("local edge: " + format, *args)
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                if url.path == '/features':
+                    self._do_poll(urllib.parse.parse_qs(url.query).get('apiKey', []))
+                elif url.path.startswith('/features/'):
+                    self._do_stream(urllib.parse.unquote(url.path[len('/features/'):]))
+                else:
+                    self.send_error(404)
+
+            def _do_poll(self, api_keys: List[str]):
+                status, headers, body = edge._poll(api_keys, self.headers.get('if-none-match'))
+                data = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _do_stream(self, api_key: str):
+                subscriber = edge._subscribe(api_key)
+                if subscriber is None:
+                    self.send_error(404)
+                    return
+
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Cache-Control', 'no-cache')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+
+                    while True:
+                        message = subscriber.get()
+                        if message is None:
+                            break
+                        self.wfile.write(f"{len(message):x}\r\n".encode('ascii') + message + b"\r\n")
+                        self.wfile.flush()
+
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    edge._unsubscribe(api_key, subscriber)
+                    self.close_connection = True
+
+        return _Handler
+
+
+def main(args: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Local stand-in for a FeatureHub Edge server')
+    parser.add_argument('fixture', help='json fixture file describing the environments, features and events')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8553)
+    parser.add_argument('--rate', type=float, help='events per second to replay the fixture events at')
+    parser.add_argument('--repeat', type=int, default=1, help='number of times to replay the fixture events')
+    options = parser.parse_args(args)
+
+    with open(options.fixture, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    events = fixture.pop('events', None) or []
+    server = LocalEdgeServer(fixture, options.host, options.port).start()
+    print(f"local FeatureHub edge listening on {server.url}", flush=True)
+
+    try:
+        if events:
+            server.play(events, options.rate or float(fixture.get('eventRate') or 10), options.repeat)
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Mapping, Deque
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+import itertools
+import multiprocessing
+import os
+
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+
+# spreads batch evaluation of large inputs over a pool of processes, as evaluating strategies is pure python and so
+# one process can only ever use one core. each worker is sent the features once (when it starts) and after that only
+# chunks of contexts go out and columns of values come back. results are yielded in the same order as the input, and
+# only a bounded number of chunks are ever in flight so an input of any size can be streamed through.
+#
+# interceptors are not sent to the workers, they see the features exactly as the edge delivered them.
+
+# the evaluator of each worker process, created by _init_worker
+_worker_evaluator: Optional[BatchFeatureEvaluator] = None
+
+
+def _init_worker(features: List[dict]):
+    global _worker_evaluator
+
+    repository = FeatureHubRepository()
+    repository.notify('features', features)
+    _worker_evaluator = BatchFeatureEvaluator(repository)
+
+
+def rows_to_columns(rows: List[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    names = dict.fromkeys(name for row in rows for name in row.keys())
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def _evaluate_chunk(keys: List[str], rows: List[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    results = _worker_evaluator.evaluate_all(keys, rows_to_columns(rows))
+    return {key: result.values for key, result in results.items()}
+
+
+class ParallelBatchEvaluator:
+    _features: List[dict]
+    _processes: int
+    _chunk_size: int
+    _max_pending: int
+    _mp_context: Any
+    _executor: Optional[ProcessPoolExecutor]
+
+    # features is a repository or what its extract_feature_state() returns. the workers are started with "spawn" by
+    # default, so they don't inherit threads (such as edge services) from this process
+    def __init__(self, features, processes: Optional[int] = None, chunk_size: int = 10000,
+                 max_pending: Optional[int] = None, mp_context=None):
+        self._features = features.extract_feature_state() if isinstance(features, FeatureHubRepository) \
+            else list(features)
+        self._processes = processes if processes else (os.cpu_count() or 1)
+        self._chunk_size = chunk_size
+        self._max_pending = max_pending if max_pending else self._processes * 2
+        self._mp_context = mp_context if mp_context is not None else multiprocessing.get_context('spawn')
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._processes, mp_context=self._mp_context,
+                                                 initializer=_init_worker, initargs=(self._features,))
+
+        return self._executor
+
+    def evaluate_chunks(self, keys: List[str], rows: Iterable[Mapping[str, Any]]) -> Iterator[Dict[str, List[Any]]]:
+        # yields {feature key: [value per row]} for each chunk of rows, in order
+        pool = self._pool()
+        keys = list(keys)
+        rows = iter(rows)
+        pending: Deque[Future] = deque()
+
+        def submit() -> bool:
+            chunk = list(itertools.islice(rows, self._chunk_size))
+            if chunk:
+                pending.append(pool.submit(_evaluate_chunk, keys, chunk))
+            return len(chunk) > 0
+
+        try:
+            more = True
+            while more and len(pending) < self._max_pending:
+                more = submit()
+
+            while pending:
+                result = pending.popleft().result()
+                if more:
+                    more = submit()
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def evaluate(self, keys: List[str], rows: Iterable[Mapping[str, Any]]) -> Iterator[Dict[str, Any]]:
+        # yields {feature key: value} for each row, in order
+        keys = list(keys)
+        for chunk in self.evaluate_chunks(keys, rows):
+            for values in zip(*[chunk[key] for key in keys]):
+                yield dict(zip(keys, values))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "ParallelBatchEvaluator":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -5,7 +5,7 @@ import urllib3
 import threading
 import logging
 import json
-import asyncio
+import time
 from hashlib import sha256
 from typing import List
 from featurehub_sdk.edge_service import EdgeService
@@ -52,8 +52,12 @@ class PollingEdgeService(EdgeService):
         if old_cancel:  # if we had cancelled, start polling again
             self.poll_with_interval()
 
-    # this does the business, calls the remote service and gets the features back
     async def _get_updates(self):
+        self._get_updates_sync()
+
+    # this does the business, calls the remote service and gets the features back. it blocks, there is no async
+    # http client here
+    def _get_updates_sync(self):
         # TODO: set timeout of tcp requests to 12 seconds, or give users control over it using environ vars
         sha_context = "0" if self._sha_context is None else self._sha_context
         url = f"{self._url}&contextSha={sha_context}"
@@ -70,9 +74,14 @@ class PollingEdgeService(EdgeService):
         if self._context:
             headers['x-featurehub'] = self._context
 
+        sink = self._repository.instrumentation
+        start = time.perf_counter() if sink is not None else 0
         resp = self._http.request(method='GET', url=url, headers=headers)
         log.debug("polling status %s", resp.status)
 
+        if sink is not None:
+            sink.edge_request('polling', resp.status, time.perf_counter() - start, len(resp.data or b''))
+
         if resp.status == 200 or resp.status == 236:
             if 'etag' in resp.headers:
                 self._etag = resp.headers['etag']
@@ -108,14 +117,19 @@ class PollingEdgeService(EdgeService):
     async def poll_with_interval(self):
         if not self._cancel and not self._stopped:
             await self._get_updates()
-            if not self._cancel and self._interval > 0:
-                self._thread = threading.Timer(self._interval, self.poll_again)
-                self._thread.daemon = True # allow it to just disappear off if the app closes down
-                self._thread.start()
+            self._schedule_poll()
+
+    def _schedule_poll(self):
+        if not self._cancel and self._interval > 0:
+            self._thread = threading.Timer(self._interval, self.poll_again)
+            self._thread.daemon = True # allow it to just disappear off if the app closes down
+            self._thread.start()
 
-    # this ends up being synchronous
+    # runs on the timer's thread, which has no event loop (and doesn't need one)
     def poll_again(self):
-        asyncio.run(self.poll_with_interval())
+        if not self._cancel and not self._stopped:
+            self._get_updates_sync()
+            self._schedule_poll()
 
     # async polls, you can choose not to wait for updates
     # if the interval is zero, this will just issue a get updates and stop
@@ -123,6 +137,10 @@ class PollingEdgeService(EdgeService):
         self._cancel = False
         await self.poll_with_interval()
 
+    def poll_sync(self):
+        self._cancel = False
+        self.poll_again()
+
     def client_evaluated(self):
         return self._client_eval
 
@@ -133,11 +151,19 @@ class PollingEdgeService(EdgeService):
             self._thread = None
 
     async def context_change(self, header: str):
+        if self._change_context(header):
+            await self._get_updates()
+
+    def context_change_sync(self, header: str):
+        if self._change_context(header):
+            self._get_updates_sync()
+
+    # whether it was a different context
+    def _change_context(self, header: str) -> bool:
         old_context = self._context
         self._context = header
         self._sha_context = sha256(header.encode('utf-8')).hexdigest()
-        if old_context != header:
-            await self._get_updates()
+        return old_context != header
 
     @property
     def cancelled(self):
@@ -0,0 +1,193 @@
+from typing import Optional, List, Dict, Any, Mapping, Sequence, Union
+import argparse
+import json
+import random
+import sys
+
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator, ContextColumns
+from featurehub_sdk.client_context import RolloutStrategy
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.interceptors import InterceptorValue
+from featurehub_sdk.parallel_evaluation import rows_to_columns
+from featurehub_sdk.strategy_matchers import ApplyFeature, Murmur3PercentageCalculator
+
+# predicts who a feature's rollout strategies will reach before you ramp it up. give it a feature (as it comes from
+# the edge, or one you are thinking of configuring) and a sample of contexts, or let it generate synthetic ones, and
+# it tells you the share of contexts each strategy will serve, what that means for a population of a given size, and
+# how evenly the percentage keys of the sample spread over the percentage buckets.
+
+
+class StrategyExposure:
+    id: Optional[str]
+    name: Optional[str]
+    value: Any
+    percentage: float  # as configured, 0-100
+    matched: int
+    share: float  # of the sample, 0-1
+
+    def __init__(self, strategy: Optional[RolloutStrategy], value: Any, matched: int, rows: int):
+        self.id = strategy.id if strategy else None
+        self.name = strategy.name if strategy else None
+        self.value = value
+        self.percentage = strategy.percentage / Murmur3PercentageCalculator.MAX_PERCENTAGE * 100 if strategy else 0
+        self.matched = matched
+        self.share = matched / rows if rows else 0
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'name': self.name, 'value': self.value, 'percentage': self.percentage,
+                'matched': self.matched, 'share': self.share}
+
+
+class SimulationReport:
+    rows: int
+    strategies: List[StrategyExposure]
+    default: StrategyExposure
+    buckets: List[int]
+    chi_squared: Optional[float]
+
+    def __init__(self, rows: int, strategies: List[StrategyExposure], default: StrategyExposure,
+                 buckets: List[int]):
+        self.rows = rows
+        self.strategies = strategies
+        self.default = default
+        self.buckets = buckets
+
+        keyed = sum(buckets)
+        expected = keyed / len(buckets) if buckets else 0
+        self.chi_squared = sum((b - expected) ** 2 / expected for b in buckets) if expected else None
+
+    def value_shares(self) -> Dict[Any, float]:
+        shares = {}
+        for exposure in self.strategies + [self.default]:
+            shares[exposure.value] = shares.get(exposure.value, 0) + exposure.share
+        return shares
+
+    def expected_exposure(self, population: int) -> Dict[Optional[int], int]:
+        # how many of a population of this size each strategy would serve, by its position in the feature (strategies
+        # needn't have an id), None is the default value
+        exposure = {i: round(e.share * population) for i, e in enumerate(self.strategies)}
+        exposure[None] = round(self.default.share * population)
+        return exposure
+
+    def to_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'strategies': [s.to_dict() for s in self.strategies],
+            'default': self.default.to_dict(),
+            'buckets': self.buckets,
+            'chiSquared': self.chi_squared,
+        }
+
+
+def synthetic_contexts(count: int, attributes: Optional[Mapping[str, Union[Sequence, Mapping[Any, float]]]] = None,
+                       seed: int = 1) -> Dict[str, List[Any]]:
+    # a random user key per row, plus each attribute picked from a list of values (evenly) or a dictionary of value
+    # to weight, e.g. {'country': {'new_zealand': 0.8, 'australia': 0.2}, 'platform': ['ios', 'android']}
+    rnd = random.Random(seed)
+    columns = {'userkey': [f"user-{rnd.getrandbits(64):016x}" for _ in range(count)]}
+
+    for name, values in (attributes or {}).items():
+        if isinstance(values, Mapping):
+            columns[name] = rnd.choices(list(values.keys()), weights=list(values.values()), k=count)
+        else:
+            columns[name] = [rnd.choice(values) for _ in range(count)]
+
+    return columns
+
+
+class RolloutSimulator:
+    _evaluator: BatchFeatureEvaluator
+    _apply: ApplyFeature
+    _bucket_count: int
+
+    def __init__(self, apply_feature: Optional[ApplyFeature] = None, bucket_count: int = 100):
+        self._apply = apply_feature if apply_feature is not None else ApplyFeature()
+        self._evaluator = BatchFeatureEvaluator(FeatureHubRepository(self._apply), self._apply)
+        self._bucket_count = bucket_count
+
+    def simulate(self, feature: dict, contexts) -> SimulationReport:
+        # contexts are columns (see batch_evaluation), or a list of rows of attribute name to value
+        if isinstance(contexts, list):
+            contexts = rows_to_columns(contexts)
+        contexts = ContextColumns.of(contexts)
+
+        strategies = [RolloutStrategy(s) for s in (feature.get('strategies') or [])]
+        indexes = self._evaluator.match_strategies(strategies, feature.get('id'), contexts) if strategies \
+            else [None] * contexts.rows
+
+        counts = [0] * len(strategies)
+        unmatched = 0
+        for index in indexes:
+            if index is None:
+                unmatched += 1
+            else:
+                counts[index] += 1
+
+        feature_type = feature.get('type')
+        exposures = [StrategyExposure(s, InterceptorValue(s.value).cast(feature_type), counts[i], contexts.rows)
+                     for i, s in enumerate(strategies)]
+
+        # the rows are bucketed by the key ApplyFeature uses for the (first) percentage strategy
+        percentage_strategy = next((s for s in strategies if s.percentage != 0), None)
+        keys = contexts.percentage_keys(percentage_strategy.percentage_attributes) \
+            if percentage_strategy is not None and percentage_strategy.has_percentage_attributes \
+            else contexts.default_percentage_keys
+
+        return SimulationReport(contexts.rows, exposures,
+                                StrategyExposure(None, feature.get('value'), unmatched, contexts.rows),
+                                self.buckets(keys, feature.get('id')))
+
+    def buckets(self, keys: List[Optional[str]], feature_id: str) -> List[int]:
+        # how the percentages of the keys spread over evenly sized buckets, which should be close to flat
+        buckets = [0] * self._bucket_count
+        size = Murmur3PercentageCalculator.MAX_PERCENTAGE / self._bucket_count
+        present = [k for k in keys if k is not None]
+
+        for percentage in self._apply.percentage_calculator.determine_client_percentages(present, feature_id):
+            buckets[min(int(percentage // size), self._bucket_count - 1)] += 1
+
+        return buckets
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    from featurehub_sdk.cli import CliError, load_snapshot, read_contexts
+
+    parser = argparse.ArgumentParser(description='Predict who the rollout strategies of a feature will reach')
+    parser.add_argument('--snapshot', required=True, help='json file of feature states')
+    parser.add_argument('--feature', required=True, help='key of the feature to simulate')
+    parser.add_argument('--sample', help='newline delimited json contexts to simulate with')
+    parser.add_argument('--synthetic', type=int, default=100000,
+                        help='number of synthetic contexts to generate when there is no sample')
+    parser.add_argument('--attributes', help='json of attribute name to values (or value to weight) for the '
+                                             'synthetic contexts')
+    parser.add_argument('--population', type=int, help='report the expected exposure for a population of this size')
+    options = parser.parse_args(args)
+
+    try:
+        feature = next((f for f in load_snapshot(options.snapshot) if f.get('key') == options.feature), None)
+        if feature is None:
+            raise CliError(f"no feature {options.feature} in {options.snapshot}")
+
+        if options.sample:
+            with open(options.sample, 'r', encoding='utf-8') as f:
+                contexts = list(read_contexts(f))
+        else:
+            contexts = synthetic_contexts(options.synthetic,
+                                          json.loads(options.attributes) if options.attributes else None)
+
+        report = RolloutSimulator().simulate(feature, contexts)
+    except (CliError, OSError, ValueError) as e:
+        print(f"{parser.prog}: {e}", file=sys.stderr)
+        return 1
+
+    result = report.to_dict()
+    if options.population:
+        result['expectedExposure'] = report.expected_exposure(options.population)
+
+    json.dump(result, sys.stdout, indent=2, default=str)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,284 @@
+from typing import Optional, List, Tuple, Set
+
+import json
+import mmap
+import os
+import struct
+import threading
+import logging
+import time
+
+from featurehub_sdk.client_context import InternalFeatureRepository
+from featurehub_sdk.edge_service import EdgeService
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.strategy_matchers import ApplyFeature
+
+log = logging.getLogger('featurehub_sdk')
+
+# this lets a single process (normally the master of a pre-forking server like gunicorn or uwsgi) own the connection
+# to FeatureHub and publish what it knows into a memory mapped file, and every worker attach to that file read only.
+# the file is a small header (magic, generation, payload length) followed by the json encoded feature states. the
+# generation is odd while the publisher is writing and even once it is done, so a reader that sees an odd generation,
+# or a different generation after it has copied the payload, knows it raced with the publisher and tries again.
+_HEADER = struct.Struct('<8sQQ')
+_MAGIC = b'FHSNAP01'
+_INITIAL_SIZE = 64 * 1024
+_READ_ATTEMPTS = 50
+
+
+class SharedFeatureSnapshot:
+    _path: str
+    _writable: bool
+    _fd: Optional[int]
+    _map: Optional[mmap.mmap]
+    _generation: int
+    _lock: threading.Lock
+
+    def __init__(self, path: str, writable: bool = False):
+        self._path = path
+        self._writable = writable
+        self._fd = None
+        self._map = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        if writable:
+            self._open_for_write()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _open_for_write(self):
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size < _INITIAL_SIZE:
+            os.ftruncate(self._fd, _INITIAL_SIZE)
+            size = _INITIAL_SIZE
+
+        self._map = mmap.mmap(self._fd, size)
+
+        # if someone published here before us, carry on from their generation so readers always see it move forward
+        magic, generation, _ = _HEADER.unpack_from(self._map, 0)
+        if magic == _MAGIC:
+            self._generation = generation + (generation & 1)
+
+    def _open_for_read(self) -> bool:
+        if self._map is not None:
+            return True
+
+        try:
+            fd = os.open(self._path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+
+        try:
+            if os.fstat(fd).st_size < _HEADER.size:
+                os.close(fd)
+                return False
+
+            self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            self._fd = fd
+        except (OSError, ValueError):
+            os.close(fd)
+            return False
+
+        return True
+
+    def _remap(self):
+        self._map.close()
+        self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ if not self._writable else mmap.ACCESS_WRITE)
+
+    def publish(self, features: List[dict]) -> int:
+        if not self._writable:
+            raise TypeError('this snapshot was opened read only and cannot be published to')
+
+        payload = json.dumps(features).encode('utf-8')
+        needed = _HEADER.size + len(payload)
+
+        with self._lock:
+            writing = self._generation + 1
+            _HEADER.pack_into(self._map, 0, _MAGIC, writing, len(payload))
+
+            if needed > len(self._map):
+                new_size = len(self._map)
+                while new_size < needed:
+                    new_size *= 2
+                os.ftruncate(self._fd, new_size)
+                self._remap()
+
+            self._map[_HEADER.size:needed] = payload
+            self._generation = writing + 1
+            _HEADER.pack_into(self._map, 0, _MAGIC, self._generation, len(payload))
+            self._map.flush()
+
+        return self._generation
+
+    def generation(self) -> int:
+        # cheap check so readers can decide whether it is worth reading the whole payload
+        if not self._open_for_read():
+            return 0
+
+        magic, generation, _ = _HEADER.unpack_from(self._map, 0)
+        return generation if magic == _MAGIC else 0
+
+    def read(self) -> Optional[Tuple[int, List[dict]]]:
+        if not self._open_for_read():
+            return None
+
+        for _ in range(_READ_ATTEMPTS):
+            magic, generation, length = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC or generation == 0:
+                return None
+
+            if generation & 1:  # publisher is mid write
+                time.sleep(0)
+                continue
+
+            if _HEADER.size + length > len(self._map):  # publisher grew the file since we mapped it
+                self._remap()
+                continue
+
+            payload = self._map[_HEADER.size:_HEADER.size + length]
+
+            if _HEADER.unpack_from(self._map, 0)[1] == generation:
+                return generation, json.loads(payload.decode('utf-8'))
+
+        log.debug("featurehub unable to get a consistent read of %s", self._path)
+        return None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedMemoryPublishingRepository(FeatureHubRepository):
+    # use this as the repository of the config in the one process that talks to FeatureHub, every time the
+    # edge service gives us new data we publish the whole of the repository for the workers to pick up
+    _snapshot: SharedFeatureSnapshot
+    _pid: int
+    _warned: bool
+
+    def __init__(self, path: str, apply_features: Optional[ApplyFeature] = None):
+        super().__init__(apply_features)
+        self._snapshot = SharedFeatureSnapshot(path, writable=True)
+        self._pid = os.getpid()
+        self._warned = False
+
+    def notify(self, status: str, data: Optional):
+        super().notify(status, data)
+
+        if data is not None and status in ('features', 'feature', 'delete_feature'):
+            # a forked child has its own copy of the generation and no share of the lock, if it published too readers
+            # could see two writers claim the same generation
+            if os.getpid() != self._pid:
+                if not self._warned:
+                    self._warned = True
+                    log.warning("featurehub only publishes features from the process that created the repository (%s), "
+                                "not %s", self._pid, os.getpid())
+                return
+
+            self._snapshot.publish(self.extract_feature_state())
+
+    @property
+    def snapshot(self) -> SharedFeatureSnapshot:
+        return self._snapshot
+
+    def close(self):
+        self._snapshot.close()
+
+
+class SharedMemoryEdgeService(EdgeService):
+    # the edge service the workers use, it never talks to FeatureHub, it just watches the generation of the
+    # shared snapshot and reloads the repository when it changes
+    _snapshot: SharedFeatureSnapshot
+    _repository: InternalFeatureRepository
+    _interval: float
+    _client_eval: bool
+    _generation: int
+    _keys: Set[str]
+    _cancel: bool
+    _thread: Optional[threading.Timer]
+
+    def __init__(self, path: str, api_keys: List[str],
+                 repository: InternalFeatureRepository,
+                 interval: float = 1.0):
+        self._snapshot = SharedFeatureSnapshot(path)
+        self._repository = repository
+        self._interval = interval
+        self._client_eval = '*' in api_keys[0]
+        self._generation = 0
+        self._keys = set()
+        self._cancel = False
+        self._thread = None
+
+    def check_for_updates(self) -> bool:
+        if self._snapshot.generation() == self._generation:
+            return False
+
+        found = self._snapshot.read()
+        if found is None:
+            return False
+
+        generation, features = found
+        keys = set(feature['key'] for feature in features if feature and feature.get('key'))
+
+        # the snapshot is always the whole repository, so anything we had last time that has gone was deleted
+        for key in self._keys - keys:
+            self._repository.notify('delete_feature', {'key': key})
+
+        self._repository.notify('features', features)
+        self._generation = generation
+        self._keys = keys
+        return True
+
+    def _check_with_interval(self):
+        if self._cancel:
+            return
+
+        self.check_for_updates()
+
+        if self._interval > 0:
+            self._thread = threading.Timer(self._interval, self._check_with_interval)
+            self._thread.daemon = True
+            self._thread.start()
+
+    async def poll(self):
+        self.poll_sync()
+
+    def poll_sync(self):
+        if self._thread is None or self._cancel:
+            self._cancel = False
+            self._check_with_interval()
+        else:
+            self.check_for_updates()
+
+    def client_evaluated(self):
+        return self._client_eval
+
+    def close(self):
+        self._cancel = True
+        if self._thread is not None:
+            self._thread.cancel()
+            self._thread = None
+        self._snapshot.close()
+
+    # not supported, the snapshot is the same for every worker
+    async def context_change(self, header: str):
+        pass
+
+    def context_change_sync(self, header: str):
+        pass
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def cancelled(self):
+        return self._cancel
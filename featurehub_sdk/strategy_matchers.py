@@ -1,30 +1,66 @@
 import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Callable
 import re
 
-from semver import cmp
 import math
 from murmurhash2 import murmurhash3
-from ipaddress import ip_address, ip_network
+from ipaddress import ip_network
 
 from featurehub_sdk.client_context import ClientContext, RolloutStrategyAttributeConditional, \
-    RolloutStrategyFieldType, RolloutStrategy, RolloutStrategyAttribute, Applied
+    RolloutStrategyFieldType, RolloutStrategy, RolloutStrategyAttribute, Applied, AttributeValue
 
 
 class PercentageCalculator:
     def determine_client_percentage(self, percentage_text: str, feature_id: str) -> float:
         pass
 
+    # the percentages of many keys against the same feature, used by batch evaluation
+    def determine_client_percentages(self, percentage_texts: List[str], feature_id: str) -> List[float]:
+        return [self.determine_client_percentage(text, feature_id) for text in percentage_texts]
+
 
 class Murmur3PercentageCalculator(PercentageCalculator):
     MAX_PERCENTAGE = 1000000
     SEED = 0
+    _DIVISOR = math.pow(2, 32)
+    _MAX_FEATURE_IDS = 10000
 
-    def determine_client_percentage(self, percentage_text: str, feature_id: str) -> float:
-        result = murmurhash3(bytes(percentage_text + feature_id, 'utf-8'), Murmur3PercentageCalculator.SEED)
-        return math.floor(result / math.pow(2, 32) * Murmur3PercentageCalculator.MAX_PERCENTAGE)
+    # the encoded feature ids, and the last percentage key we encoded. a context is normally evaluated for many
+    # features in a row, so that saves encoding the same key over and over
+    _feature_ids: Dict[str, bytes]
+    _last_key: Tuple[Optional[str], bytes]
 
+    def __init__(self):
+        self._feature_ids = {}
+        self._last_key = (None, b'')
 
+    def determine_client_percentage(self, percentage_text: str, feature_id: str) -> float:
+        last_text, key_bytes = self._last_key
+        if last_text != percentage_text:
+            key_bytes = percentage_text.encode('utf-8')
+            self._last_key = (percentage_text, key_bytes)
+
+        feature_bytes = self._feature_ids.get(feature_id)
+        if feature_bytes is None:
+            if len(self._feature_ids) >= Murmur3PercentageCalculator._MAX_FEATURE_IDS:
+                self._feature_ids = {}
+            feature_bytes = self._feature_ids[feature_id] = feature_id.encode('utf-8')
+
+        result = murmurhash3(key_bytes + feature_bytes, Murmur3PercentageCalculator.SEED)
+        return math.floor(result / Murmur3PercentageCalculator._DIVISOR * Murmur3PercentageCalculator.MAX_PERCENTAGE)
+
+    def determine_client_percentages(self, percentage_texts: List[str], feature_id: str) -> List[float]:
+        # exactly the same arithmetic as above (so the same rounding), just without the lookups on every key
+        seed = Murmur3PercentageCalculator.SEED
+        max_percentage = Murmur3PercentageCalculator.MAX_PERCENTAGE
+        divisor = math.pow(2, 32)
+        floor = math.floor
+        return [floor(murmurhash3((text + feature_id).encode('utf-8'), seed) / divisor * max_percentage)
+                for text in percentage_texts]
+
+
+# the supplied value is an AttributeValue when it comes from a context, which is a str that has already worked out
+# its other forms, but can be any plain string
 class StrategyMatcher:
     def match(self, supplied_value: str, attr: RolloutStrategyAttribute) -> bool:
         pass
@@ -42,7 +78,7 @@ class FallthroughMatcher(StrategyMatcher):
 
 class BooleanMatcher(StrategyMatcher):
     def match(self, supplied_value: str, attr: RolloutStrategyAttribute) -> bool:
-        val = 'true' == supplied_value.lower()
+        val = 'true' == AttributeValue.of(supplied_value).lowercase
 
         if attr.conditional == RolloutStrategyAttributeConditional.Equals:
             return val == (str(attr.values[0]).lower() == 'true')
@@ -55,6 +91,7 @@ class BooleanMatcher(StrategyMatcher):
 
 class StringMatcher(StrategyMatcher):
     def match(self, supplied_value: str, attr: RolloutStrategyAttribute) -> bool:
+        supplied_value = AttributeValue.of(supplied_value)
         vals = attr.str_values
 
         # match was only introduced in python 3.10 so...
@@ -89,9 +126,12 @@ class StringMatcher(StrategyMatcher):
 
 class NumberMatcher(StrategyMatcher):
     def match(self, supplied_value: str, attr: RolloutStrategyAttribute) -> bool:
-        try:
-            parsed_val = float(supplied_value)
+        supplied_value = AttributeValue.of(supplied_value)
+        parsed_val = supplied_value.number
+        if parsed_val is None:
+            return False
 
+        try:
             # these we treat as strings
             if attr.conditional == RolloutStrategyAttributeConditional.EndsWith:
                 return next(filter(lambda x: supplied_value.endswith(x), attr.str_values), None) is not None
@@ -125,35 +165,38 @@ class NumberMatcher(StrategyMatcher):
 
 class SemanticVersionMatcher(StrategyMatcher):
     def match(self, supplied_value: str, attr: RolloutStrategyAttribute) -> bool:
+        # parsed (once) by the first comparison, so a value that is never compared can't fail
+        value = AttributeValue.of(supplied_value)
         vals = attr.str_values
 
         if attr.conditional == RolloutStrategyAttributeConditional.Includes \
                 or attr.conditional == RolloutStrategyAttributeConditional.Equals:
-            return next(filter(lambda x: cmp(supplied_value, "==", x, True), vals), None) is not None
+            return next(filter(lambda x: value.version.compare(x) == 0, vals), None) is not None
         elif attr.conditional == RolloutStrategyAttributeConditional.Excludes \
                 or attr.conditional == RolloutStrategyAttributeConditional.NotEquals:
-            return next(filter(lambda x: cmp(supplied_value, "==", x, True), vals), None) is None
+            return next(filter(lambda x: value.version.compare(x) == 0, vals), None) is None
         elif attr.conditional == RolloutStrategyAttributeConditional.Greater:
-            return next(filter(lambda x: cmp(supplied_value, ">", x, True), vals), None) is not None
+            return next(filter(lambda x: value.version.compare(x) > 0, vals), None) is not None
         elif attr.conditional == RolloutStrategyAttributeConditional.GreaterEquals:
-            return next(filter(lambda x: cmp(supplied_value, ">=", x, True), vals), None) is not None
+            return next(filter(lambda x: value.version.compare(x) >= 0, vals), None) is not None
         elif attr.conditional == RolloutStrategyAttributeConditional.Less:
-            return next(filter(lambda x: cmp(supplied_value, "<", x, True), vals), None) is not None
+            return next(filter(lambda x: value.version.compare(x) < 0, vals), None) is not None
         elif attr.conditional == RolloutStrategyAttributeConditional.LessEquals:
-            return next(filter(lambda x: cmp(supplied_value, "<=", x, True), vals), None) is not None
+            return next(filter(lambda x: value.version.compare(x) <= 0, vals), None) is not None
 
         return False
 
 
 class IPNetworkMatcher(StrategyMatcher):
     def match(self, supplied_value: str, attr: RolloutStrategyAttribute) -> bool:
+        value = AttributeValue.of(supplied_value)
 
         if attr.conditional == RolloutStrategyAttributeConditional.Includes \
                 or attr.conditional == RolloutStrategyAttributeConditional.Equals:
-            return next(filter(lambda x: ip_address(supplied_value) in ip_network(x), attr.values), None) is not None
+            return next(filter(lambda x: value.ip in ip_network(x), attr.values), None) is not None
         elif attr.conditional == RolloutStrategyAttributeConditional.Excludes \
                 or attr.conditional == RolloutStrategyAttributeConditional.NotEquals:
-            return next(filter(lambda x: ip_address(supplied_value) in ip_network(x), attr.values), None) is None
+            return next(filter(lambda x: value.ip in ip_network(x), attr.values), None) is None
 
         return False
 
@@ -183,18 +226,54 @@ class MatcherRegistry(MatcherRepository):
 class ApplyFeature:
     _percentageCalculator: PercentageCalculator
     _matcherRepository: MatcherRepository
+    _clock: Callable[[], datetime.datetime]
 
+    # clock gives the (naive, utc) time that 'now' conditions are compared against
     def __init__(self, percentage_calculator: Optional[PercentageCalculator] = None,
-                 matcher_repository: Optional[MatcherRepository] = None):
+                 matcher_repository: Optional[MatcherRepository] = None,
+                 clock: Optional[Callable[[], datetime.datetime]] = None):
         self._percentageCalculator = percentage_calculator if percentage_calculator is not None \
             else Murmur3PercentageCalculator()
         self._matcherRepository = matcher_repository if matcher_repository is not None else MatcherRegistry()
+        self._clock = clock if clock is not None else datetime.datetime.utcnow
+
+    @property
+    def percentage_calculator(self) -> PercentageCalculator:
+        return self._percentageCalculator
+
+    @property
+    def matcher_repository(self) -> MatcherRepository:
+        return self._matcherRepository
+
+    @property
+    def clock(self) -> Callable[[], datetime.datetime]:
+        return self._clock
 
     def apply(self, strategies: List[RolloutStrategy], key: str, feature_value_id: str,
               context: ClientContext) -> Applied:
         if context is None or strategies is None or len(strategies) == 0:
             return Applied(False, None)
 
+        now = None
+        for rsi in strategies:
+            if rsi.time_attributes:
+                now = self._clock()
+                break
+
+        applied = self._apply(strategies, feature_value_id, context, now)
+        if now is None:
+            return applied
+
+        # a result that depends on the time only holds until the time passes one of the conditions' values
+        valid_until = self.next_time_boundary(strategies, context, now, applied.strategy)
+        if valid_until is None:
+            return applied
+
+        return Applied(applied.matched, applied.value, applied.strategy, (valid_until - now).total_seconds())
+
+    def _apply(self, strategies: List[RolloutStrategy], feature_value_id: str, context: ClientContext,
+               now: Optional[datetime.datetime]) -> Applied:
+
         percentage: Optional[float] = None
         percentage_key: Optional[str] = None
         base_percentage: Dict[str, float] = {}
@@ -219,44 +298,96 @@ class ApplyFeature:
 
                     # if the percentage is lower than the user's key/feature-id then apply it
                     if percentage <= (use_base_percentage + rsi.percentage):
-                        if (not rsi.has_attributes) or (rsi.has_attributes and self.match_attribute(context, rsi)):
-                            return Applied(True, rsi.value)
+                        if (not rsi.has_attributes) or (rsi.has_attributes and self.match_attribute(context, rsi, now)):
+                            return Applied(True, rsi.value, rsi)
 
                     if not rsi.has_attributes:
                         base_percentage[percentage_key] = base_percentage.get(percentage_key) + rsi.percentage
 
-            if rsi.percentage == 0 and rsi.has_attributes and self.match_attribute(context, rsi):
-                return Applied(True, rsi.value)
+            if rsi.percentage == 0 and rsi.has_attributes and self.match_attribute(context, rsi, now):
+                return Applied(True, rsi.value, rsi)
 
         return Applied(False, None)
 
-    def match_attribute(self, context: ClientContext, rs: RolloutStrategy) -> bool:
-        for attr in rs.attributes:
-            supplied_value = context.get_attr(attr.field_name)
-            if supplied_value is None and attr.field_name.lower() == 'now':
-                if attr.field_type == RolloutStrategyFieldType.Date:
-                    supplied_value = datetime.datetime.utcnow().isoformat()[0:10]
-                elif attr.field_type == RolloutStrategyFieldType.Datetime:
-                    supplied_value = datetime.datetime.utcnow().isoformat()
+    # the first instant at which matching these strategies (up to the one that matched) could come out differently
+    @staticmethod
+    def next_time_boundary(strategies: List[RolloutStrategy], context: ClientContext, now: datetime.datetime,
+                           matched: Optional[RolloutStrategy] = None) -> Optional[datetime.datetime]:
+        valid_until = None
+
+        for rsi in strategies:
+            for attr in rsi.time_attributes:
+                # the context gave its own time, which doesn't move
+                if context.get_attr(attr.field_name) is not None:
+                    continue
 
-            if attr.values is None and supplied_value is None:
-                if attr.conditional != RolloutStrategyAttributeConditional.Equals:
-                    return False
+                boundary = attr.next_time_boundary(now)
+                if boundary is not None and (valid_until is None or boundary < valid_until):
+                    valid_until = boundary
 
-                continue  # skip this loop
+            if rsi is matched:
+                break
 
-            if attr.values is None or supplied_value is None:
-                return False
+        return valid_until
 
-            if not self._matcherRepository.find_matcher(attr).match(supplied_value, attr):
+    def match_attribute(self, context: ClientContext, rs: RolloutStrategy,
+                        now: Optional[datetime.datetime] = None) -> bool:
+        # conditions shared between features are only checked once for a context
+        results = context.condition_results
+
+        for attr in rs.attributes:
+            if attr.time_based:
+                matched = self._match_time_condition(context, attr, results, now)
+            else:
+                matched = results.get(attr)
+                if matched is None:
+                    matched = results[attr] = self.match_condition(context, attr)
+
+            if not matched:
                 return False
 
         return True
 
+    # a condition on the time is remembered (as the result and when it stops holding) until the time passes one of
+    # its values
+    def _match_time_condition(self, context: ClientContext, attr: RolloutStrategyAttribute, results: dict,
+                              now: Optional[datetime.datetime]) -> bool:
+        if now is None:
+            now = self._clock()
+
+        found = results.get(attr)
+        if found is not None and (found[1] is None or now < found[1]):
+            return found[0]
+
+        matched = self.match_condition(context, attr, now)
+        boundary = attr.next_time_boundary(now) if context.get_attr(attr.field_name) is None else None
+        if boundary is None or boundary > now:
+            results[attr] = (matched, boundary)
+
+        return matched
+
+    def match_condition(self, context: ClientContext, attr: RolloutStrategyAttribute,
+                        now: Optional[datetime.datetime] = None) -> bool:
+        supplied_value = context.get_attr_value(attr.field_name)
+        if supplied_value is None and attr.field_name.lower() == 'now':
+            if now is None:
+                now = self._clock()
+            if attr.field_type == RolloutStrategyFieldType.Date:
+                supplied_value = AttributeValue(now.isoformat()[0:10])
+            elif attr.field_type == RolloutStrategyFieldType.Datetime:
+                supplied_value = AttributeValue(now.isoformat())
+
+        if attr.values is None and supplied_value is None:
+            return attr.conditional == RolloutStrategyAttributeConditional.Equals
+
+        if attr.values is None or supplied_value is None:
+            return False
+
+        return bool(self._matcherRepository.find_matcher(attr).match(supplied_value, attr))
+
     @staticmethod
     def determine_percentage_key(context: ClientContext, rs: RolloutStrategy) -> str:
         if not rs.has_percentage_attributes:
             return context.default_percentage_key
 
-        return "$".join(list(map(lambda x:
-                                 str(context.get_attr(x, '<none>')), rs.percentage_attributes)))
+        return context.percentage_key(rs.percentage_attributes)
@@ -7,6 +7,7 @@ import json
 import threading
 import logging
 import sys
+import time
 
 from featurehub_sdk.client_context import InternalFeatureRepository
 from featurehub_sdk.edge_service import EdgeService
@@ -40,13 +41,21 @@ class _StreamingThread(threading.Thread):
                 log.debug("featurehub starting request: %s", self._url)
                 if last_event_id is not None:
                     headers['Last-Event-Id'] = last_event_id
+                sink = self._repository.instrumentation
+                start = time.perf_counter() if sink is not None else 0
                 resp = self._http.request('GET', self._url, preload_content=False, headers=headers)
+                if sink is not None:
+                    sink.edge_request('streaming', resp.status, time.perf_counter() - start, 0)
+
                 if resp.status == 200:
                     self._client = sseclient.SSEClient(resp)
                     for event in self._client.events():
                         last_event_id = event.id
                         log.debug("received data %s: %s", event.event, event.data)
 
+                        if sink is not None:
+                            sink.edge_event('streaming', event.event, len(event.data) if event.data else 0)
+
                         if event.event == 'config':
                             self._process_config(event.data)
                         else:
@@ -96,6 +105,9 @@ class StreamingEdgeClient(EdgeService):
         self._client_evaluated = '*' in api_keys[0]
 
     async def poll(self):
+        self.poll_sync()
+
+    def poll_sync(self):
         if self._streaming_thread.is_alive():
             return
 
@@ -105,6 +117,10 @@ class StreamingEdgeClient(EdgeService):
         if self._streaming_thread.is_alive():
             self._streaming_thread.close()
 
+    # the stream is for the api keys, not a context
+    def context_change_sync(self, header: str):
+        pass
+
     def client_evaluated(self):
         return self._client_evaluated
 
@@ -0,0 +1,379 @@
+from typing import Optional, List, Set, Dict, AsyncIterator, Tuple
+
+import asyncio
+import json
+import logging
+import os
+import ssl
+import threading
+import time
+import urllib.parse
+
+from featurehub_sdk.client_context import InternalFeatureRepository
+from featurehub_sdk.edge_service import EdgeService
+from featurehub_sdk.version import sdk_version
+
+log = logging.getLogger('featurehub_sdk')
+
+# the streaming edge client holds a thread per stream, blocked reading it. a process following many environments
+# (every api key of a config, and every config in the process) would need as many threads, so this follows any
+# number of streams on one thread instead: an asyncio event loop doing non-blocking reads on all of the connections,
+# and handing each event to the repository of the stream it arrived on.
+#
+#   config.use_multiplexed_streaming_edge_service()
+#
+# uses the multiplexer shared by the whole process, or pass one in to keep a set of configs on a thread of their own.
+# the events are applied to the repositories on that thread, so a slow listener holds up every stream behind it.
+
+
+class MultiplexedStream:
+    _edge_url: str
+    _api_key: str
+    _repository: InternalFeatureRepository
+    _last_event_id: Optional[str]
+    _cancel: bool
+    _stopped: bool
+    _task: Optional[asyncio.Task]
+
+    def __init__(self, edge_url: str, api_key: str, repository: InternalFeatureRepository):
+        self._edge_url = edge_url
+        self._api_key = api_key
+        self._repository = repository
+        self._last_event_id = None
+        self._cancel = False
+        self._stopped = False
+        self._task = None
+
+    @property
+    def url(self) -> str:
+        return f"{self._edge_url}features/{self._api_key}"
+
+    @property
+    def api_key(self) -> str:
+        return self._api_key
+
+    @property
+    def repository(self) -> InternalFeatureRepository:
+        return self._repository
+
+    # the key doesn't exist, or we were removed
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel
+
+    # the environment is stale, edge has told us to stop asking for it
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    def __repr__(self):
+        return f"MultiplexedStream({self.url})"
+
+
+class StreamingMultiplexer:
+    _lock: threading.Lock
+    _streams: Set[MultiplexedStream]
+    _loop: Optional[asyncio.AbstractEventLoop]
+    _thread: Optional[threading.Thread]
+    _pid: int
+    _reconnect_delay: float
+    _max_reconnect_delay: float
+    _ssl_context: Optional[ssl.SSLContext]
+
+    _shared: Optional["StreamingMultiplexer"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, reconnect_delay: float = 1, max_reconnect_delay: float = 60,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        self._lock = threading.Lock()
+        self._streams = set()
+        self._loop = None
+        self._thread = None
+        self._pid = os.getpid()
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._ssl_context = ssl_context
+
+    # the one the whole process shares unless it is given another
+    @staticmethod
+    def shared() -> "StreamingMultiplexer":
+        with StreamingMultiplexer._shared_lock:
+            if StreamingMultiplexer._shared is None:
+                StreamingMultiplexer._shared = StreamingMultiplexer()
+            return StreamingMultiplexer._shared
+
+    # starts following the stream for this api key, sending what arrives to the repository. it can be called from
+    # any thread, the connection is made on the multiplexer's own
+    def add(self, edge_url: str, api_key: str, repository: InternalFeatureRepository) -> MultiplexedStream:
+        stream = MultiplexedStream(edge_url, api_key, repository)
+        with self._lock:
+            loop = self._running_loop()
+            self._streams.add(stream)
+            loop.call_soon_threadsafe(self._start, stream)
+        return stream
+
+    def remove(self, stream: MultiplexedStream):
+        with self._lock:
+            stream._cancel = True
+            self._streams.discard(stream)
+            if self._loop is not None and self._pid == os.getpid():
+                self._loop.call_soon_threadsafe(self._stop, stream)
+
+    @property
+    def streams(self) -> List[MultiplexedStream]:
+        with self._lock:
+            return list(self._streams)
+
+    # stops every stream and the thread, adding a stream afterwards starts a new one
+    def close(self, timeout: float = 5):
+        with self._lock:
+            for stream in self._streams:
+                stream._cancel = True
+            self._streams.clear()
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None or self._pid != os.getpid():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception as err:  # the loop will still be stopped
+            log.debug("featurehub streams didn't shut down cleanly: %s", err)
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+    # must hold the lock
+    def _running_loop(self) -> asyncio.AbstractEventLoop:
+        if self._pid != os.getpid():
+            # the thread didn't survive a fork, and the loop's wake up pipe is shared with the parent, so leave it be.
+            # the streams are the parent's too, the configs in this process restart their own
+            self._pid = os.getpid()
+            self._loop = None
+            self._thread = None
+            self._streams = set()
+
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(self._loop,), daemon=True,
+                                            name="featurehub-streams")
+            self._thread.start()
+
+        return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    # everything from here on runs on the multiplexer's thread
+
+    def _start(self, stream: MultiplexedStream):
+        if not stream._cancel:
+            stream._task = asyncio.get_running_loop().create_task(self._follow(stream))
+
+    @staticmethod
+    def _stop(stream: MultiplexedStream):
+        if stream._task is not None:
+            stream._task.cancel()
+
+    async def _shutdown(self):
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _follow(self, stream: MultiplexedStream):
+        delay = self._reconnect_delay
+        while not stream._cancel and not stream._stopped:
+            try:
+                if await self._read_stream(stream):
+                    delay = self._reconnect_delay
+            except (OSError, ValueError, asyncio.IncompleteReadError) as err:
+                log.error("failed to communicate with featurehub: %s", err)
+
+            if stream._cancel or stream._stopped:
+                break
+
+            # one environment failing doesn't become a storm of reconnects for all of them
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    # follows the stream until the connection ends, returning whether any events arrived
+    async def _read_stream(self, stream: MultiplexedStream) -> bool:
+        url = urllib.parse.urlsplit(stream.url)
+        secure = url.scheme == 'https'
+        port = url.port or (443 if secure else 80)
+        ssl_context = (self._ssl_context or ssl.create_default_context()) if secure else None
+
+        log.debug("featurehub starting request: %s", stream.url)
+        sink = stream.repository.instrumentation
+        start = time.perf_counter() if sink is not None else 0
+        reader, writer = await asyncio.open_connection(url.hostname, port, ssl=ssl_context)
+        try:
+            request = [f"GET {url.path or '/'}{'?' + url.query if url.query else ''} HTTP/1.1",
+                       f"Host: {url.netloc}", 'Accept: text/event-stream', 'Cache-Control: no-cache',
+                       'X-SDK: Python', f"X-SDK-Version: {sdk_version}"]
+            if stream._last_event_id is not None:
+                request.append(f"Last-Event-Id: {stream._last_event_id}")
+            writer.write(('\r\n'.join(request) + '\r\n\r\n').encode('utf-8'))
+            await writer.drain()
+
+            status, headers = await self._read_headers(reader)
+            if sink is not None:
+                sink.edge_request('streaming', status, time.perf_counter() - start, 0)
+
+            if status == 404:
+                log.error("key provided for featurehub is invalid")
+                stream._cancel = True
+                stream.repository.notify('failed', None)
+                return False
+            if status != 200:
+                log.error("featurehub stream %s failed with status %s", stream.url, status)
+                return False
+
+            received = False
+            chunked = 'chunked' in headers.get('transfer-encoding', '').lower()
+            async for event, data, event_id in self._events(self._body(reader, chunked)):
+                received = True
+                self._dispatch(stream, event, data, event_id)
+                if stream._cancel or stream._stopped:
+                    break
+
+            return received
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        status_line = (await reader.readline()).decode('latin-1').split(None, 2)
+        if len(status_line) < 2 or not status_line[0].startswith('HTTP/'):
+            raise ValueError(f"not an http response: {status_line}")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        return int(status_line[1]), headers
+
+    @staticmethod
+    async def _body(reader: asyncio.StreamReader, chunked: bool) -> AsyncIterator[bytes]:
+        if not chunked:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                yield data
+
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                return
+            data = await reader.readexactly(size)
+            await reader.readexactly(2)  # the chunk's trailing crlf
+            yield data
+
+    # the server sent events in the body, as (event, data, id)
+    @staticmethod
+    async def _events(body: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        pending = b''
+        event, data, event_id = None, [], None
+        async for block in body:
+            pending += block
+            *lines, pending = pending.split(b'\n')
+            for raw in lines:
+                line = raw.rstrip(b'\r').decode('utf-8')
+                if not line:
+                    if data or event:
+                        yield event or 'message', '\n'.join(data), event_id
+                    event, data = None, []
+                    continue
+
+                if line.startswith(':'):  # a comment, e.g. to keep the connection open
+                    continue
+
+                name, _, value = line.partition(':')
+                value = value[1:] if value.startswith(' ') else value
+                if name == 'event':
+                    event = value
+                elif name == 'data':
+                    data.append(value)
+                elif name == 'id':
+                    event_id = value
+
+    @staticmethod
+    def _dispatch(stream: MultiplexedStream, event: str, data: str, event_id: Optional[str]):
+        stream._last_event_id = event_id
+        log.debug("received data %s: %s", event, data)
+
+        sink = stream.repository.instrumentation
+        if sink is not None:
+            sink.edge_event('streaming', event, len(data) if data else 0)
+
+        if event == 'config':
+            if json.loads(data).get('edge.stale') is not None:
+                log.warning("environment is stale, stopped requesting updates")
+                stream._stopped = True
+        elif data and (data.startswith('{') or data.startswith('[')):
+            stream.repository.notify(event, json.loads(data))
+        else:
+            stream.repository.notify(event, data)
+
+
+# an edge service that follows a stream for each of the config's api keys on a multiplexer
+class MultiplexedStreamingEdgeClient(EdgeService):
+    _edge_url: str
+    _api_keys: List[str]
+    _repository: InternalFeatureRepository
+    _multiplexer: StreamingMultiplexer
+    _streams: List[MultiplexedStream]
+    _client_evaluated: bool
+
+    def __init__(self, edge_url: str, api_keys: List[str], repository: InternalFeatureRepository,
+                 multiplexer: Optional[StreamingMultiplexer] = None):
+        self._edge_url = edge_url
+        self._api_keys = api_keys
+        self._repository = repository
+        self._multiplexer = multiplexer if multiplexer is not None else StreamingMultiplexer.shared()
+        self._streams = []
+        self._client_evaluated = '*' in api_keys[0]
+
+    async def poll(self):
+        self.poll_sync()
+
+    def poll_sync(self):
+        if self._streams:
+            return
+
+        self._streams = [self._multiplexer.add(self._edge_url, key, self._repository) for key in self._api_keys]
+
+    def close(self):
+        for stream in self._streams:
+            self._multiplexer.remove(stream)
+        self._streams = []
+
+    # the streams are for the api keys, not a context
+    async def context_change(self, header: str):
+        pass
+
+    def context_change_sync(self, header: str):
+        pass
+
+    def client_evaluated(self):
+        return self._client_evaluated
+
+    @property
+    def streams(self) -> List[MultiplexedStream]:
+        return list(self._streams)
+
+    @property
+    def stopped(self):
+        return bool(self._streams) and all(stream.stopped for stream in self._streams)
@@ -0,0 +1,16 @@
+# feature states as the edge sends them, shared by the tests
+
+
+def feature(key: str, version: int, value) -> dict:
+    return {'id': key + '-id', 'key': key, 'l': False, 'version': version, 'type': 'BOOLEAN', 'value': value,
+            'strategies': []}
+
+
+def colour(version: int, value: str = 'orange', nz_value: str = 'green') -> dict:
+    return {'id': '1', 'key': 'COLOUR', 'l': False, 'version': version, 'type': 'STRING', 'value': value,
+            'strategies': [{'id': 'nz', 'value': nz_value, 'attributes': [
+                {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]}]}
+
+
+def flag(value: bool = True) -> dict:
+    return {'id': '2', 'key': 'FLAG', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': value}
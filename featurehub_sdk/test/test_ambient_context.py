@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock, AsyncMock
+
+from featurehub_sdk import ambient_context
+from featurehub_sdk.ambient_context import use_context, FeatureHubWSGIMiddleware, FeatureHubASGIMiddleware
+from featurehub_sdk.featurehub_config import FeatureHubConfig
+from featurehub_sdk.interceptors import InterceptorValue
+from featurehub_sdk.local_edge import LocalEdgeServer
+from featurehub_sdk.strategy_matchers import ApplyFeature
+from featurehub_sdk.test.features import colour
+
+
+def run(coroutine):
+    # not asyncio.run, which leaves the main thread without an event loop for the tests that follow
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class AmbientContextTest(TestCase):
+    def setUp(self) -> None:
+        self.edge = MagicMock()
+        self.edge.poll = AsyncMock()
+        self.config = FeatureHubConfig('http://localhost', ['123*abc'], edge_provider=lambda *args: self.edge)
+        self.repo = self.config.repository()
+        self.repo.notify('features', [colour(1), {'id': '2', 'key': 'FLAG', 'l': False, 'version': 1,
+                                                  'type': 'BOOLEAN', 'value': True}])
+        self.apply = MagicMock(side_effect=ApplyFeature().apply)
+        self.repo._strategy_matcher.apply = self.apply
+
+    def test_no_context_outside_a_request(self):
+        self.assertIsNone(ambient_context.current_context())
+        with self.assertRaises(LookupError):
+            ambient_context.get_flag('FLAG')
+
+    def test_values_are_evaluated_once_per_request(self):
+        ctx = self.config.new_context().country('new_zealand')
+
+        with use_context(ctx) as scope:
+            self.assertIs(ambient_context.current_context(), ctx)
+            for _ in range(3):
+                self.assertEqual(ambient_context.get_string('COLOUR'), 'green')
+            self.assertEqual(self.apply.call_count, 1)
+            self.assertTrue(ambient_context.get_flag('FLAG'))
+            self.assertTrue(ambient_context.is_enabled('FLAG'))
+            self.assertFalse(ambient_context.is_set('MISSING'))
+            self.assertIs(scope, ambient_context.current_scope())
+
+            # a change of attribute or a new version of the feature is seen straight away
+            ctx.country('australia')
+            self.assertEqual(ambient_context.get_string('COLOUR'), 'orange')
+            self.repo.notify('feature', colour(2, 'purple'))
+            self.assertEqual(ambient_context.get_string('COLOUR'), 'purple')
+
+        self.assertIsNone(ambient_context.current_context())
+
+    def test_interceptors_are_not_remembered(self):
+        interceptor = MagicMock()
+        interceptor.intercepted_value.return_value = None
+
+        with use_context(self.config.new_context().country('new_zealand')):
+            self.assertEqual(ambient_context.get_string('COLOUR'), 'green')
+
+            self.repo.register_interceptor(interceptor)
+            interceptor.intercepted_value.return_value = InterceptorValue('pink')
+            self.assertEqual(ambient_context.get_string('COLOUR'), 'pink')
+
+            interceptor.intercepted_value.return_value = None
+            self.assertEqual(ambient_context.get_string('COLOUR'), 'green')
+
+    def test_each_task_and_thread_sees_its_own_request(self):
+        async def request(country: str):
+            with use_context(self.config.new_context().country(country)):
+                await asyncio.sleep(0)
+                return await asyncio.create_task(self.read_colour())
+
+        async def both():
+            return await asyncio.gather(request('new_zealand'), request('australia'))
+
+        self.assertEqual(run(both()), ['green', 'orange'])
+
+        seen = []
+        with use_context(self.config.new_context().country('new_zealand')):
+            thread = threading.Thread(target=lambda: seen.append(ambient_context.current_context()))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [None])
+
+    async def read_colour(self):
+        return ambient_context.get_string('COLOUR')
+
+    def test_wsgi_middleware(self):
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return [ambient_context.get_string('COLOUR').encode('utf-8')]
+
+        middleware = FeatureHubWSGIMiddleware(app, self.config,
+                                              lambda environ, ctx: ctx.country(environ['HTTP_X_COUNTRY']))
+        self.assertEqual(middleware({'HTTP_X_COUNTRY': 'new_zealand'}, MagicMock()), [b'green'])
+        self.assertEqual(middleware({'HTTP_X_COUNTRY': 'australia'}, MagicMock()), [b'orange'])
+        self.assertIsNone(ambient_context.current_context())
+
+    def test_asgi_middleware(self):
+        sent = []
+
+        async def app(scope, receive, send):
+            await send(ambient_context.get_string('COLOUR') if scope['type'] == 'http' else scope['type'])
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = FeatureHubASGIMiddleware(app, self.config,
+                                              lambda scope, ctx: ctx.country(dict(scope['headers'])[b'x-country']
+                                                                             .decode('utf-8')))
+
+        async def requests():
+            await middleware({'type': 'lifespan'}, AsyncMock(), send)
+            await asyncio.gather(middleware({'type': 'http', 'headers': [(b'x-country', b'new_zealand')]},
+                                            AsyncMock(), send),
+                                 middleware({'type': 'http', 'headers': [(b'x-country', b'australia')]},
+                                            AsyncMock(), send))
+
+        run(requests())
+        self.assertEqual(sent, ['lifespan', 'green', 'orange'])
+        self.edge.poll.assert_not_called()
+
+    def test_asgi_middleware_does_not_poll_per_request(self):
+        server = LocalEdgeServer({'environments': {'123*abc': {'features': [colour(1)]}}}).start()
+        config = FeatureHubConfig(server.url, ['123*abc'])
+        config.use_polling_edge_service(30)
+        try:
+            config.init_sync()
+            edge = config.get_or_create_edge_service()
+            edge._get_updates_sync = MagicMock(side_effect=edge._get_updates_sync)
+            threads = threading.active_count()
+
+            async def app(scope, receive, send):
+                await send(ambient_context.get_string('COLOUR'))
+
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            middleware = FeatureHubASGIMiddleware(app, config, lambda scope, ctx: ctx.country('new_zealand'))
+
+            async def requests():
+                for _ in range(5):
+                    await middleware({'type': 'http', 'headers': []}, AsyncMock(), send)
+
+            run(requests())
+            self.assertEqual(sent, ['green'] * 5)
+            edge._get_updates_sync.assert_not_called()
+            self.assertEqual(threading.active_count(), threads)
+        finally:
+            config.close()
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
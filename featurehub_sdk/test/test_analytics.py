@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from featurehub_sdk.analytics import AnalyticsCollector, AnalyticsExporter, FileAnalyticsExporter, \
+    HttpAnalyticsExporter
+from featurehub_sdk.client_context import ClientEvalFeatureContext
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+
+
+class AnalyticsCollectorTest(TestCase):
+    def setUp(self) -> None:
+        self.exporter = MagicMock(spec=AnalyticsExporter)
+        self.collector = AnalyticsCollector(self.exporter, start=False)
+
+    def counts(self, batch: dict) -> dict:
+        return {(c['feature'], c['value'], c['strategyId']): c['count'] for c in batch['counts']}
+
+    def test_counts_value_reads_from_repository(self):
+        repo = FeatureHubRepository()
+        repo.notify('features', [
+            {'id': '1', 'key': 'FLAG', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': True},
+            {'id': '2', 'key': 'COLOUR', 'l': False, 'version': 1, 'type': 'STRING', 'value': 'orange',
+             'strategies': [{'id': 'nz', 'value': 'green', 'attributes': [
+                 {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]}]}
+        ])
+        repo.register_analytics(self.collector)
+
+        self.assertTrue(repo.feature('FLAG').get_flag)
+        self.assertTrue(repo.feature('FLAG').get_flag)
+        nz = ClientEvalFeatureContext(repo, MagicMock()).attribute_values('country', ['new_zealand'])
+        au = ClientEvalFeatureContext(repo, MagicMock()).attribute_values('country', ['australia'])
+        self.assertEqual(nz.feature('COLOUR').get_string, 'green')
+        self.assertEqual(au.feature('COLOUR').get_string, 'orange')
+
+        batch = self.collector.flush()
+
+        self.assertEqual(self.counts(batch), {('FLAG', True, None): 2, ('COLOUR', 'green', 'nz'): 1,
+                                              ('COLOUR', 'orange', None): 1})
+        self.exporter.export.assert_called_once_with(batch)
+
+        repo.register_analytics(None)
+        repo.feature('FLAG').get_flag
+        self.assertIsNone(self.collector.flush())
+
+    def test_updates_are_not_reads(self):
+        repo = FeatureHubRepository()
+        flag = {'id': '1', 'key': 'FLAG', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': True}
+        repo.notify('features', [flag])
+        repo.register_analytics(self.collector)
+        repo.register_instrumentation(sink := MagicMock())
+
+        for _ in range(5):
+            repo.notify('features', [flag])
+            repo.notify('feature', flag)
+
+        self.assertIsNone(self.collector.flush())
+        sink.feature_evaluated.assert_not_called()
+
+    def test_only_exports_what_changed_since_last_flush(self):
+        self.collector.record('A', True, None)
+        self.collector.record('A', True, None)
+        self.assertEqual(self.counts(self.collector.flush()), {('A', True, None): 2})
+
+        self.assertIsNone(self.collector.flush())
+
+        self.collector.record('A', True, None)
+        self.collector.record('B', 'x', 's1')
+        batch = self.collector.flush()
+        self.assertEqual(self.counts(batch), {('A', True, None): 1, ('B', 'x', 's1'): 1})
+        self.assertLessEqual(batch['start'], batch['end'])
+        self.assertEqual(self.exporter.export.call_count, 2)
+
+    def test_aggregates_across_threads(self):
+        def reads():
+            for _ in range(1000):
+                self.collector.record('A', True, None)
+
+        threads = [threading.Thread(target=reads) for _ in range(4)]
+        for t in threads:
+            t.start()
+        self.collector.record('A', True, None)
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.counts(self.collector.flush()), {('A', True, None): 4001})
+        # the buffers of finished threads are dropped once they have been exported
+        self.assertEqual(len(self.collector._buffers), 1)
+
+    def test_exporter_failure_does_not_propagate(self):
+        self.exporter.export.side_effect = Exception('collector down')
+        self.collector.record('A', True, None)
+        self.assertIsNotNone(self.collector.flush())
+
+    def test_background_flush_and_close(self):
+        exported = threading.Event()
+        self.exporter.export.side_effect = lambda batch: exported.set()
+        collector = AnalyticsCollector(self.exporter, flush_interval=0.01)
+        collector.record('A', True, None)
+
+        self.assertTrue(exported.wait(5))
+        collector.record('A', False, None)
+        collector.close()
+
+        self.assertEqual(self.counts(self.exporter.export.call_args[0][0]), {('A', False, None): 1})
+        self.exporter.close.assert_called_once()
+
+    def test_forked_child_starts_again(self):
+        exported = threading.Event()
+        self.exporter.export.side_effect = lambda batch: exported.set()
+        collector = AnalyticsCollector(self.exporter, flush_interval=3600)
+        collector.record('A', True, None)
+        parent_thread = collector._thread
+
+        # what was counted before the fork is left to the parent
+        collector._after_fork_in_child()
+        self.assertIsNot(collector._thread, parent_thread)
+        self.assertTrue(collector._thread.is_alive())
+        collector.record('A', False, None)
+
+        self.assertEqual(self.counts(collector.flush()), {('A', False, None): 1})
+        collector.close()
+
+    def test_closed_collector_is_not_restarted_by_a_fork(self):
+        collector = AnalyticsCollector(self.exporter, flush_interval=3600)
+        collector.close()
+        collector._after_fork_in_child()
+        self.assertIsNone(collector._thread)
+
+    def test_collects_everything_a_finished_thread_counted(self):
+        thread = threading.Thread(target=lambda: self.collector.record('A', True, None))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(self.counts(self.collector.flush()), {('A', True, None): 1})
+        self.assertEqual(self.collector._buffers, [])
+
+
+class AnalyticsExporterTest(TestCase):
+    batch = {'sdk': 'python/test', 'start': 1.0, 'end': 2.0,
+             'counts': [{'feature': 'N', 'value': Decimal('1.5'), 'strategyId': None, 'count': 3}]}
+
+    def test_file_exporter_appends_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'analytics.ndjson')
+            exporter = FileAnalyticsExporter(path)
+            exporter.export(self.batch)
+            exporter.export(self.batch)
+
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]['counts'][0]['value'], '1.5')
+
+    def test_http_exporter_posts_batch(self):
+        with patch("urllib3.PoolManager") as http_class_mock:
+            http_class_mock.return_value.request.return_value = MagicMock(status=202)
+            HttpAnalyticsExporter('http://localhost:4000/analytics', {'Authorization': 'x'}).export(self.batch)
+
+            kwargs = http_class_mock.return_value.request.call_args.kwargs
+            self.assertEqual(kwargs['method'], 'POST')
+            self.assertEqual(kwargs['url'], 'http://localhost:4000/analytics')
+            self.assertEqual(kwargs['headers']['Authorization'], 'x')
+            self.assertEqual(json.loads(kwargs['body'])['counts'][0]['count'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,9 @@ from unittest.mock import MagicMock
 from featurehub_sdk.client_context import RolloutStrategy, ClientContext, RolloutStrategyAttribute, \
     RolloutStrategyAttributeConditional
 from featurehub_sdk.strategy_matchers import ApplyFeature, MatcherRepository, PercentageCalculator, StrategyMatcher, \
-    MatcherRegistry
+    MatcherRegistry, Murmur3PercentageCalculator
+from murmurhash2 import murmurhash3
+import math
 
 
 class ApplyFeatureTest(TestCase):
@@ -43,9 +45,10 @@ class ApplyFeatureTest(TestCase):
 
     def test_should_be_false_if_no_strategies_match_context(self):
         ctx = MagicMock()
+        ctx.condition_results = {}
         mock_default_percentage_key = 'userkey-value'
         ctx.default_percentage_key = mock_default_percentage_key
-        ctx.get_attr.return_value = None
+        ctx.get_attr_value.return_value = None
         found = self.apply.apply([RolloutStrategy({
             'attributes': [
                 {
@@ -59,12 +62,13 @@ class ApplyFeatureTest(TestCase):
 
         self.assertFalse(found.matched)
         self.assertIsNone(found.value)
-        ctx.get_attr.assert_called_once()
+        ctx.get_attr_value.assert_called_once()
 
     def test_should_not_match_percentage_and_should_match_field(self):
         ctx = MagicMock()
+        ctx.condition_results = {}
         ctx.default_percentage_key = 'userkey-value'
-        ctx.get_attr.return_value = 'ponsonby'
+        ctx.get_attr_value.return_value = 'ponsonby'
         self.s_matcher.match.return_value = True
         found = self.apply.apply([RolloutStrategy({
             'value': 'sausage',
@@ -83,8 +87,9 @@ class ApplyFeatureTest(TestCase):
 
     def test_should_not_match_field_comparison_if_value_is_different(self):
         ctx = MagicMock()
+        ctx.condition_results = {}
         ctx.default_percentage_key = 'userkey-value'
-        ctx.get_attr.return_value = 'ponsonby'
+        ctx.get_attr_value.return_value = 'ponsonby'
 
         self.s_matcher.match.return_value = False
 
@@ -121,6 +126,7 @@ class ApplyFeatureTest(TestCase):
 
     def test_should_process_basic_percentages_property(self):
         ctx = MagicMock(spec=ClientContext)
+        ctx.condition_results = {}
         ctx.default_percentage_key = 'userkey'
 
         percent_mock = MagicMock(side_effect=lambda *args: 15 if args[0] == 'userkey' and args[1] == 'fid' else None)
@@ -140,6 +146,7 @@ class ApplyFeatureTest(TestCase):
 
     def test_should_bounce_bad_percentages(self):
         ctx = MagicMock(spec=ClientContext)
+        ctx.condition_results = {}
         ctx.default_percentage_key = 'userkey'
 
         percent_mock = MagicMock(side_effect=lambda *args: 21 if args[0] == 'userkey' and args[1] == 'fid' else None)
@@ -155,13 +162,14 @@ class ApplyFeatureTest(TestCase):
 
     def test_should_process_pattern_match_percentages(self):
         ctx = MagicMock(spec=ClientContext)
+        ctx.condition_results = {}
         ctx.default_percentage_key = 'userkey'
 
         percent_mock = MagicMock(side_effect=lambda *args: 15 if args[0] == 'userkey' and args[1] == 'fid' else None)
         self.percent.determine_client_percentage = percent_mock
         attr_mock = MagicMock(side_effect=lambda *args: 'ponsonby'
         if args[0] == 'warehouseId' else None)
-        ctx.get_attr = attr_mock
+        ctx.get_attr_value = attr_mock
 
         # self.percent.determine_client_percentage.return_value = 15
 
@@ -184,11 +192,12 @@ class ApplyFeatureTest(TestCase):
 
     def test_should_fail_pattern_percentages(self):
         ctx = MagicMock(spec=ClientContext)
+        ctx.condition_results = {}
         ctx.default_percentage_key = 'userkey'
 
         percent_mock = MagicMock(side_effect=lambda *args: 15 if args[0] == 'userkey' and args[1] == 'fid' else None)
         self.percent.determine_client_percentage = percent_mock
-        ctx.get_attr.return_value = None
+        ctx.get_attr_value.return_value = None
 
         # self.percent.determine_client_percentage.return_value = 15
 
@@ -206,36 +215,46 @@ class ApplyFeatureTest(TestCase):
 
         self.assertFalse(found.matched)
         percent_mock.assert_called_with('userkey', 'fid')
-        ctx.get_attr.assert_called_with('warehouseId')
+        ctx.get_attr_value.assert_called_with('warehouseId')
+
+    def test_murmur_percentages_unchanged_by_caching(self):
+        calculator = Murmur3PercentageCalculator()
+        for key, fid in [('user@email', 'fid'), ('user@email', 'fid2'), ('ŵelsh', 'fid'), ('a$b', 'fid')] * 2:
+            self.assertEqual(calculator.determine_client_percentage(key, fid),
+                             math.floor(murmurhash3(bytes(key + fid, 'utf-8'), 0) / math.pow(2, 32) * 1000000))
 
     # "should return false if the supplied value is nil, the attribute value has a value and its an equals comparison"
     def test_should_return_false_if_supplied_nil(self):
         attr = MagicMock(spec=RolloutStrategyAttribute)
         attr.field_name = "userkey"
+        attr.time_based = False
         attr.values = "fred"
         rs = MagicMock(spec=RolloutStrategy)
         rs.attributes = [attr]
         ctx = MagicMock(spec=ClientContext)
-        ctx.get_attr.return_value = None
+        ctx.get_attr_value.return_value = None
+        ctx.condition_results = {}
 
         val = self.apply.match_attribute(ctx, rs)
         self.assertFalse(val)
-        ctx.get_attr.assert_called_with('userkey')
+        ctx.get_attr_value.assert_called_with('userkey')
 
     # supplied value and attribute value being nil should make true
     def test_both_none_should_return_true(self):
         attr = MagicMock(spec=RolloutStrategyAttribute)
         attr.field_name = "userkey"
+        attr.time_based = False
         attr.values = None
         attr.conditional = RolloutStrategyAttributeConditional.Equals
         rs = MagicMock(spec=RolloutStrategy)
         rs.attributes = [attr]
         ctx = MagicMock(spec=ClientContext)
-        ctx.get_attr.return_value = None
+        ctx.get_attr_value.return_value = None
+        ctx.condition_results = {}
 
         val = self.apply.match_attribute(ctx, rs)
         self.assertTrue(val)
-        ctx.get_attr.assert_called_with('userkey')
+        ctx.get_attr_value.assert_called_with('userkey')
 
 
 if __name__ == '__main__':
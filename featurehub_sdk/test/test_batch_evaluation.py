@@ -0,0 +1,187 @@
+import importlib.util
+import random
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator, ContextColumns
+from featurehub_sdk.client_context import ClientEvalFeatureContext
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.interceptors import InterceptorValue
+from featurehub_sdk.strategy_matchers import ApplyFeature, MatcherRegistry, Murmur3PercentageCalculator, \
+    StrategyMatcher
+
+
+def country(values, conditional='EQUALS'):
+    return {'conditional': conditional, 'fieldName': 'country', 'values': values, 'type': 'STRING'}
+
+
+FEATURES = [
+    {'id': 'f1', 'key': 'PERCENTAGES', 'l': False, 'version': 1, 'type': 'STRING', 'value': 'default',
+     'strategies': [
+         {'id': 's1', 'value': 'first', 'percentage': 200000},
+         {'id': 's2', 'value': 'nz', 'percentage': 300000, 'attributes': [country(['new_zealand'])]},
+         {'id': 's3', 'value': 'second', 'percentage': 250000},
+         {'id': 's4', 'value': 'by-company', 'percentage': 400000, 'percentageAttributes': ['company']},
+         {'id': 's5', 'value': 'not-au', 'attributes': [country(['australia'], 'NOT_EQUALS'),
+                                                         {'conditional': 'GREATER_EQUALS', 'fieldName': 'version',
+                                                          'values': ['2.0.0'], 'type': 'SEMANTIC_VERSION'}]},
+     ]},
+    {'id': 'f2', 'key': 'FLAG', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': False,
+     'strategies': [
+         {'id': 'adults', 'value': True, 'attributes': [
+             {'conditional': 'GREATER', 'fieldName': 'age', 'values': [17], 'type': 'NUMBER'}]},
+         {'id': 'half', 'value': True, 'percentage': 500000},
+     ]},
+    {'id': 'f3', 'key': 'PLAIN', 'l': True, 'version': 1, 'type': 'NUMBER', 'value': 12.5},
+]
+
+
+def random_rows(count: int, seed: int = 7):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {
+            'userkey': None if i % 11 == 0 else f"user-{rnd.getrandbits(40)}",
+            'session': f"session-{rnd.getrandbits(40)}" if i % 5 == 0 else None,
+            'country': rnd.choice(['new_zealand', 'australia', 'denmark', None]),
+            'version': rnd.choice(['1.0.0', '2.0.0', '2.5.1']),
+            'age': rnd.choice(['12', '18', '45', None]),
+            'company': rnd.choice([f"company-{rnd.randrange(40)}", None]),
+        }
+        rows.append(row)
+    return rows
+
+
+# a custom matcher that answers 1 or 0 rather than True or False
+class TruthyMatcher(StrategyMatcher):
+    def match(self, supplied_value, attr) -> bool:
+        return 1 if supplied_value in attr.str_values else 0
+
+
+class TruthyRegistry(MatcherRegistry):
+    def find_matcher(self, attr):
+        return TruthyMatcher()
+
+
+def to_columns(rows):
+    return {name: [row[name] for row in rows] for name in rows[0].keys()}
+
+
+class BatchFeatureEvaluatorTest(TestCase):
+    def setUp(self) -> None:
+        self.repo = FeatureHubRepository()
+        self.repo.notify('features', FEATURES)
+        self.evaluator = BatchFeatureEvaluator(self.repo)
+
+    def expected(self, key: str, rows):
+        found = []
+        for row in rows:
+            ctx = ClientEvalFeatureContext(self.repo, MagicMock())
+            for name, value in row.items():
+                if value is not None:
+                    ctx.attribute_values(name, [value])
+            found.append(ctx.feature(key).get_value)
+        return found
+
+    def test_matches_context_evaluation(self):
+        rows = random_rows(2000)
+
+        results = self.evaluator.evaluate_all(['PERCENTAGES', 'FLAG', 'PLAIN'], to_columns(rows))
+
+        for key, result in results.items():
+            self.assertEqual(result.values, self.expected(key, rows), key)
+
+        # make sure the data actually exercises the strategies (s2 and s3 share s1's percentage key, so ApplyFeature
+        # never gets to them)
+        self.assertEqual(set(results['PERCENTAGES'].strategy_ids), {None, 's1', 's4', 's5'})
+        self.assertEqual(results['PLAIN'].value_counts(), {12.5: 2000})
+
+    def test_strategy_ids(self):
+        result = self.evaluator.evaluate('FLAG', {'userkey': ['a', 'b'], 'age': ['45', None]})
+        self.assertEqual(result.strategy_ids[0], 'adults')
+        self.assertEqual(result.strategy_indexes[0], 0)
+        self.assertEqual(len(result), 2)
+
+    def test_missing_feature(self):
+        self.assertEqual(self.evaluator.evaluate('NOPE', {'userkey': ['a', 'b']}).values, [None, None])
+
+    def test_interceptor_applies_to_every_row(self):
+        interceptor = MagicMock()
+        interceptor.intercepted_value.return_value = InterceptorValue('true')
+        self.repo.register_interceptor(interceptor)
+
+        self.assertEqual(self.evaluator.evaluate('FLAG', {'userkey': ['a', 'b']}).values, [True, True])
+        # locked features ignore interceptors
+        self.assertEqual(self.evaluator.evaluate('PLAIN', {'userkey': ['a']}).values, [12.5])
+
+    def test_matcher_errors_only_raised_when_reached(self):
+        self.repo.notify('feature', {'id': 'f4', 'key': 'IP', 'l': False, 'version': 1, 'type': 'BOOLEAN',
+                                     'value': False,
+                                     'strategies': [{'id': 'ip', 'value': True, 'attributes': [
+                                         country(['new_zealand']),
+                                         {'conditional': 'INCLUDES', 'fieldName': 'ip', 'values': ['10.0.0.0/8'],
+                                          'type': 'IP_ADDRESS'}]}]})
+
+        self.assertEqual(self.evaluator.evaluate('IP', {'country': ['australia', 'new_zealand'],
+                                                         'ip': ['rubbish', '10.1.1.1']}).values, [False, True])
+
+        with self.assertRaises(ValueError):
+            self.evaluator.evaluate('IP', {'country': ['new_zealand'], 'ip': ['rubbish']})
+
+    def test_bad_strategy_values_only_fail_when_chosen(self):
+        self.repo.notify('feature', {'id': 'f5', 'key': 'LIMIT', 'l': False, 'version': 1, 'type': 'NUMBER',
+                                     'value': 10, 'strategies': [
+                                         {'id': 'bad', 'value': 'lots', 'attributes': [country(['new_zealand'])]},
+                                         {'id': 'au', 'value': 20, 'attributes': [country(['australia'])]}]})
+
+        self.assertEqual(self.evaluator.evaluate('LIMIT', {'country': ['australia', 'denmark']}).values, [20.0, 10])
+        self.assertEqual(self.evaluator.evaluate('LIMIT', {'country': ['australia', 'denmark']}).values,
+                         self.expected('LIMIT', [{'country': 'australia'}, {'country': 'denmark'}]))
+
+        with self.assertRaises(ValueError):
+            self.evaluator.evaluate('LIMIT', {'country': ['new_zealand']})
+
+    def test_truthy_matcher_results_match(self):
+        self.repo = FeatureHubRepository(ApplyFeature(matcher_repository=TruthyRegistry()))
+        self.repo.notify('features', [
+            {'id': 'f6', 'key': 'BOTH', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': False,
+             'strategies': [{'id': 'both', 'value': True, 'attributes': [
+                 country(['new_zealand']), {'conditional': 'EQUALS', 'fieldName': 'company', 'values': ['acme'],
+                                            'type': 'STRING'}]}]}])
+        rows = [{'country': 'new_zealand', 'company': 'acme'}, {'country': 'new_zealand', 'company': 'other'},
+                {'country': 'australia', 'company': 'acme'}]
+
+        result = BatchFeatureEvaluator(self.repo).evaluate('BOTH', to_columns(rows))
+        self.assertEqual(result.values, [True, False, False])
+        self.assertEqual(result.values, self.expected('BOTH', rows))
+
+    def test_columns(self):
+        columns = ContextColumns({'userkey': ('a', 'b'), 'country': [['nz'], []]})
+        self.assertEqual(columns.rows, 2)
+        self.assertEqual(columns.column('country'), ['nz', None])
+        self.assertEqual(columns.column('missing'), [None, None])
+        self.assertEqual(columns.percentage_keys(['country', 'userkey']), ['nz$a', '<none>$b'])
+        self.assertEqual(columns.slice(1, 2).column('userkey'), ['b'])
+
+        with self.assertRaises(ValueError):
+            ContextColumns({'userkey': ['a'], 'country': []})
+
+    def test_bulk_percentages_match_single(self):
+        calculator = Murmur3PercentageCalculator()
+        keys = [f"user-{i}" for i in range(500)]
+        self.assertEqual(calculator.determine_client_percentages(keys, 'fid'),
+                         [calculator.determine_client_percentage(k, 'fid') for k in keys])
+
+    @unittest.skipUnless(importlib.util.find_spec('numpy'), 'numpy is not installed')
+    def test_numpy_columns(self):
+        import numpy
+
+        rows = random_rows(200)
+        columns = {name: numpy.array(values, dtype=object) for name, values in to_columns(rows).items()}
+
+        self.assertEqual(self.evaluator.evaluate('PERCENTAGES', columns).values, self.expected('PERCENTAGES', rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+
+from featurehub_sdk.cli import main, load_snapshot
+from featurehub_sdk.test.test_batch_evaluation import FEATURES, random_rows
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+
+
+class CliTest(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = self.path('snapshot.json')
+        self.write(self.snapshot, json.dumps(FEATURES))
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    @staticmethod
+    def write(path: str, content: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def evaluate(self, rows, *args) -> list:
+        contexts = self.path('contexts.ndjson')
+        output = self.path('output.ndjson')
+        self.write(contexts, '\n'.join(json.dumps({k: v for k, v in row.items() if v is not None}) for row in rows)
+                   + '\n\n')
+
+        self.assertEqual(main(['--snapshot', self.snapshot, '--input', contexts, '--output', output] + list(args)), 0)
+
+        with open(output, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def expected(self, key: str, rows) -> list:
+        repo = FeatureHubRepository()
+        repo.notify('features', FEATURES)
+        columns = {name: [row[name] for row in rows] for name in rows[0].keys()}
+        return BatchFeatureEvaluator(repo).evaluate(key, columns).values
+
+    def test_evaluates_every_feature_in_order(self):
+        rows = random_rows(250)
+        found = self.evaluate(rows, '--chunk-size', '32', '--passthrough', 'userkey')
+
+        self.assertEqual(len(found), 250)
+        self.assertEqual([f.get('userkey') for f in found], [r['userkey'] for r in rows])
+        self.assertEqual(set(found[1].keys()), {'userkey', 'PERCENTAGES', 'FLAG', 'PLAIN'})
+        self.assertEqual([f['PERCENTAGES'] for f in found], self.expected('PERCENTAGES', rows))
+
+    def test_selected_features_with_processes(self):
+        rows = random_rows(100)
+        found = self.evaluate(rows, '--feature', 'FLAG', '--processes', '2', '--chunk-size', '16')
+
+        self.assertEqual(found, [{'FLAG': v} for v in self.expected('FLAG', rows)])
+
+    def test_reads_stdin(self):
+        with patch('sys.stdin', io.StringIO('{"userkey": "a", "age": 45}\n')), \
+                patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            self.assertEqual(main(['--snapshot', self.snapshot, '--feature', 'FLAG']), 0)
+
+        self.assertEqual(json.loads(stdout.getvalue()), {'FLAG': True})
+
+    def test_bad_input(self):
+        with patch('sys.stdin', io.StringIO('{"userkey": "a"}\nnot json\n')), patch('sys.stdout', io.StringIO()), \
+                patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            self.assertEqual(main(['--snapshot', self.snapshot]), 1)
+
+        self.assertIn('line 2', stderr.getvalue())
+
+    def test_edge_response_snapshot(self):
+        self.write(self.snapshot, json.dumps([{'id': 'env', 'features': FEATURES[0:2]}, {'id': 'env2'}]))
+        self.assertEqual([f['key'] for f in load_snapshot(self.snapshot)], ['PERCENTAGES', 'FLAG'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -81,6 +81,40 @@ class ClientContextTest(TestCase):
         self.assertEqual(self.client_context.user_key('fred').get_attr(ClientContext.USER_KEY), 'fred')
         self.assertEqual(self.client_context.default_percentage_key, 'fred')
 
+    def test_percentage_keys_remembered_until_attributes_change(self):
+        ctx = self.client_context.user_key('fred').attribute_values('company', ['acme'])
+        self.assertEqual(ctx.percentage_key(['company', 'userkey', 'missing']), 'acme$fred$<none>')
+        self.assertIs(ctx.default_percentage_key, ctx.default_percentage_key)
+
+        ctx.session_key('session-1')
+        self.assertEqual(ctx.default_percentage_key, 'session-1')
+        ctx.attribute_values('company', ['initech'])
+        self.assertEqual(ctx.percentage_key(['company', 'userkey', 'missing']), 'initech$fred$<none>')
+        ctx.clear()
+        self.assertIsNone(ctx.default_percentage_key)
+        self.assertEqual(ctx.percentage_key(['company']), '<none>')
+
+    def test_attribute_values_normalised_once_until_they_change(self):
+        ctx = self.client_context.country(StrategyAttributeCountryName.NewZealand).attribute_values('age', [42]) \
+            .version('2.1.0').attribute_values('ip', ['10.0.0.1'])
+
+        country = ctx.get_attr_value(ClientContext.COUNTRY)
+        self.assertEqual(country, 'new_zealand')
+        self.assertIs(country.raw, StrategyAttributeCountryName.NewZealand)
+        self.assertIs(ctx.get_attr_value(ClientContext.COUNTRY), country)
+        self.assertEqual(ctx.get_attr_value('age'), '42')
+        self.assertEqual(ctx.get_attr_value('age').number, 42.0)
+        self.assertIsNone(country.number)
+        self.assertEqual(ctx.get_attr_value('version').version.compare('2.0.9'), 1)
+        self.assertIs(ctx.get_attr_value('version').version, ctx.get_attr_value('version').version)
+        self.assertEqual(str(ctx.get_attr_value('ip').ip), '10.0.0.1')
+        with self.assertRaises(ValueError):
+            country.ip
+        self.assertIsNone(ctx.get_attr_value('missing'))
+
+        ctx.country(StrategyAttributeCountryName.Australia)
+        self.assertEqual(ctx.get_attr_value(ClientContext.COUNTRY), 'australia')
+
     async def test_passed_methods(self):
         await self.client_context.build()
         await self.client_context.close()
@@ -0,0 +1,116 @@
+import gc
+import unittest
+from unittest import TestCase
+
+from featurehub_sdk.client_context import ClientEvalFeatureContext, ConditionTable
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.strategy_attribute_country_name import StrategyAttributeCountryName
+from featurehub_sdk.strategy_matchers import MatcherRegistry, ApplyFeature, StrategyMatcher
+
+
+def condition(country: str = 'new_zealand', id: str = 'a') -> dict:
+    return {'id': id, 'conditional': 'EQUALS', 'fieldName': 'country', 'values': [country], 'type': 'STRING'}
+
+
+def feature(key: str, *conditions: dict) -> dict:
+    return {'id': key, 'key': key, 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': False,
+            'strategies': [{'id': f'{key}-{i}', 'value': True, 'attributes': [c]} for i, c in enumerate(conditions)]}
+
+
+class CountingMatcher(StrategyMatcher):
+    def __init__(self, matcher: StrategyMatcher, counts: list):
+        self._matcher = matcher
+        self._counts = counts
+
+    def match(self, supplied_value, attr) -> bool:
+        self._counts.append(attr.field_name)
+        return self._matcher.match(supplied_value, attr)
+
+
+class CountingRegistry(MatcherRegistry):
+    def __init__(self):
+        self.counts = []
+
+    def find_matcher(self, attr):
+        return CountingMatcher(super().find_matcher(attr), self.counts)
+
+
+class ConditionTableTest(TestCase):
+    def setUp(self) -> None:
+        self.registry = CountingRegistry()
+        self.repo = FeatureHubRepository(ApplyFeature(matcher_repository=self.registry), ConditionTable())
+        self.repo.notify('features', [
+            feature('A', condition(id='1')),
+            feature('B', condition(id='2'), condition('australia')),
+            feature('C', condition('australia', id='3')),
+            feature('D', dict(condition(), fieldName='now', type='DATE', conditional='GREATER', values=['2020-01-01'])),
+        ])
+
+    def test_identical_conditions_are_shared_between_features(self):
+        a = self.repo.feature('A').strategies[0].attributes[0]
+        b = self.repo.feature('B').strategies[0].attributes[0]
+        self.assertIs(a, b)
+        self.assertIs(self.repo.feature('B').strategies[1].attributes[0],
+                      self.repo.feature('C').strategies[0].attributes[0])
+        self.assertEqual(len(self.repo.condition_table), 3)
+
+        table = ConditionTable()
+        self.assertIsNot(table.intern(dict(condition(), values=[1])), table.intern(dict(condition(), values=[True])))
+        self.assertIsNot(table.intern(condition()), table.intern(dict(condition(), conditional='NOT_EQUALS')))
+
+    def test_each_condition_is_checked_once_per_context(self):
+        ctx = ClientEvalFeatureContext(self.repo, None).country('australia')
+
+        self.assertEqual([ctx.get_flag(k) for k in 'ABCD'], [False, True, True, True])
+        self.assertEqual(self.registry.counts, ['country', 'country', 'now'])
+
+        # nor is the time, which has passed the condition's date for good
+        self.assertTrue(ctx.get_flag('D'))
+        self.assertEqual(self.registry.counts.count('now'), 1)
+
+        # and everything is once the context changes
+        ctx.country('new_zealand')
+        self.assertEqual([ctx.get_flag(k) for k in 'ABC'], [True, True, False])
+        self.assertEqual(self.registry.counts.count('country'), 4)
+
+    def test_enum_attributes_match_by_their_value(self):
+        ctx = ClientEvalFeatureContext(self.repo, None).country(StrategyAttributeCountryName.Australia)
+        self.assertEqual([ctx.get_flag(k) for k in 'ABC'], [False, True, True])
+
+    def test_conditions_go_with_the_last_feature_using_them(self):
+        self.repo.notify('delete_feature', {'key': 'C'})
+        gc.collect()
+        self.assertEqual(len(self.repo.condition_table), 3)
+
+        self.repo.notify('delete_feature', {'key': 'B'})
+        gc.collect()
+        self.assertEqual(len(self.repo.condition_table), 2)
+
+    def test_identical_strategies_are_shared_between_environments(self):
+        production = FeatureHubRepository()
+        staging = FeatureHubRepository()
+        a = feature('A', condition(id='1'), condition('australia', id='2'))
+        a['strategies'][0]['percentage'] = 20
+        a['strategies'][0]['percentageAttributes'] = ['company']
+        production.notify('features', [a])
+        staging.notify('features', [dict(a, id='A-staging', version=4), feature('B', condition(id='3'))])
+
+        self.assertIs(production.condition_table, staging.condition_table)
+        self.assertIs(production.feature('A').strategies[0], staging.feature('A').strategies[0])
+        self.assertIsNot(production.feature('A').strategies[0], staging.feature('B').strategies[0])
+        self.assertIs(production.feature('A').strategies[0].attributes[0],
+                      staging.feature('B').strategies[0].attributes[0])
+
+        # the raw strategies aren't kept, but the feature comes out exactly as it went in
+        self.assertNotIn('strategies', production.feature('A')._internal_feature_state)
+        self.assertEqual(production.extract_feature_state(), [a])
+        self.assertEqual(staging.extract_feature_state()[1], feature('B', condition(id='3')))
+
+        no_ids = feature('C', {k: v for k, v in condition().items() if k != 'id'})
+        production.notify('feature', no_ids)
+        self.assertEqual(production.feature('C').internal_feature_state, no_ids)
+        self.assertEqual(production.feature('C').strategies[0].attributes[0].to_dict()['id'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from featurehub_sdk.client_context import ClientEvalFeatureContext, ServerEvalFeatureContext
+from featurehub_sdk.context_pool import ContextPool
+from featurehub_sdk.featurehub_config import FeatureHubConfig
+
+
+class ContextPoolTest(TestCase):
+    def setUp(self) -> None:
+        self.edge = MagicMock()
+        self.config = FeatureHubConfig('http://localhost', ['123*abc'], edge_provider=lambda *args: self.edge)
+        self.config.repository().notify('features', [
+            {'id': '1', 'key': 'COLOUR', 'l': False, 'version': 1, 'type': 'STRING', 'value': 'orange',
+             'strategies': [{'id': 'nz', 'value': 'green', 'percentage': 0, 'attributes': [
+                 {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]}]}
+        ])
+
+    def test_contexts_are_reused_and_cleared(self):
+        with self.config.pooled_context() as ctx:
+            self.assertIsInstance(ctx, ClientEvalFeatureContext)
+            ctx.user_key('fred').country('new_zealand')
+            self.assertEqual(ctx.default_percentage_key, 'fred')
+            self.assertEqual(ctx.get_string('COLOUR'), 'green')
+
+        with self.config.pooled_context() as again:
+            self.assertIs(again, ctx)
+            self.assertIsNone(again.get_attr('country'))
+            self.assertIsNone(again.default_percentage_key)
+            self.assertEqual(again.get_string('COLOUR'), 'orange')
+
+            # nested use gets a different context
+            with self.config.pooled_context() as nested:
+                self.assertIsNot(nested, again)
+
+    def test_returned_even_when_the_block_raises(self):
+        pool = ContextPool(self.config)
+        with self.assertRaises(ValueError):
+            with pool.context() as ctx:
+                ctx.user_key('fred')
+                raise ValueError()
+
+        self.assertEqual(pool.idle, 1)
+        self.assertIsNone(pool.checkout().get_attr('userkey'))
+
+    def test_pool_per_thread_and_bounded(self):
+        pool = ContextPool(self.config, max_size=2)
+        contexts = [pool.checkout() for _ in range(3)]
+        for ctx in contexts:
+            pool.release(ctx)
+        self.assertEqual(pool.idle, 2)
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(pool.idle))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [0])
+
+    def test_new_edge_service_drops_pooled_contexts(self):
+        pool = ContextPool(self.config)
+        pool.release(pool.checkout())
+
+        self.config.close()
+        self.edge = MagicMock()
+
+        ctx = pool.checkout()
+        self.assertIs(ctx._edge, self.edge)
+        self.assertEqual(pool.idle, 0)
+
+    def test_server_evaluated_contexts_forget_their_header(self):
+        config = FeatureHubConfig('http://localhost', ['123'], edge_provider=lambda *args: self.edge)
+        pool = ContextPool(config)
+        ctx = pool.checkout()
+        self.assertIsInstance(ctx, ServerEvalFeatureContext)
+        ctx._old_header = 'userkey=fred'
+        pool.release(ctx)
+        self.assertIsNone(pool.checkout()._old_header)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from featurehub_sdk.client_context import ClientEvalFeatureContext
+from featurehub_sdk.evaluation_cache import EvaluationCache
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.instrumentation import InstrumentationSink
+from featurehub_sdk.strategy_matchers import ApplyFeature
+from featurehub_sdk.test.features import colour
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class EvaluationCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.apply = ApplyFeature()
+        self.apply.apply = MagicMock(side_effect=self.apply.apply)
+        self.repo = FeatureHubRepository(self.apply)
+        self.repo.notify('features', [colour(1)])
+        self.clock = Clock()
+        self.cache = EvaluationCache(max_size=2, ttl=10, clock=self.clock)
+        self.repo.register_evaluation_cache(self.cache)
+
+    def context(self, country: str = 'new_zealand', user: str = 'fred'):
+        return ClientEvalFeatureContext(self.repo, MagicMock()).user_key(user).country(country)
+
+    def test_frozen_contexts_are_cached_across_requests(self):
+        for _ in range(3):
+            self.assertEqual(self.context().freeze().get_string('COLOUR'), 'green')
+
+        self.assertEqual(self.apply.apply.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 2)
+        self.assertAlmostEqual(self.cache.hit_rate, 2 / 3)
+
+    def test_mutable_contexts_are_not_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.context().get_string('COLOUR'), 'green')
+
+        self.assertEqual(self.apply.apply.call_count, 3)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_feature_changes_invalidate(self):
+        frozen = self.context().freeze()
+        self.assertEqual(frozen.get_string('COLOUR'), 'green')
+
+        self.repo.notify('feature', colour(2, nz_value='blue'))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(frozen.get_string('COLOUR'), 'blue')
+
+        # same version, different value still counts as a change
+        self.repo.notify('feature', dict(colour(2, nz_value='purple'), value='red'))
+        self.assertEqual(frozen.get_string('COLOUR'), 'purple')
+
+        self.repo.notify('delete_feature', colour(2))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()['invalidations'], 3)
+
+    def test_ttl_and_size_bound(self):
+        self.context().freeze().get_string('COLOUR')
+        self.clock.now = 11
+        self.context().freeze().get_string('COLOUR')
+        self.assertEqual(self.apply.apply.call_count, 2)
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+        self.context(user='mary').freeze().get_string('COLOUR')
+        self.context(user='sue').freeze().get_string('COLOUR')
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_lookups_reported_to_instrumentation(self):
+        sink = MagicMock(spec=InstrumentationSink)
+        self.repo.register_instrumentation(sink)
+        frozen = self.context().freeze()
+        frozen.get_string('COLOUR')
+        frozen.get_string('COLOUR')
+
+        self.assertEqual([c.args for c in sink.cache_lookup.call_args_list],
+                         [('evaluation', False), ('evaluation', True)])
+
+    def test_repositories_sharing_a_cache(self):
+        staging = FeatureHubRepository()
+        staging.notify('features', [colour(1, nz_value='blue')])
+        staging.register_evaluation_cache(self.cache)
+
+        self.assertEqual(self.context().freeze().get_string('COLOUR'), 'green')
+        staging_context = ClientEvalFeatureContext(staging, MagicMock()).user_key('fred').country('new_zealand')
+        self.assertEqual(staging_context.freeze().get_string('COLOUR'), 'blue')
+        self.assertEqual(len(self.cache), 2)
+
+        # a change in one environment leaves the other's results alone
+        staging.notify('feature', colour(2, nz_value='purple'))
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.context().freeze().get_string('COLOUR'), 'green')
+        self.assertEqual(self.apply.apply.call_count, 1)
+
+    def test_cache_on_its_own(self):
+        cache = EvaluationCache(ttl=None)
+        self.assertIsNone(cache.get('fp', 'A', 1))
+        cache.put('fp', 'A', 1, 'value')
+        cache.put('fp', 'B', 1, 'other')
+        self.assertEqual(cache.get('fp', 'A', 1), 'value')
+        self.assertIsNone(cache.get('fp', 'A', 2))
+        cache.put('fp', 'A', 1, 'elsewhere', scope='staging')
+        cache.invalidate('A')
+        self.assertIsNone(cache.get('fp', 'A', 1))
+        self.assertEqual(cache.get('fp', 'A', 1, 'staging'), 'elsewhere')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
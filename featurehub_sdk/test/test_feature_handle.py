@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock, AsyncMock
+
+from featurehub_sdk.featurehub_config import FeatureHubConfig
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.test.features import colour, flag
+
+
+class FeatureHandleTest(TestCase):
+    def setUp(self) -> None:
+        self.edge = MagicMock()
+        self.edge.poll = AsyncMock()
+        self.config = FeatureHubConfig('http://localhost', ['123*abc'], edge_provider=lambda *args: self.edge)
+        self.repo = self.config.repository()
+        self.repo.notify('features', [colour(1), flag()])
+
+    def test_one_handle_per_key(self):
+        handle = self.config.handle('COLOUR')
+        self.assertIs(self.config.handle('COLOUR'), handle)
+        self.assertEqual(handle.key, 'COLOUR')
+        with self.assertRaises(TypeError):
+            self.config.handle('')
+
+    def test_values_through_a_context_or_the_repository(self):
+        colour_handle = self.config.handle('COLOUR')
+        flag_handle = self.config.handle('FLAG')
+        ctx = self.config.new_context().country('new_zealand')
+
+        self.assertEqual(colour_handle.get_string(ctx), 'green')
+        self.assertEqual(colour_handle.get_string(), 'orange')
+        self.assertEqual(colour_handle.get_value(ctx.freeze()), 'green')
+        self.assertIsNone(colour_handle.get_flag(ctx))
+        self.assertTrue(flag_handle.get_flag(ctx))
+        self.assertTrue(flag_handle.is_enabled())
+        self.assertIs(flag_handle.feature(ctx), self.repo.feature('FLAG'))
+        self.assertTrue(colour_handle.is_set(ctx))
+
+    def test_survives_updates_and_deletes(self):
+        handle = self.config.handle('COLOUR')
+        ctx = self.config.new_context().country('australia')
+
+        self.repo.notify('feature', colour(2, 'purple'))
+        self.assertEqual(handle.get_string(ctx), 'purple')
+
+        self.repo.notify('delete_feature', {'key': 'COLOUR'})
+        self.assertFalse(handle.exists())
+        self.assertIsNone(handle.get_string(ctx))
+
+        self.repo.notify('feature', colour(3, 'blue'))
+        self.assertEqual(handle.get_string(ctx), 'blue')
+
+    def test_follows_a_new_repository(self):
+        handle = self.config.handle('FLAG')
+        self.assertTrue(handle.get_flag())
+
+        repo = FeatureHubRepository()
+        repo.notify('features', [flag(False)])
+        self.config.repository(repo)
+        self.assertFalse(handle.get_flag())
+        self.assertFalse(handle.get_flag(self.config.new_context()))
+
+    def test_missing_handles_reported_once_features_arrive(self):
+        self.config.handle('COLOUR')
+        self.config.handle('TYPO')
+        self.config.handle('NOT_YET')
+        self.repo.notify('feature', dict(flag(), id='3', key='NOT_YET'))
+
+        with self.assertLogs('featurehub_sdk', level='WARNING') as logs:
+            asyncio.get_event_loop().run_until_complete(self.config.init())
+
+        self.assertEqual(self.config.missing_handles(), ['TYPO'])
+        self.assertIn('TYPO', logs.output[0])
+
+    def test_missing_handles_reported_when_features_arrive_later(self):
+        config = FeatureHubConfig('http://localhost', ['123*abc'], edge_provider=lambda *args: self.edge)
+        config.handle('COLOUR')
+        config.handle('TYPO')
+
+        # the streaming edge service returns before anything has arrived
+        with self.assertNoLogs('featurehub_sdk', level='WARNING'):
+            config.init_sync()
+
+        with self.assertLogs('featurehub_sdk', level='WARNING') as logs:
+            config.repository().notify('features', [colour(1)])
+        self.assertIn('TYPO', logs.output[0])
+
+        # only the once
+        with self.assertNoLogs('featurehub_sdk', level='WARNING'):
+            config.repository().notify('features', [colour(2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@
 import unittest
 import json
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from featurehub_sdk.client_context import Applied, ClientContext
 from featurehub_sdk.fh_state_base_holder import FeatureStateHolder
@@ -50,7 +50,7 @@ class FeatureStateHolderTest(TestCase):
         self.assertFalse(fh.get_boolean)
         self.assertFalse(fh.get_flag)
         self.assertFalse(fh.is_enabled)
-        f['value'] = True
+        fh.set_feature_state(dict(f, value=True))
         self.assertTrue(fh.get_boolean)
         self.assertTrue(fh.get_flag)
         self.assertTrue(fh.is_enabled)
@@ -144,6 +144,27 @@ class FeatureStateHolderTest(TestCase):
 
         self.assertEqual(fh.key, key)
 
+    def test_strategy_values_cast_when_the_state_arrives(self):
+        f = dict(self.feature('NUMBER', 1), strategies=[{'id': 's1', 'value': '12.5'}, {'id': 's2', 'value': 'x'}])
+        fh = FeatureStateHolder('N', self._repo, f)
+        fh_ctx = fh.with_context(MagicMock(spec=ClientContext))
+
+        with patch.object(InterceptorValue, 'cast') as cast:
+            self._repo.apply.return_value = Applied(True, '12.5', fh.strategies[0])
+            self.assertEqual(fh_ctx.get_number, 12.5)
+            self.assertEqual(fh_ctx.get_value, 12.5)
+            cast.assert_not_called()
+
+        # values that can't be cast still fail when they are read
+        self._repo.apply.return_value = Applied(True, 'x', fh.strategies[1])
+        with self.assertRaises(ValueError):
+            fh_ctx.get_number
+
+        fh.set_feature_state(dict(f, type='STRING', version=2))
+        self._repo.apply.return_value = Applied(True, '12.5', fh.strategies[0])
+        self.assertEqual(fh_ctx.get_string, '12.5')
+        self.assertIsNone(fh_ctx.get_number)
+
     def test_raw_full_feature(self):
         data = '''{
         "id": "227dc2e8-59e8-424a-b510-328ef52010f7",
@@ -1,10 +1,18 @@
 import asyncio
+import gc
+import os
+import tempfile
+import threading
 import unittest
+import weakref
 from unittest.mock import MagicMock
 
 from featurehub_sdk.client_context import ServerEvalFeatureContext, ClientEvalFeatureContext, InternalFeatureRepository
+from featurehub_sdk import featurehub_config
 from featurehub_sdk.edge_service import EdgeService
 from featurehub_sdk.featurehub_config import FeatureHubConfig
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.shared_memory import SharedMemoryPublishingRepository
 
 # we need this so we can do async testing (Stack Overflow)
 def sync(coro):
@@ -104,5 +112,106 @@ class FeatureHubConfigTest(unittest.TestCase):
         self.mock_edge.assert_called()
         edge.close.assert_called()
 
+    @sync
+    async def test_fork_restarts_edge_service_and_keeps_repository(self):
+        parent_edge = MagicMock(spec=EdgeService)
+        child_edge = MagicMock(spec=EdgeService)
+        edges = [parent_edge, child_edge]
+        cfg = FeatureHubConfig('http://localhost', ['123'], self.mock_repo, lambda rep, keys, edge_url: edges.pop(0))
+
+        await cfg.init()
+        cfg._after_fork_in_child().join()
+
+        parent_edge.close.assert_called_once_with()
+        child_edge.poll_sync.assert_called_once_with()
+        self.assertEqual(cfg.get_or_create_edge_service(), child_edge)
+        self.assertEqual(cfg.repository(), self.mock_repo)
+
+    def test_init_sync_polls_without_a_loop(self):
+        cfg = FeatureHubConfig('http://localhost', ['123'], self.mock_repo, lambda rep, keys, edge_url: self.mock_edge)
+        self.assertIs(cfg.init_sync(), cfg)
+        self.mock_edge.poll_sync.assert_called_once_with()
+        self.mock_edge.poll.assert_not_called()
+
+    def test_init_waits_for_the_features(self):
+        repo = FeatureHubRepository()
+        edge = MagicMock(spec=EdgeService)
+        edge.poll_sync.side_effect = lambda: threading.Timer(0.05, lambda: repo.notify('features', [])).start()
+        cfg = FeatureHubConfig('http://localhost', ['123'], repo, lambda rep, keys, edge_url: edge)
+
+        cfg.init_sync(wait_ready=5)
+        self.assertTrue(repo.is_ready())
+
+        # and gives up after a while
+        with self.assertLogs('featurehub_sdk', level='WARNING'):
+            FeatureHubConfig('http://localhost', ['123'], FeatureHubRepository(),
+                             lambda rep, keys, edge_url: self.mock_edge).init_sync(wait_ready=0.01)
+
+    def test_sync_fallback_works_inside_a_running_loop(self):
+        class AsyncOnlyEdge(EdgeService):
+            headers = []
+
+            async def context_change(self, header: str):
+                await asyncio.sleep(0)
+                self.headers.append(header)
+
+        edge = AsyncOnlyEdge()
+
+        async def request():
+            ServerEvalFeatureContext(self.mock_repo, edge).user_key('fred').build_sync()
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(request())
+        finally:
+            loop.close()
+
+        edge.context_change_sync('userkey=mary')
+        self.assertEqual(edge.headers, ['userkey=fred', 'userkey=mary'])
+
+    @sync
+    async def test_fork_restart_can_be_turned_off(self):
+        cfg = FeatureHubConfig('http://localhost', ['123'], self.mock_repo, lambda rep, keys, edge_url: self.mock_edge,
+                               restart_on_fork=False)
+        await cfg.init()
+        self.assertIsNone(cfg._after_fork_in_child())
+        self.mock_edge.close.assert_called_once_with()
+        self.mock_edge.poll_sync.assert_not_called()
+
+    @sync
+    async def test_fork_does_not_restart_a_shared_memory_publisher(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = SharedMemoryPublishingRepository(os.path.join(tmp, 'featurehub.snapshot'))
+            cfg = FeatureHubConfig('http://localhost', ['123'], repo, lambda rep, keys, edge_url: self.mock_edge)
+            await cfg.init()
+
+            # a lock held by the parent's edge thread when it forked is let go of in the child
+            repo.condition_table._lock.acquire()
+            self.assertIsNone(cfg._after_fork_in_child())
+            self.assertFalse(repo.condition_table._lock.locked())
+            self.mock_edge.close.assert_called_once_with()
+            repo.close()
+
+    def test_fork_before_init_does_not_start_edge(self):
+        cfg = FeatureHubConfig('http://localhost', ['123'], self.mock_repo, lambda rep, keys, edge_url: self.mock_edge)
+        self.assertIsNone(cfg._after_fork_in_child())
+
+        cfg.get_or_create_edge_service()
+        self.assertIsNone(cfg._after_fork_in_child())
+        self.mock_edge.close.assert_called_once_with()
+        self.mock_edge.poll_sync.assert_not_called()
+
+    def test_fork_handler_is_shared_and_does_not_keep_configs(self):
+        with unittest.mock.patch('os.register_at_fork') as register:
+            configs = [FeatureHubConfig('http://localhost', ['123'], self.mock_repo) for _ in range(10)]
+        register.assert_not_called()
+        self.assertTrue(all(cfg in featurehub_config._configs for cfg in configs))
+
+        featurehub_config._after_fork_in_child()
+        dropped = weakref.ref(configs.pop())
+        gc.collect()
+        self.assertIsNone(dropped())
+
+
 if __name__ == '__main__':
     unittest.main()
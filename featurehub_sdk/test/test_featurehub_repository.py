@@ -1,7 +1,11 @@
+import asyncio
+import threading
 import unittest
 from unittest.mock import MagicMock
 
+from featurehub_sdk.client_context import ClientEvalFeatureContext
 from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.instrumentation import InstrumentationSink
 from featurehub_sdk.interceptors import InterceptorValue, ValueInterceptor
 
 
@@ -130,6 +134,102 @@ class FeatureHubRepositoryTest(unittest.TestCase):
         self.assertEqual(found.cast('NUMBER'), 345)
         self.assertEqual(found.cast('STRING'), '345')
 
+    def test_features_without_strategies_skip_straight_to_their_value(self):
+        self.repo.notify('features', [
+            {'id': '1', 'key': 'FLAG', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': True},
+            {'id': '2', 'key': 'COLOUR', 'l': False, 'version': 1, 'type': 'STRING', 'value': 'orange',
+             'strategies': [{'id': 'nz', 'value': 'green', 'attributes': [
+                 {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]}]}])
+        self.repo.find_interceptor = MagicMock(return_value=None)
+        ctx = ClientEvalFeatureContext(self.repo, None).country('new_zealand')
+
+        self.assertIs(ctx.feature('FLAG'), self.repo.feature('FLAG'))
+        self.assertIsNot(ctx.feature('COLOUR'), self.repo.feature('COLOUR'))
+        self.assertTrue(ctx.get_flag('FLAG'))
+        self.assertIsNone(ctx.get_string('FLAG'))
+        self.assertEqual(ctx.get_string('COLOUR'), 'green')
+        self.assertEqual(self.repo.find_interceptor.call_count, 1)
+
+        # anything hooked into reads turns it off, for features already there and those still to come
+        sink = MagicMock(spec=InstrumentationSink)
+        self.repo.register_instrumentation(sink)
+        self.repo.notify('feature', {'id': '3', 'key': 'OTHER', 'l': False, 'version': 1, 'type': 'BOOLEAN',
+                                     'value': False})
+        self.assertTrue(ctx.get_flag('FLAG'))
+        self.assertFalse(ctx.get_flag('OTHER'))
+        self.assertEqual(sink.feature_evaluated.call_count, 2)
+
+        self.repo.register_instrumentation(None)
+        self.repo.register_interceptor(MagicMock(intercepted_value=lambda key: InterceptorValue('false')))
+        del self.repo.find_interceptor
+        self.assertFalse(ctx.get_flag('FLAG'))
+        self.assertEqual(sink.feature_evaluated.call_count, 2)
+
+    def test_features_added_while_hooks_change(self):
+        repo = FeatureHubRepository()
+        repo.notify('features', [{'id': '1', 'key': 'A', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': True}])
+
+        # as another thread asking for a feature we don't have yet would
+        class Adding:
+            def __init__(self, key):
+                self.key = key
+
+            def _update_fast_path(self):
+                repo.feature(self.key + '+')
+
+            @property
+            def internal_feature_state(self):
+                repo.feature(self.key + '-')
+                return None
+
+        repo.features['B'] = Adding('B')
+        repo.register_interceptor(MagicMock())
+        self.assertEqual([f['key'] for f in repo.extract_feature_state()], ['A'])
+        self.assertIn('B+', repo.features)
+        self.assertIn('B-', repo.features)
+
+    def test_waiting_until_ready(self):
+        self.assertFalse(self.repo.wait_until_ready(0.01))
+        self.assertIsNone(self.repo.time_to_ready)
+
+        timer = threading.Timer(0.05, lambda: self.repo.notify('features', []))
+        timer.start()
+        self.assertTrue(self.repo.wait_until_ready(5))
+        self.assertGreater(self.repo.time_to_ready, 0)
+
+        # waiting again for a new server evaluated context, this time from asyncio
+        self.repo.not_ready()
+        self.assertFalse(self.repo.wait_until_ready(0))
+
+        async def wait():
+            threading.Timer(0.05, lambda: self.repo.notify('feature', {'id': '1', 'key': 'A', 'l': False,
+                                                                       'version': 1, 'type': 'BOOLEAN',
+                                                                       'value': True})).start()
+            return await self.repo.ready(5)
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertTrue(loop.run_until_complete(wait()))
+        finally:
+            loop.close()
+
+    def test_ready_listeners_are_called_once(self):
+        calls = []
+        self.repo.when_ready(lambda: calls.append('later'))
+        self.assertEqual(calls, [])
+
+        self.repo.notify('features', [])
+        self.repo.notify('features', [])
+        self.assertEqual(calls, ['later'])
+
+        self.repo.when_ready(lambda: calls.append('now'))
+        self.assertEqual(calls, ['later', 'now'])
+
+    def test_failure_stops_the_wait(self):
+        threading.Timer(0.05, lambda: self.repo.notify('failed', None)).start()
+        self.assertFalse(self.repo.wait_until_ready(5))
+        self.assertIsNone(self.repo.time_to_ready)
+
 
 if __name__ == '__main__':
     unittest.main()
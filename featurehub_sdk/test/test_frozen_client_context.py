@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import unittest
+from hashlib import sha256
+from unittest import TestCase
+from unittest.mock import MagicMock, AsyncMock
+
+from featurehub_sdk.client_context import ClientEvalFeatureContext, ServerEvalFeatureContext, FrozenClientContext
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.polling_edge_service import PollingEdgeService
+
+
+class FrozenClientContextTest(TestCase):
+    def setUp(self) -> None:
+        self.repo = FeatureHubRepository()
+        self.repo.notify('features', [
+            {'id': '1', 'key': 'COLOUR', 'l': False, 'version': 1, 'type': 'STRING', 'value': 'orange',
+             'strategies': [{'id': 'nz', 'value': 'green', 'attributes': [
+                 {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]}]}
+        ])
+        self.edge = MagicMock()
+        self.edge.poll = AsyncMock()
+        self.edge.context_change = AsyncMock()
+
+    def test_equal_and_hashable_whatever_the_order_attributes_were_set(self):
+        first = ClientEvalFeatureContext(self.repo, self.edge).user_key('fred').attribute_values('a', ['1', '2'])
+        second = ClientEvalFeatureContext(self.repo, self.edge).attribute_values('a', ['1', '2']).user_key('fred')
+
+        self.assertEqual(first.freeze(), second.freeze())
+        self.assertEqual(hash(first.freeze()), hash(second.freeze()))
+        self.assertEqual(first.freeze().fingerprint, second.freeze().fingerprint)
+        self.assertEqual(len({first.freeze(), second.freeze()}), 1)
+
+        self.assertNotEqual(first.freeze(), second.attribute_values('a', ['1']).freeze())
+        self.assertNotEqual(first.freeze(), ServerEvalFeatureContext(self.repo, self.edge).user_key('fred')
+                            .attribute_values('a', ['1', '2']).freeze())
+
+    def test_cannot_be_changed(self):
+        ctx = ClientEvalFeatureContext(self.repo, self.edge).user_key('fred')
+        frozen = ctx.freeze()
+
+        for change in (lambda: frozen.user_key('mary'), lambda: frozen.attribute_values('a', ['b']),
+                       lambda: frozen.clear()):
+            with self.assertRaises(TypeError):
+                change()
+
+        # changing the original doesn't change the frozen copy
+        ctx.user_key('mary')
+        self.assertEqual(frozen.get_attr('userkey'), 'fred')
+        self.assertIs(frozen.freeze(), frozen)
+
+    def test_evaluates_like_the_original(self):
+        ctx = ClientEvalFeatureContext(self.repo, self.edge).country('new_zealand')
+        frozen = ctx.freeze()
+
+        self.assertTrue(frozen.client_evaluated())
+        self.assertEqual(frozen.get_string('COLOUR'), 'green')
+        self.assertEqual(frozen.build_sync(), frozen)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(frozen.get_string('COLOUR'))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, ['green'] * 8)
+
+        thawed = frozen.thaw()
+        self.assertIsInstance(thawed, ClientEvalFeatureContext)
+        self.assertEqual(thawed.user_key('x').get_string('COLOUR'), 'green')
+
+    def test_fingerprint_is_the_context_sha_of_a_server_evaluated_context(self):
+        frozen = ServerEvalFeatureContext(self.repo, self.edge).user_key('fred').attribute_values('piffle', ['a+']) \
+            .freeze()
+
+        self.assertFalse(frozen.client_evaluated())
+        self.assertEqual(frozen.header, 'piffle=a%2B&userkey=fred')
+        self.assertEqual(frozen.fingerprint, sha256(b'piffle=a%2B&userkey=fred').hexdigest())
+
+        asyncio.run(frozen.build())
+        self.edge.context_change.assert_called_once_with('piffle=a%2B&userkey=fred')
+
+        polling = PollingEdgeService('http://localhost/', ['123'], self.repo, 0)
+        polling.poll_with_interval = MagicMock()
+        polling._get_updates = AsyncMock()
+        asyncio.run(polling.context_change(frozen.header))
+        self.assertEqual(polling._sha_context, frozen.fingerprint)
+
+    def test_empty_server_context_polls(self):
+        frozen = FrozenClientContext(self.repo, self.edge, {}, False)
+        frozen.build_sync()
+        self.edge.poll_sync.assert_called_once_with()
+        self.assertEqual(repr(frozen), 'FrozenClientContext()')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import importlib.util
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from featurehub_sdk.client_context import ClientEvalFeatureContext
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.instrumentation import InstrumentationSink, MetricsInstrumentationSink, Histogram, \
+    CompositeInstrumentationSink
+from featurehub_sdk.interceptors import InterceptorValue
+from featurehub_sdk.polling_edge_service import PollingEdgeService
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self) -> None:
+        self.repo = FeatureHubRepository()
+        self.sink = MagicMock(spec=InstrumentationSink)
+        self.repo.notify('features', [
+            {'id': '1', 'key': 'PLAIN', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': False},
+            {'id': '2', 'key': 'TARGETED', 'l': False, 'version': 1, 'type': 'STRING', 'value': 'orange',
+             'strategies': [{'id': 'nz', 'value': 'green', 'attributes': [
+                 {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]}]}
+        ])
+
+    def test_nothing_reported_until_registered(self):
+        self.assertIsNone(self.repo.instrumentation)
+        self.repo.feature('PLAIN').get_flag
+        self.repo.register_instrumentation(self.sink)
+        self.repo.register_instrumentation(None)
+        self.repo.feature('PLAIN').get_flag
+        self.sink.feature_evaluated.assert_not_called()
+
+    def test_evaluation_and_strategy_matches_reported(self):
+        self.repo.register_instrumentation(self.sink)
+        ctx = ClientEvalFeatureContext(self.repo, MagicMock()).attribute_values('country', ['new_zealand'])
+
+        self.assertEqual(ctx.feature('TARGETED').get_string, 'green')
+
+        key, strategy_id, intercepted, duration = self.sink.feature_evaluated.call_args[0]
+        self.assertEqual((key, strategy_id, intercepted), ('TARGETED', 'nz', False))
+        self.assertGreaterEqual(duration, 0)
+
+        key, count, matched, _ = self.sink.strategies_applied.call_args[0]
+        self.assertEqual((key, count, matched), ('TARGETED', 1, 'nz'))
+
+    def test_interceptor_reported(self):
+        interceptor = MagicMock()
+        interceptor.intercepted_value.return_value = InterceptorValue('true')
+        self.repo.register_interceptor(interceptor)
+        self.repo.register_instrumentation(self.sink)
+
+        self.assertTrue(self.repo.feature('PLAIN').get_flag)
+        self.assertEqual(self.sink.feature_evaluated.call_args[0][0:3], ('PLAIN', None, True))
+
+    def test_updates_reported(self):
+        self.repo.register_instrumentation(self.sink)
+        self.repo.notify('feature', {'id': '1', 'key': 'PLAIN', 'l': False, 'version': 2, 'type': 'BOOLEAN',
+                                     'value': True})
+        self.assertEqual(self.sink.update_applied.call_args[0][0:2], ('feature', 1))
+
+    def test_polling_requests_reported(self):
+        self.repo.register_instrumentation(self.sink)
+        with patch("urllib3.PoolManager") as http_class_mock:
+            resp = MagicMock(name="http-response")
+            resp.status = 200
+            resp.headers = {}
+            resp.data = b'[{"features":[]}]'
+            http_class_mock.return_value.request.return_value = resp
+
+            asyncio.run(PollingEdgeService('http://localhost', ['123'], self.repo, 0).poll())
+
+        edge, status, _, size = self.sink.edge_request.call_args[0]
+        self.assertEqual((edge, status, size), ('polling', 200, 17))
+
+    def test_time_to_ready_reported(self):
+        metrics = MetricsInstrumentationSink()
+        self.repo.register_instrumentation(CompositeInstrumentationSink([metrics, self.sink]))
+        self.repo.not_ready()
+        self.repo.notify('features', [])
+        self.repo.notify('features', [])
+
+        self.sink.repository_ready.assert_called_once()
+        self.assertEqual(self.sink.repository_ready.call_args[0][0], self.repo.time_to_ready)
+        self.assertEqual(metrics.snapshot()['ready']['count'], 1)
+
+    def test_metrics_sink(self):
+        metrics = MetricsInstrumentationSink()
+        self.repo.register_instrumentation(CompositeInstrumentationSink([metrics, self.sink]))
+        ctx = ClientEvalFeatureContext(self.repo, MagicMock()).attribute_values('country', ['australia'])
+
+        for _ in range(10):
+            ctx.feature('TARGETED').get_string
+        metrics.cache_lookup('evaluation', True)
+        metrics.edge_event('streaming', 'feature', 20)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['evaluations']['TARGETED']['count'], 10)
+        self.assertEqual(snapshot['strategy_matches'], {'TARGETED/None': 10})
+        self.assertEqual(snapshot['cache'], {'evaluation/hit': 1})
+        self.assertEqual(snapshot['edge_bytes'], {'streaming': 20})
+        self.assertEqual(metrics.slowest_features(1)[0][0], 'TARGETED')
+        self.assertEqual(self.sink.feature_evaluated.call_count, 10)
+
+    def test_histogram(self):
+        histogram = Histogram((1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 16.5)
+        self.assertEqual(histogram.quantile(0.5), 2.0)
+        self.assertEqual(histogram.quantile(1), float('inf'))
+        self.assertIsNone(Histogram().quantile(0.5))
+        self.assertEqual(histogram.to_dict()['buckets'], {'1.0': 1, '2.0': 2, '4.0': 1, '+Inf': 1})
+
+
+@unittest.skipUnless(importlib.util.find_spec('prometheus_client'), 'prometheus_client is not installed')
+class PrometheusInstrumentationTest(TestCase):
+    def test_records_into_registry(self):
+        from prometheus_client import CollectorRegistry
+        from featurehub_sdk.instrumentation_prometheus import PrometheusInstrumentationSink
+
+        registry = CollectorRegistry()
+        sink = PrometheusInstrumentationSink(registry)
+        sink.feature_evaluated('A', None, False, 0.001)
+        sink.edge_request('polling', 200, 0.1, 30)
+
+        self.assertEqual(registry.get_sample_value('featurehub_feature_evaluation_seconds_count',
+                                                   {'feature': 'A', 'intercepted': 'false'}), 1)
+        self.assertEqual(registry.get_sample_value('featurehub_edge_received_bytes_total', {'edge': 'polling'}), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import TestCase
+
+import urllib3
+
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.local_edge import LocalEdgeServer
+from featurehub_sdk.polling_edge_service import PollingEdgeService
+from featurehub_sdk.streaming_edge_service import StreamingEdgeClient
+from featurehub_sdk.test.features import feature
+
+
+class LocalEdgeServerTest(TestCase):
+    def setUp(self) -> None:
+        self.server = LocalEdgeServer({
+            'pollInterval': 17,
+            'environments': {
+                'env1*key': {'id': 'env1', 'features': [feature('A', 1, True)]},
+                'env2*key': {'id': 'env2', 'features': [feature('B', 1, False)]},
+                'stale*key': {'id': 'stale', 'stale': True, 'features': [feature('C', 1, True)]},
+            }
+        }).start()
+        self.repo = FeatureHubRepository()
+
+    def tearDown(self) -> None:
+        if not self.server.stopped:
+            self.server.stop()
+
+    def wait_for(self, check, timeout: float = 5):
+        finish = time.time() + timeout
+        while not check() and time.time() < finish:
+            time.sleep(0.01)
+        self.assertTrue(check())
+
+    def test_polling_gets_features_and_honours_etags(self):
+        poller = PollingEdgeService(self.server.url, ['env1*key', 'env2*key'], self.repo, 0)
+        asyncio.run(poller.poll())
+
+        self.assertTrue(self.repo.feature('A').get_flag)
+        self.assertFalse(self.repo.feature('B').get_flag)
+        self.assertEqual(poller.interval, 17)
+
+        http = urllib3.PoolManager()
+        url = self.server.url + 'features?apiKey=env1*key'
+        etag = http.request('GET', url).headers['etag']
+        self.assertEqual(http.request('GET', url, headers={'if-none-match': etag}).status, 304)
+
+        self.server.push('env1*key', 'feature', feature('A', 2, False))
+        self.assertEqual(http.request('GET', url, headers={'if-none-match': etag}).status, 200)
+
+        asyncio.run(poller.poll())
+        self.assertFalse(self.repo.feature('A').get_flag)
+
+    def test_polling_unknown_key_and_stale(self):
+        poller = PollingEdgeService(self.server.url, ['missing*key'], self.repo, 0)
+        asyncio.run(poller.poll())
+        self.assertTrue(poller.cancelled)
+
+        poller = PollingEdgeService(self.server.url, ['stale*key'], self.repo, 0)
+        asyncio.run(poller.poll())
+        self.assertTrue(poller.stopped)
+        self.assertTrue(self.repo.feature('C').get_flag)
+
+    def test_streaming_receives_pushed_events(self):
+        client = StreamingEdgeClient(self.server.url, ['env1*key'], self.repo)
+        asyncio.run(client.poll())
+        self.wait_for(lambda: self.repo.is_ready())
+        self.assertTrue(self.repo.feature('A').get_flag)
+
+        self.server.push('env1*key', 'feature', feature('A', 2, False))
+        self.wait_for(lambda: self.repo.feature('A').get_version == 2)
+        self.assertFalse(self.repo.feature('A').get_flag)
+
+        self.server.push('env1*key', 'delete_feature', {'key': 'A'})
+        self.wait_for(lambda: not self.repo.feature('A').exists)
+
+        # closing the client while it is blocked reading would wait on the stream, so let the server end it instead
+        client._streaming_thread.cancel()
+        self.server.stop()
+        client._streaming_thread.join(5)
+        self.assertFalse(client._streaming_thread.is_alive())
+
+    def test_streaming_stale_environment_stops(self):
+        client = StreamingEdgeClient(self.server.url, ['stale*key'], self.repo)
+        asyncio.run(client.poll())
+        self.wait_for(lambda: client.stopped)
+        self.assertTrue(self.repo.feature('C').get_flag)
+
+    def test_play_bumps_feature_versions(self):
+        self.server.play([{'apiKey': 'env1*key', 'event': 'feature', 'data': feature('A', 1, False)}], 0, 3)
+        poller = PollingEdgeService(self.server.url, ['env1*key'], self.repo, 0)
+        asyncio.run(poller.poll())
+        self.assertEqual(self.repo.feature('A').get_version, 4)
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'fixture.json')
+            with open(path, 'w') as f:
+                json.dump({'environments': {'key': {'features': [feature('D', 1, True)]}}}, f)
+
+            server = LocalEdgeServer.from_file(path).start()
+            poller = PollingEdgeService(server.url, ['key'], self.repo, 0)
+            asyncio.run(poller.poll())
+            server.stop()
+
+        self.assertTrue(self.repo.feature('D').get_flag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest import TestCase
+
+from featurehub_sdk.batch_evaluation import BatchFeatureEvaluator
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.parallel_evaluation import ParallelBatchEvaluator, rows_to_columns
+from featurehub_sdk.test.test_batch_evaluation import FEATURES, random_rows, to_columns
+
+
+class ParallelBatchEvaluatorTest(TestCase):
+    def setUp(self) -> None:
+        self.repo = FeatureHubRepository()
+        self.repo.notify('features', FEATURES)
+
+    def test_results_in_order_and_match_batch_evaluation(self):
+        rows = random_rows(1000)
+        keys = ['PERCENTAGES', 'FLAG', 'PLAIN']
+        expected = BatchFeatureEvaluator(self.repo).evaluate_all(keys, to_columns(rows))
+
+        with ParallelBatchEvaluator(self.repo, processes=2, chunk_size=64, max_pending=3) as evaluator:
+            found = list(evaluator.evaluate(keys, iter(rows)))
+
+        self.assertEqual(len(found), 1000)
+        for key in keys:
+            self.assertEqual([row[key] for row in found], expected[key].values, key)
+
+    def test_chunks(self):
+        with ParallelBatchEvaluator(self.repo.extract_feature_state(), processes=1, chunk_size=3) as evaluator:
+            chunks = list(evaluator.evaluate_chunks(['FLAG'], ({'userkey': str(i), 'age': '45'} for i in range(7))))
+            self.assertEqual([len(c['FLAG']) for c in chunks], [3, 3, 1])
+            self.assertEqual(list(evaluator.evaluate(['FLAG'], [])), [])
+
+    def test_rows_to_columns(self):
+        self.assertEqual(rows_to_columns([{'a': 1}, {'b': 2}]), {'a': [1, None], 'b': [None, 2]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -118,5 +118,26 @@ class PollingEdgeServiceTest(TestCase):
             self.assertFalse(poller.cancelled)
             self.assertTrue(poller.stopped)
 
+    def test_sync_poll_and_context_change_need_no_loop(self):
+        with patch("urllib3.PoolManager") as http_class_mock, patch("asyncio.run") as asyncio_run:
+            http_mock = http_class_mock.return_value
+            resp = MagicMock(name="http-response")
+            resp.status = 200
+            resp.headers = {}
+            resp.data = self._data_mock()
+            http_mock.request.return_value = resp
+            repo = MagicMock(spec=FeatureHubRepository)
+
+            poller = PollingEdgeService('http://localhost/', ['123'], repo, 0)
+            poller.poll_sync()
+            self.assertEqual(http_mock.request.call_count, 1)
+
+            poller.context_change_sync('1234')
+            poller.context_change_sync('1234')
+            self.assertEqual(http_mock.request.call_count, 2)
+            self.assertEqual(http_mock.request.call_args.kwargs['headers']['x-featurehub'], '1234')
+            asyncio_run.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest import TestCase
+
+from featurehub_sdk.rollout_simulator import RolloutSimulator, synthetic_contexts, main
+
+FEATURE = {'id': 'feature-1', 'key': 'CHECKOUT', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': False,
+           'strategies': [
+               {'id': 'nz', 'name': 'new zealand', 'value': True, 'attributes': [
+                   {'conditional': 'EQUALS', 'fieldName': 'country', 'values': ['new_zealand'], 'type': 'STRING'}]},
+               {'id': 'twenty', 'name': '20%', 'value': True, 'percentage': 200000},
+           ]}
+
+
+class RolloutSimulatorTest(TestCase):
+    def test_exposure_of_synthetic_population(self):
+        contexts = synthetic_contexts(20000, {'country': {'new_zealand': 0.25, 'australia': 0.75}})
+        report = RolloutSimulator().simulate(FEATURE, contexts)
+
+        nz, twenty = report.strategies
+        self.assertEqual(report.rows, 20000)
+        self.assertEqual(nz.matched, contexts['country'].count('new_zealand'))
+        self.assertEqual(twenty.percentage, 20)
+        # the rest of the population gets 20%, give or take
+        self.assertAlmostEqual(twenty.share, 0.75 * 0.2, delta=0.01)
+        self.assertAlmostEqual(report.value_shares()[True], 0.25 + 0.75 * 0.2, delta=0.01)
+        self.assertEqual(nz.matched + twenty.matched + report.default.matched, 20000)
+
+        exposure = report.expected_exposure(1000000)
+        self.assertAlmostEqual(exposure[1], 150000, delta=10000)
+        self.assertEqual(set(exposure.keys()), {0, 1, None})
+
+        # strategies without ids don't collide with each other or the default
+        anonymous = dict(FEATURE, strategies=[{k: v for k, v in s.items() if k != 'id'} for s in FEATURE['strategies']])
+        self.assertEqual(RolloutSimulator().simulate(anonymous, contexts).expected_exposure(1000000), exposure)
+
+    def test_buckets_are_even(self):
+        report = RolloutSimulator(bucket_count=20).simulate(FEATURE, synthetic_contexts(20000))
+
+        self.assertEqual(len(report.buckets), 20)
+        self.assertEqual(sum(report.buckets), 20000)
+        # 19 degrees of freedom, anything over ~43 would be astonishing for a decent hash
+        self.assertLess(report.chi_squared, 43)
+
+    def test_rows_without_keys(self):
+        report = RolloutSimulator().simulate(FEATURE, [{'country': 'new_zealand'}, {'country': 'australia'},
+                                                       {'userkey': 'x', 'country': 'denmark'}])
+
+        self.assertEqual([s.matched for s in report.strategies], [1, report.strategies[1].matched])
+        self.assertEqual(sum(report.buckets), 1)
+        self.assertEqual(report.to_dict()['default']['value'], False)
+
+    def test_buckets_by_percentage_attributes(self):
+        by_company = dict(FEATURE, strategies=[{'id': 'companies', 'value': True, 'percentage': 200000,
+                                                'percentageAttributes': ['company']}])
+        contexts = [{'company': f"company-{i}"} for i in range(500)]
+        report = RolloutSimulator().simulate(by_company, contexts)
+
+        # no user keys, but ApplyFeature buckets them by company
+        self.assertEqual(sum(report.buckets), 500)
+        self.assertAlmostEqual(report.strategies[0].share, 0.2, delta=0.06)
+
+    def test_command_line_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = os.path.join(tmp, 'features.json')
+            with open(snapshot, 'w') as f:
+                json.dump([FEATURE], f)
+
+            for args in (['--snapshot', os.path.join(tmp, 'missing.json'), '--feature', 'CHECKOUT'],
+                         ['--snapshot', snapshot, '--feature', 'NOPE'],
+                         ['--snapshot', snapshot, '--feature', 'CHECKOUT', '--sample', os.path.join(tmp, 'none')]):
+                with redirect_stderr(io.StringIO()) as err:
+                    self.assertEqual(main(args), 1)
+                self.assertEqual(len(err.getvalue().splitlines()), 1, err.getvalue())
+
+    def test_synthetic_contexts_are_reproducible(self):
+        self.assertEqual(synthetic_contexts(10, {'platform': ['ios', 'android']}),
+                         synthetic_contexts(10, {'platform': ['ios', 'android']}))
+        self.assertNotEqual(synthetic_contexts(10, seed=1), synthetic_contexts(10, seed=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
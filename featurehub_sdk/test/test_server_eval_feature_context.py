@@ -39,7 +39,18 @@ class ServerEvalFeatureContextTest(TestCase):
 
     def test_sync_build_works(self):
         self.client_context.build_sync()
-        self.mock_edge.poll.assert_called_once_with()
+        self.mock_edge.poll_sync.assert_called_once_with()
+
+    def test_sync_build_sends_changed_headers_without_a_loop(self):
+        ctx = self.client_context.user_key('fred')
+        ctx.build_sync()
+        ctx.build_sync()
+        self.mock_edge.context_change_sync.assert_called_once_with('userkey=fred')
+
+        ctx.clear().build_sync()
+        self.mock_edge.context_change_sync.assert_called_with('')
+        self.assertEqual(self.mock_repo.not_ready.call_count, 2)
+        self.mock_edge.poll_sync.assert_not_called()
 
     def test_encodes_attributes_and_changes_headers_when_attrs(self):
         asyncio.run(self.client_context.user_key('fred').attribute_values('piffle', ['a+', 'b', 'c']).build())
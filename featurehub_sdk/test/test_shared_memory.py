@@ -0,0 +1,121 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from featurehub_sdk.featurehub_config import FeatureHubConfig
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.shared_memory import SharedFeatureSnapshot, SharedMemoryPublishingRepository, \
+    SharedMemoryEdgeService
+from featurehub_sdk.test.features import feature
+
+
+class SharedMemoryTest(TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'featurehub.snapshot')
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_nothing_published_yet(self):
+        reader = SharedFeatureSnapshot(self.path)
+        self.assertEqual(reader.generation(), 0)
+        self.assertIsNone(reader.read())
+
+        SharedFeatureSnapshot(self.path, writable=True).close()
+        self.assertIsNone(reader.read())
+        reader.close()
+
+    def test_publish_and_read(self):
+        writer = SharedFeatureSnapshot(self.path, writable=True)
+        reader = SharedFeatureSnapshot(self.path)
+
+        generation = writer.publish([feature('A', 1, True)])
+        self.assertEqual(reader.generation(), generation)
+        self.assertEqual(reader.read(), (generation, [feature('A', 1, True)]))
+
+        self.assertGreater(writer.publish([feature('A', 2, False)]), generation)
+        self.assertEqual(reader.read()[1], [feature('A', 2, False)])
+
+        writer.close()
+        reader.close()
+
+    def test_reader_follows_file_growth(self):
+        writer = SharedFeatureSnapshot(self.path, writable=True)
+        reader = SharedFeatureSnapshot(self.path)
+        writer.publish([feature('A', 1, True)])
+        self.assertIsNotNone(reader.read())
+
+        big = [feature(f"FEATURE_{i}", 1, True) for i in range(3000)]
+        writer.publish(big)
+        self.assertEqual(reader.read()[1], big)
+
+        writer.close()
+        reader.close()
+
+    def test_new_publisher_continues_generation(self):
+        writer = SharedFeatureSnapshot(self.path, writable=True)
+        generation = writer.publish([])
+        writer.close()
+
+        writer = SharedFeatureSnapshot(self.path, writable=True)
+        self.assertGreater(writer.publish([]), generation)
+        writer.close()
+
+    def test_read_only_cannot_publish(self):
+        self.assertRaises(TypeError, lambda: SharedFeatureSnapshot(self.path).publish([]))
+
+    def test_worker_repository_follows_publisher(self):
+        publisher = SharedMemoryPublishingRepository(self.path)
+        worker = FeatureHubRepository()
+        edge = SharedMemoryEdgeService(self.path, ['abc*123'], worker, 0)
+
+        asyncio.run(edge.poll())
+        self.assertFalse(worker.is_ready())
+
+        publisher.notify('features', [feature('A', 1, True), feature('B', 1, False)])
+        asyncio.run(edge.poll())
+        self.assertTrue(worker.is_ready())
+        self.assertTrue(worker.feature('A').get_flag)
+        self.assertFalse(worker.feature('B').get_flag)
+
+        generation = edge.generation
+        self.assertFalse(edge.check_for_updates())
+        self.assertEqual(edge.generation, generation)
+
+        publisher.notify('feature', feature('A', 2, False))
+        publisher.notify('delete_feature', {'key': 'B'})
+        self.assertTrue(edge.check_for_updates())
+        self.assertFalse(worker.feature('A').get_flag)
+        self.assertFalse(worker.feature('B').exists)
+        self.assertTrue(edge.client_evaluated())
+
+        edge.close()
+        publisher.close()
+
+    def test_only_the_creating_process_publishes(self):
+        publisher = SharedMemoryPublishingRepository(self.path)
+        publisher.notify('features', [feature('A', 1, True)])
+        generation = publisher.snapshot.generation()
+
+        # as a forked child sees it
+        publisher._pid = os.getpid() + 1
+        with self.assertLogs('featurehub_sdk', level='WARNING'):
+            publisher.notify('feature', feature('A', 2, False))
+        self.assertEqual(publisher.snapshot.generation(), generation)
+        self.assertFalse(publisher.feature('A').get_flag)
+        publisher.close()
+
+    def test_config_uses_shared_memory_edge(self):
+        config = FeatureHubConfig('http://localhost', ['123'])
+        config.use_shared_memory_edge_service(self.path, 0)
+        edge = config.get_or_create_edge_service()
+        self.assertTrue(isinstance(edge, SharedMemoryEdgeService))
+        config.close()
+        self.assertTrue(edge.cancelled)
+
+
+if __name__ == '__main__':
+    unittest.main()
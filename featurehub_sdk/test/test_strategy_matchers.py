@@ -102,6 +102,18 @@ class StrategyMatcherTest(TestCase):
         self.equals(RolloutStrategyAttributeConditional.Equals, ['10.0.0.0/24', '192.168.0.0/16'], '192.168.86.72', True)
         self.equals(RolloutStrategyAttributeConditional.Equals, ['10.0.0.0/24', '192.168.0.0/16'], '172.168.86.72', False)
 
+    def test_values_that_are_never_compared_are_not_parsed(self):
+        # the supplied value is only parsed to compare it, so an unsupported conditional or no values doesn't raise
+        self.field_type = RolloutStrategyFieldType.IpAddress
+        self.equals(RolloutStrategyAttributeConditional.StartsWith, ['192.168.0.0/16'], 'not-an-ip', False)
+        self.equals(RolloutStrategyAttributeConditional.Equals, [], 'not-an-ip', False)
+        self.equals(RolloutStrategyAttributeConditional.Excludes, [], 'not-an-ip', True)
+
+        self.field_type = RolloutStrategyFieldType.SemanticVersion
+        self.equals(RolloutStrategyAttributeConditional.Regex, ['1.*'], 'not-a-version', False)
+        self.equals(RolloutStrategyAttributeConditional.Greater, [], 'not-a-version', False)
+        self.equals(RolloutStrategyAttributeConditional.NotEquals, [], 'not-a-version', True)
+
     def test_dates(self):
         self.field_type = RolloutStrategyFieldType.Date
 
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from featurehub_sdk.featurehub_config import FeatureHubConfig
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.local_edge import LocalEdgeServer
+from featurehub_sdk.streaming_multiplexer import StreamingMultiplexer, MultiplexedStreamingEdgeClient
+from featurehub_sdk.test.features import feature
+
+
+class StreamingMultiplexerTest(TestCase):
+    def setUp(self) -> None:
+        environments = {f"env{i}*key": {'id': f"env{i}", 'features': [feature(f"F{i}", 1, True)]} for i in range(20)}
+        environments['stale*key'] = {'id': 'stale', 'stale': True, 'features': [feature('C', 1, True)]}
+        self.server = LocalEdgeServer({'environments': environments}).start()
+        self.multiplexer = StreamingMultiplexer(reconnect_delay=0.05)
+
+    def tearDown(self) -> None:
+        self.multiplexer.close()
+        if not self.server.stopped:
+            self.server.stop()
+
+    def wait_for(self, check, timeout: float = 5):
+        finish = time.time() + timeout
+        while not check() and time.time() < finish:
+            time.sleep(0.01)
+        self.assertTrue(check())
+
+    def test_many_streams_on_one_thread(self):
+        repos = [FeatureHubRepository() for _ in range(20)]
+        streams = [self.multiplexer.add(self.server.url, f"env{i}*key", repo) for i, repo in enumerate(repos)]
+
+        self.wait_for(lambda: all(repo.is_ready() for repo in repos))
+        # the local edge has a thread per connection, we have one for all of them
+        self.assertEqual([t.name for t in threading.enumerate() if t.name.startswith('featurehub-streams')],
+                         ['featurehub-streams'])
+        self.assertTrue(repos[7].feature('F7').get_flag)
+        self.assertFalse(repos[7].feature('F8').exists)
+
+        # each event goes to the repository of the stream it arrived on
+        self.server.push('env3*key', 'feature', feature('F3', 2, False))
+        self.wait_for(lambda: repos[3].feature('F3').get_version == 2)
+        self.assertFalse(repos[3].feature('F3').get_flag)
+        self.assertTrue(repos[4].feature('F4').get_flag)
+
+        self.multiplexer.remove(streams[3])
+        self.assertEqual(len(self.multiplexer.streams), 19)
+        time.sleep(0.1)
+        self.server.push('env3*key', 'feature', feature('F3', 3, True))
+        self.server.push('env4*key', 'delete_feature', {'key': 'F4'})
+        self.wait_for(lambda: not repos[4].feature('F4').exists)
+        self.assertEqual(repos[3].feature('F3').get_version, 2)
+
+    def test_every_key_of_a_config(self):
+        config = FeatureHubConfig(self.server.url, ['env1*key', 'env2*key'])
+        config.use_multiplexed_streaming_edge_service(self.multiplexer)
+        config.init_sync(wait_ready=5)
+
+        self.assertTrue(config.repository().feature('F1').get_flag)
+        self.wait_for(lambda: config.repository().feature('F2').exists)
+        self.assertEqual(len(self.multiplexer.streams), 2)
+
+        config.close()
+        self.assertEqual(self.multiplexer.streams, [])
+
+    def test_unknown_keys_fail_and_stale_environments_stop(self):
+        repo = FeatureHubRepository()
+        missing = self.multiplexer.add(self.server.url, 'missing*key', repo)
+        self.assertFalse(repo.wait_until_ready(5))
+        self.assertTrue(missing.cancelled)
+
+        client = MultiplexedStreamingEdgeClient(self.server.url, ['stale*key'], repo, self.multiplexer)
+        client.poll_sync()
+        self.wait_for(lambda: client.stopped)
+        self.assertTrue(repo.feature('C').get_flag)
+        self.assertTrue(client.client_evaluated())
+
+    def test_reconnects_from_the_last_event(self):
+        repo = FeatureHubRepository()
+        repo.register_instrumentation(sink := MagicMock())
+        self.multiplexer.add(self.server.url, 'env1*key', repo)
+        self.wait_for(lambda: repo.is_ready())
+
+        # the server ends the stream, we connect again and carry on
+        self.server.push('env1*key', 'feature', feature('F1', 2, False))
+        self.wait_for(lambda: repo.feature('F1').get_version == 2)
+        with self.server._lock:
+            subscribers = list(self.server._environments['env1*key'].subscribers)
+        for subscriber in subscribers:
+            subscriber.put(None)
+
+        self.wait_for(lambda: len([c for c in sink.edge_request.call_args_list if c.args[1] == 200]) == 2)
+        self.server.push('env1*key', 'feature', feature('F1', 3, True))
+        self.wait_for(lambda: repo.feature('F1').get_version == 3)
+        sink.edge_event.assert_any_call('streaming', 'features', unittest.mock.ANY)
+
+    def test_events_across_chunks(self):
+        async def body():
+            for block in [b'id: 1\nevent: feat', b'ure\ndata: {"a"', b': 1}\r\n\r\n: comment\n\nevent: bye\n\n']:
+                yield block
+
+        async def collect():
+            return [e async for e in StreamingMultiplexer._events(body())]
+
+        loop = asyncio.new_event_loop()
+        try:
+            events = loop.run_until_complete(collect())
+        finally:
+            loop.close()
+
+        self.assertEqual(events, [('feature', '{"a": 1}', '1'), ('bye', '', '1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
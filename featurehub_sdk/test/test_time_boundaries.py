@@ -0,0 +1,130 @@
+import datetime
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from featurehub_sdk.client_context import ClientEvalFeatureContext, ConditionTable, RolloutStrategyAttribute
+from featurehub_sdk.evaluation_cache import EvaluationCache
+from featurehub_sdk.featurehub_repository import FeatureHubRepository
+from featurehub_sdk.strategy_matchers import ApplyFeature, MatcherRegistry, StrategyMatcher
+
+
+def launch(conditional: str = 'LESS', values=('2026-10-19T17:00:00',), field_type: str = 'DATETIME') -> dict:
+    return {'id': '1', 'key': 'LAUNCH', 'l': False, 'version': 1, 'type': 'BOOLEAN', 'value': False,
+            'strategies': [{'id': 'soon', 'value': True, 'attributes': [
+                {'id': 'a', 'conditional': conditional, 'fieldName': 'now', 'values': list(values),
+                 'type': field_type}]}]}
+
+
+class Clock:
+    now = datetime.datetime(2026, 10, 19, 16, 0, 0)
+
+    def __call__(self):
+        return self.now
+
+
+class CountingMatcher(StrategyMatcher):
+    def __init__(self, matcher: StrategyMatcher, counts: list):
+        self._matcher = matcher
+        self._counts = counts
+
+    def match(self, supplied_value, attr) -> bool:
+        self._counts.append(supplied_value)
+        return self._matcher.match(supplied_value, attr)
+
+
+class CountingRegistry(MatcherRegistry):
+    def __init__(self):
+        self.counts = []
+
+    def find_matcher(self, attr):
+        return CountingMatcher(super().find_matcher(attr), self.counts)
+
+
+class TimeBoundaryTest(TestCase):
+    def setUp(self) -> None:
+        self.clock = Clock()
+        self.registry = CountingRegistry()
+        self.apply = ApplyFeature(matcher_repository=self.registry, clock=self.clock)
+        self.repo = FeatureHubRepository(self.apply, ConditionTable())
+
+    def context(self):
+        return ClientEvalFeatureContext(self.repo, MagicMock())
+
+    def test_boundaries_of_conditions(self):
+        now = datetime.datetime(2026, 10, 19, 16, 0, 0)
+
+        def boundary(conditional: str, values, field_type: str = 'DATETIME'):
+            return RolloutStrategyAttribute(launch(conditional, values, field_type)['strategies'][0]['attributes'][0]) \
+                .next_time_boundary(now)
+
+        self.assertEqual(boundary('LESS', ['2026-10-19T17:00:00']), datetime.datetime(2026, 10, 19, 17, 0, 0))
+        self.assertIsNone(boundary('GREATER', ['2026-10-19T15:00:00.250+12:00']))
+        self.assertEqual(boundary('INCLUDES', ['2026-10-19T17']), now)
+        self.assertEqual(boundary('GREATER', ['2026-11-01'], 'DATE'), datetime.datetime(2026, 11, 1))
+        self.assertIsNone(boundary('LESS', ['2026-01-01'], 'DATE'))
+        self.assertEqual(boundary('REGEX', ['.*-01'], 'DATE'), datetime.datetime(2026, 10, 20))
+
+    def test_time_is_checked_again_when_it_passes_a_value(self):
+        self.repo.notify('features', [launch()])
+        ctx = self.context()
+
+        applied = self.apply.apply(self.repo.feature('LAUNCH').strategies, 'LAUNCH', '1', ctx)
+        self.assertTrue(applied.matched)
+        self.assertEqual(applied.valid_for, 3600)
+        self.assertEqual(len(self.registry.counts), 1)
+
+        self.clock.now = datetime.datetime(2026, 10, 19, 16, 59, 59)
+        self.assertTrue(ctx.get_flag('LAUNCH'))
+        self.assertEqual(len(self.registry.counts), 1)
+
+        # within the second the value names, it is checked every time
+        self.clock.now = datetime.datetime(2026, 10, 19, 17, 0, 0, 500)
+        self.assertFalse(ctx.get_flag('LAUNCH'))
+        self.assertFalse(ctx.get_flag('LAUNCH'))
+        self.assertEqual(len(self.registry.counts), 3)
+
+        # and once it is past, never again
+        self.clock.now = datetime.datetime(2026, 10, 19, 17, 0, 1)
+        self.assertFalse(ctx.get_flag('LAUNCH'))
+        self.clock.now = datetime.datetime(2027, 1, 1)
+        self.assertFalse(ctx.get_flag('LAUNCH'))
+        self.assertEqual(self.registry.counts[-1], '2026-10-19T17:00:01')
+        self.assertEqual(len(self.registry.counts), 4)
+
+    def test_a_time_the_context_supplies_does_not_expire(self):
+        self.repo.notify('features', [launch()])
+        ctx = self.context().attribute_values('now', ['2026-10-19T18:00:00'])
+
+        applied = self.apply.apply(self.repo.feature('LAUNCH').strategies, 'LAUNCH', '1', ctx)
+        self.assertFalse(applied.matched)
+        self.assertIsNone(applied.valid_for)
+
+    def test_cached_evaluations_expire_at_the_boundary(self):
+        self.repo.notify('features', [launch(values=['2026-10-19T16:00:10'])])
+        monotonic = Clock()
+        monotonic.now = 0.0
+        cache = EvaluationCache(ttl=60, clock=monotonic)
+        self.repo.register_evaluation_cache(cache)
+        self.apply.apply = MagicMock(side_effect=self.apply.apply)
+
+        self.assertTrue(self.context().freeze().get_flag('LAUNCH'))
+        monotonic.now = 9.0
+        self.assertTrue(self.context().freeze().get_flag('LAUNCH'))
+        self.assertEqual(self.apply.apply.call_count, 1)
+
+        monotonic.now = 10.0
+        self.clock.now = datetime.datetime(2026, 10, 19, 16, 0, 11)
+        self.assertFalse(self.context().freeze().get_flag('LAUNCH'))
+        self.assertEqual(self.apply.apply.call_count, 2)
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+        # inside the boundary's second nothing is cached at all
+        self.repo.notify('feature', dict(launch(values=['2026-10-19T16:00:11']), version=2))
+        self.context().freeze().get_flag('LAUNCH')
+        self.context().freeze().get_flag('LAUNCH')
+        self.assertEqual(self.apply.apply.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,4 +22,7 @@ setup(
                       'sseclient-py==1.7.*',
                       'murmurhash2==0.2.*',
                       'node_semver==0.8.*'],
+    extras_require={'prometheus': ['prometheus_client'],
+                    'opentelemetry': ['opentelemetry-api']},
+    entry_points={'console_scripts': ['featurehub-eval=featurehub_sdk.cli:main']},
 )